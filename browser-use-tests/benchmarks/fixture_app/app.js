@@ -0,0 +1,26 @@
+// Minimal stand-in for the app's client-side behaviour on the MBTI screen
+(() => {
+  const questions = [
+    "You feel energized after spending time with a group of people.",
+    "You prefer concrete facts over abstract ideas.",
+    "You make decisions based on logic rather than feelings.",
+    "You like to have a plan rather than keep your options open."
+  ];
+  const options = document.querySelectorAll(".option");
+  const next = document.querySelector("[data-testid=mbti-next]");
+  if (!next) return;
+
+  let current = 0;
+  options.forEach((option) => option.addEventListener("click", () => {
+    options.forEach((other) => other.setAttribute("aria-checked", String(other === option)));
+    next.disabled = false;
+  }));
+
+  next.addEventListener("click", () => {
+    current = (current + 1) % questions.length;
+    document.querySelector("[data-testid=question]").textContent = questions[current];
+    document.querySelector("[data-testid=question-number]").textContent = String(current + 1);
+    options.forEach((option) => option.setAttribute("aria-checked", "false"));
+    next.disabled = true;
+  });
+})();
@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+"""Micro-benchmarks of the LLMBrowser harness against a static fixture app.
+
+The fixture app in benchmarks/fixture_app mimics the Aware onboarding flow
+(Welcome, three intro screens, auth, sign-up, MBTI) and is served locally.
+Actions are scripted, so no LLM is called: the timings measure the harness
+itself. Each stage is timed separately and reported as percentiles; the run
+fails if a stage regresses against the stored baseline.
+
+    python benchmarks/run_benchmarks.py --iterations 10
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loguru import logger
+
+from lib.llm_browser import LLMBrowser
+from lib.llm_cache import LLMCache
+
+
+BENCHMARK_DIR = Path(__file__).parent
+FIXTURE_APP_DIR = BENCHMARK_DIR / "fixture_app"
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+
+# Stages in the order they happen, for reporting
+STAGES = ["start", "content", "snapshot", "prompt_build", "actions", "screenshot", "teardown"]
+
+# (screen, task, scripted actions) for one pass through the fixture flow
+FLOW = [
+    ("welcome", "Click the Get Started button", [
+        {"type": "click", "selector": "[data-testid=get-started]", "description": "Start onboarding"}
+    ]),
+    ("intro_1", "Click Next on the first intro screen", [
+        {"type": "click", "selector": "[data-testid=intro-next]", "description": "Next intro screen"}
+    ]),
+    ("intro_2", "Click Next on the second intro screen", [
+        {"type": "click", "selector": "[data-testid=intro-next]", "description": "Next intro screen"}
+    ]),
+    ("intro_3", "Click Next on the third intro screen", [
+        {"type": "click", "selector": "[data-testid=intro-next]", "description": "Go to the auth screen"}
+    ]),
+    ("auth", "Click Sign Up", [
+        {"type": "click", "selector": "[data-testid=sign-up]", "description": "Open the sign-up form"}
+    ]),
+    ("signup", "Fill out the sign-up form and submit it", [
+        {"type": "input", "selector": "#email", "value": "bench@example.com", "description": "Enter email"},
+        {"type": "input", "selector": "#password", "value": "Benchmark123!", "description": "Enter password"},
+        {"type": "click", "selector": "[data-testid=create-account]", "description": "Submit the form"}
+    ]),
+    ("mbti", "Answer the first MBTI question", [
+        {"type": "click", "selector": "[data-testid=answer-agree]", "description": "Choose Agree"},
+        {"type": "click", "selector": "[data-testid=mbti-next]", "description": "Go to the next question"}
+    ]),
+]
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class StageTimer:
+    """Collects wall-clock samples per benchmark stage."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the block as one sample of a stage.
+
+        Args:
+            name: Stage name
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append((time.perf_counter() - started) * 1000)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile.
+
+    Args:
+        values: Samples
+        fraction: Percentile as a fraction (0.5 for the median)
+
+    Returns:
+        The percentile, or 0.0 without samples
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(timer: StageTimer) -> Dict[str, Dict[str, float]]:
+    """Summarize the samples of every stage in milliseconds.
+
+    Args:
+        timer: Timer holding the samples
+
+    Returns:
+        Mapping of stage name to count, mean, p50, p95 and max
+    """
+    stages = {}
+    for name in STAGES:
+        values = timer.samples.get(name, [])
+        if values:
+            stages[name] = {
+                "count": len(values),
+                "mean": round(sum(values) / len(values), 3),
+                "p50": round(percentile(values, 0.5), 3),
+                "p95": round(percentile(values, 0.95), 3),
+                "max": round(max(values), 3)
+            }
+    return stages
+
+
+async def run_iteration(timer: StageTimer, app_url: str, screenshot_dir: str, browser_type: str, iteration: int) -> None:
+    """Drive one browser session through the whole fixture flow.
+
+    Args:
+        timer: Timer to record stage samples in
+        app_url: URL of the fixture app's Welcome screen
+        screenshot_dir: Directory for the benchmark's screenshots
+        browser_type: Browser to benchmark (chromium, firefox, webkit)
+        iteration: Iteration number, used in screenshot names
+    """
+    browser = LLMBrowser(
+        base_url=app_url,
+        headless=True,
+        browser_type=browser_type,
+        screenshot_dir=screenshot_dir,
+        api_key="benchmark",
+        cache=LLMCache(enabled=False)
+    )
+
+    with timer.stage("start"):
+        await browser.start()
+
+    try:
+        for screen, task, actions in FLOW:
+            with timer.stage("content"):
+                await browser.page.content()
+
+            with timer.stage("snapshot"):
+                snapshot = await browser._snapshot_page()
+
+            with timer.stage("prompt_build"):
+                browser._build_task_prompt(task, snapshot.to_prompt(), None)
+
+            with timer.stage("actions"):
+                results = await browser._execute_actions(actions)
+            failed = [r["error"] for r in results if not r["success"]]
+            if failed:
+                raise RuntimeError(f"Scripted actions failed on the {screen} screen: {failed}")
+
+            # Navigation finishing is the fixture server's time, not the harness's
+            await browser.page.wait_for_load_state("load")
+
+            with timer.stage("screenshot"):
+                await browser._save_screenshot(f"bench_{iteration}_{screen}")
+    finally:
+        with timer.stage("teardown"):
+            await browser.stop()
+
+
+async def run_benchmarks(iterations: int, warmup: int, browser_type: str) -> Dict[str, Any]:
+    """Serve the fixture app and benchmark the harness against it.
+
+    Args:
+        iterations: Number of measured passes through the flow
+        warmup: Number of unmeasured passes run first
+        browser_type: Browser to benchmark
+
+    Returns:
+        Results with per-stage statistics and run metadata
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(FIXTURE_APP_DIR)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app_url = f"http://127.0.0.1:{server.server_address[1]}/index.html"
+
+    timer = StageTimer()
+    try:
+        with tempfile.TemporaryDirectory() as screenshot_dir:
+            for i in range(warmup):
+                await run_iteration(StageTimer(), app_url, screenshot_dir, browser_type, -1 - i)
+            for i in range(iterations):
+                await run_iteration(timer, app_url, screenshot_dir, browser_type, i)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return {
+        "stages": summarize(timer),
+        "iterations": iterations,
+        "screens": len(FLOW),
+        "browser": browser_type,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.time()
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta_ms: float) -> List[str]:
+    """Find stages that are slower than the baseline allows.
+
+    A stage regresses when its p50 or p95 exceeds the baseline by more than
+    the relative tolerance and by more than min_delta_ms, so that noise on
+    sub-millisecond stages doesn't fail the run.
+
+    Args:
+        results: Results of this run
+        baseline: Stored baseline results
+        tolerance: Allowed relative slowdown (0.25 = 25%)
+        min_delta_ms: Allowed absolute slowdown in milliseconds
+
+    Returns:
+        One message per regression
+    """
+    regressions = []
+    for stage, base in baseline.get("stages", {}).items():
+        current = results["stages"].get(stage)
+        if current is None:
+            continue
+        for stat in ("p50", "p95"):
+            limit = max(base[stat] * (1 + tolerance), base[stat] + min_delta_ms)
+            if current[stat] > limit:
+                regressions.append(
+                    f"{stage} {stat}: {current[stat]:.1f}ms > {limit:.1f}ms allowed (baseline {base[stat]:.1f}ms)"
+                )
+    return regressions
+
+
+def print_report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """Print the per-stage statistics, with the baseline p50 when available.
+
+    Args:
+        results: Results of this run
+        baseline: Stored baseline results, if any
+    """
+    base_stages = (baseline or {}).get("stages", {})
+    print(f"\n{'stage':<14}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}{'base p50':>11}")
+    for stage, stats in results["stages"].items():
+        base = base_stages.get(stage, {}).get("p50")
+        base_text = f"{base:.2f}" if base is not None else "-"
+        print(f"{stage:<14}{stats['count']:>7}{stats['mean']:>10.2f}{stats['p50']:>10.2f}"
+              f"{stats['p95']:>10.2f}{stats['max']:>10.2f}{base_text:>11}")
+    print("(milliseconds)\n")
+
+
+def main():
+    """Main entry point for the benchmark runner."""
+    parser = argparse.ArgumentParser(description="Benchmark the LLMBrowser harness against a static fixture app")
+    parser.add_argument("--iterations", type=int, default=5, help="Measured passes through the fixture flow")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured passes run first")
+    parser.add_argument("--browser", choices=["chromium", "firefox", "webkit"], default="chromium", help="Browser type to use")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline results to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown per stage")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Allowed absolute slowdown per stage")
+    parser.add_argument("--output", help="Also write this run's results to this JSON file")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    results = asyncio.run(run_benchmarks(args.iterations, args.warmup, args.browser))
+
+    if args.output:
+        Path(args.output).parent.mkdir(exist_ok=True, parents=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print_report(results)
+        print(f"Baseline written to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print_report(results)
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one")
+        return 0
+
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    print_report(results, baseline)
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print("Regressions against the baseline:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+
+    print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
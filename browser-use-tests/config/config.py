@@ -1,14 +1,44 @@
 """Configuration management for the browser-use tests."""
 import os
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Parallel worker id (set by pytest-xdist); per-worker output goes in its own subdirectory
+WORKER_ID: str = os.getenv("PYTEST_XDIST_WORKER", "")
+
+
+def _worker_path(path: str) -> str:
+    """Namespace a directory by the current parallel worker, if any."""
+    return os.path.join(path, WORKER_ID) if WORKER_ID else path
+
+
 # OpenAI API key for LLM interaction
 OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
+# OpenAI-compatible endpoint to use instead of the public API (e.g. the local replay server)
+OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")
+
+# Shared LLM client: request concurrency and timeout
+LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MODEL_CONCURRENCY: str = os.getenv("LLM_MODEL_CONCURRENCY", "")  # e.g. "gpt-4o=4,gpt-4o-mini=8"
+LLM_REQUEST_TIMEOUT: float = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+
+# Retries of throttled (429), timed out and failing (5xx) LLM requests
+LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "1"))
+LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+LLM_STEP_MAX_WAITS: int = int(os.getenv("LLM_STEP_MAX_WAITS", "3"))  # waits per step that don't use up its retries
+
+# Stream action plans and start executing each action as soon as it has been generated
+LLM_STREAM_ACTIONS: bool = os.getenv("LLM_STREAM_ACTIONS", "true").lower() == "true"
+
+# Stateful planning conversations: full snapshot first, then DOM diffs (the mode is enabled per test class)
+LLM_CONVERSATION_MAX_TURNS: int = int(os.getenv("LLM_CONVERSATION_MAX_TURNS", "8"))
+LLM_CONVERSATION_MAX_DIFF_RATIO: float = float(os.getenv("LLM_CONVERSATION_MAX_DIFF_RATIO", "0.5"))
+
 # Base URL for the application being tested
 BASE_URL: str = os.getenv("BASE_URL", "http://localhost:19006")
 
@@ -21,8 +51,84 @@ HEADLESS: bool = os.getenv("HEADLESS", "false").lower() == "true"
 BROWSER_TYPE: str = os.getenv("BROWSER_TYPE", "chromium")  # chromium, firefox, webkit
 
 # Screenshot directory
-SCREENSHOT_DIR: str = os.getenv("SCREENSHOT_DIR", "screenshots")
+SCREENSHOT_DIR: str = _worker_path(os.getenv("SCREENSHOT_DIR", "screenshots"))
+
+# Log and test data locations
+LOG_DIR: str = os.getenv("LOG_DIR", "browser-use-tests/logs")
+LOG_FILE: str = os.path.join(LOG_DIR, f"tests-{WORKER_ID}.log" if WORKER_ID else "tests.log")
+TEST_DATA_DIR: str = _worker_path(os.getenv("TEST_DATA_DIR", "browser-use-tests/test_data"))
 
 # Test data
 TEST_EMAIL: str = os.getenv("TEST_EMAIL", "test@example.com")
-TEST_PASSWORD: str = os.getenv("TEST_PASSWORD", "TestPassword123!")
\ No newline at end of file
+TEST_PASSWORD: str = os.getenv("TEST_PASSWORD", "TestPassword123!")
+
+# LLM response cache
+LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_DIR: str = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+LLM_CACHE_MAX_AGE_HOURS: float = float(os.getenv("LLM_CACHE_MAX_AGE_HOURS", "168"))
+
+# Vision screen classification cache (perceptual hash distance out of 256 bits)
+SCREEN_CACHE_ENABLED: bool = os.getenv("SCREEN_CACHE_ENABLED", "true").lower() == "true"
+SCREEN_CACHE_MAX_DISTANCE: int = int(os.getenv("SCREEN_CACHE_MAX_DISTANCE", "10"))
+SCREEN_CACHE_MAX_ENTRIES: int = int(os.getenv("SCREEN_CACHE_MAX_ENTRIES", "200"))
+
+# Local DOM screen classifier; below this confidence the vision model decides
+SCREEN_CLASSIFIER_MIN_CONFIDENCE: float = float(os.getenv("SCREEN_CLASSIFIER_MIN_CONFIDENCE", "0.6"))
+
+# Images sent to vision models
+VISION_MODEL: str = os.getenv("VISION_MODEL", "gpt-4o")
+VISION_MAX_WIDTH: int = int(os.getenv("VISION_MAX_WIDTH", "768"))  # 0 keeps the original size
+VISION_DETAIL: str = os.getenv("VISION_DETAIL", "low")  # low, high, auto
+VISION_IMAGE_FORMAT: str = os.getenv("VISION_IMAGE_FORMAT", "jpeg")  # jpeg, png, webp
+VISION_IMAGE_QUALITY: int = int(os.getenv("VISION_IMAGE_QUALITY", "85"))
+
+# Page snapshots sent to the LLM ("compact" element list or raw "html")
+DOM_SNAPSHOT_MODE: str = os.getenv("DOM_SNAPSHOT_MODE", "compact")
+DOM_SNAPSHOT_MAX_ELEMENTS: int = int(os.getenv("DOM_SNAPSHOT_MAX_ELEMENTS", "250"))
+
+# Click tasks naming exactly one visible control (e.g. "Click the Continue button") skip the LLM
+LABEL_RESOLVER_ENABLED: bool = os.getenv("LABEL_RESOLVER_ENABLED", "true").lower() == "true"
+
+# Tiered model routing: steps start on the cheapest tier and escalate one tier per retry
+LLM_MODEL_TIERS: List[str] = [m.strip() for m in os.getenv("LLM_MODEL_TIERS", "gpt-4o-mini,gpt-4o").split(",") if m.strip()]
+MODEL_ROUTING_ENABLED: bool = os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true"
+MODEL_ROUTER_MIN_SAMPLES: int = int(os.getenv("MODEL_ROUTER_MIN_SAMPLES", "3"))
+MODEL_ROUTER_MIN_SUCCESS_RATE: float = float(os.getenv("MODEL_ROUTER_MIN_SUCCESS_RATE", "0.6"))
+MODEL_ROUTING_DIR: str = os.getenv("MODEL_ROUTING_DIR", "model_routing")  # one statistics file per worker
+
+# Compiled step plans replayed without the LLM
+COMPILED_PLANS_ENABLED: bool = os.getenv("COMPILED_PLANS_ENABLED", "true").lower() == "true"
+COMPILED_PLAN_DIR: str = os.getenv("COMPILED_PLAN_DIR", "compiled_plans")
+COMPILED_PLAN_MAX_VARIANTS: int = int(os.getenv("COMPILED_PLAN_MAX_VARIANTS", "3"))
+
+# Multi-screen flows planned in one LLM call (re-plans after a divergence, wait per expected screen in ms)
+FLOW_MAX_REPLANS: int = int(os.getenv("FLOW_MAX_REPLANS", "2"))
+FLOW_EXPECT_TIMEOUT: int = int(os.getenv("FLOW_EXPECT_TIMEOUT", "5000"))
+
+# Shared browser pool
+BROWSER_POOL_SIZE: int = int(os.getenv("BROWSER_POOL_SIZE", "1"))
+BROWSER_RECYCLE_AFTER: int = int(os.getenv("BROWSER_RECYCLE_AFTER", "20"))
+
+# Storage-state checkpoints
+CHECKPOINTS_ENABLED: bool = os.getenv("CHECKPOINTS_ENABLED", "true").lower() == "true"
+CHECKPOINT_DIR: str = os.getenv("CHECKPOINT_DIR", "checkpoints")
+APP_BUILD_ID: str = os.getenv("APP_BUILD_ID", "")
+
+# UI settle detection (quiet window and ceiling, in ms)
+SETTLE_QUIET_MS: int = int(os.getenv("SETTLE_QUIET_MS", "300"))
+SETTLE_TIMEOUT_MS: int = int(os.getenv("SETTLE_TIMEOUT_MS", "5000"))
+
+# Screenshot pipeline
+SCREENSHOT_POLICY: str = os.getenv("SCREENSHOT_POLICY", "all")  # all, on_failure, sampled
+SCREENSHOT_SAMPLE_EVERY: int = int(os.getenv("SCREENSHOT_SAMPLE_EVERY", "5"))
+SCREENSHOT_FORMAT: str = os.getenv("SCREENSHOT_FORMAT", "png")  # png, jpeg, webp
+SCREENSHOT_QUALITY: int = int(os.getenv("SCREENSHOT_QUALITY", "80"))
+SCREENSHOT_DEDUP_DISTANCE: int = int(os.getenv("SCREENSHOT_DEDUP_DISTANCE", "-1"))  # bits out of 256; -1 skips only identical frames
+
+# LLM call metrics (JSON summary and Prometheus textfile, one pair per worker)
+METRICS_DIR: str = os.getenv("METRICS_DIR", "metrics")
+
+# Recorded LLM transcripts for offline replay
+LLM_RECORD_TRANSCRIPTS: bool = os.getenv("LLM_RECORD_TRANSCRIPTS", "false").lower() == "true"
+LLM_TRANSCRIPT_DIR: str = os.getenv("LLM_TRANSCRIPT_DIR", "transcripts")
@@ -4,8 +4,14 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 from loguru import logger
+from pytest_asyncio import is_async_test
 import sys
 
+from config.config import LOG_DIR, LOG_FILE, METRICS_DIR, TEST_DATA_DIR, WORKER_ID
+from lib.browser_pool import BrowserPool
+from lib.llm_client import shared_llm_client
+from lib.llm_metrics import llm_metrics
+
 
 # Load environment variables from .env file
 load_dotenv()
@@ -18,7 +24,7 @@ logger.add(
     level="INFO"
 )
 logger.add(
-    "browser-use-tests/logs/tests.log",
+    LOG_FILE,
     rotation="10 MB",
     retention="1 week",
     format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
@@ -26,8 +32,70 @@ logger.add(
 )
 
 # Create logs directory if it doesn't exist
-Path("browser-use-tests/logs").mkdir(exist_ok=True, parents=True)
-Path("browser-use-tests/test_data").mkdir(exist_ok=True, parents=True)
+Path(LOG_DIR).mkdir(exist_ok=True, parents=True)
+Path(TEST_DATA_DIR).mkdir(exist_ok=True, parents=True)
+
+
+def pytest_collection_modifyitems(items):
+    """Run every async test in the session event loop so it can use the shared browser pool."""
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Attribute LLM calls made while a test runs to that test."""
+    llm_metrics.current_test = item.nodeid
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+    """Stop attributing LLM calls to a test once its teardown is done."""
+    try:
+        yield
+    finally:
+        llm_metrics.current_test = None
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Export the LLM call metrics collected by this process."""
+    if not llm_metrics.records:
+        return
+
+    name = f"llm_metrics-{WORKER_ID}" if WORKER_ID else "llm_metrics"
+    metrics_dir = Path(METRICS_DIR)
+    llm_metrics.write_json(metrics_dir / f"{name}.json")
+    llm_metrics.write_prometheus(metrics_dir / f"{name}.prom", {"worker": WORKER_ID} if WORKER_ID else None)
+
+    total = llm_metrics.summary()["total"]
+    logger.info(
+        f"LLM calls: {total['calls']} ({total['cache_hits']} cache hits), "
+        f"{total['prompt_tokens']} prompt / {total['completion_tokens']} completion tokens, "
+        f"{total['latency_s_total']}s total latency"
+    )
+
+
+@pytest.fixture(scope="session")
+async def browser_pool():
+    """Session-wide pool of launched browsers; tests lease a fresh context from it."""
+    pool = BrowserPool()
+    try:
+        yield pool
+    finally:
+        await pool.stop()
+
+
+@pytest.fixture(scope="session", autouse=True)
+async def llm_client():
+    """Process-wide pooled LLM client; its connections are closed at the end of the session."""
+    client = shared_llm_client()
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
 
 # Create a pytest hook to capture test status and add more detailed logging
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
@@ -0,0 +1,131 @@
+"""Incremental parsing of the actions array from a streamed LLM response."""
+import json
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+def parse_actions(text: str, key: str = "actions") -> Optional[List[Dict[str, Any]]]:
+    """Parse the actions array out of a complete response.
+
+    Args:
+        text: Response text
+        key: Top-level key holding the actions array
+
+    Returns:
+        The actions (possibly empty), or None if the response isn't a JSON object
+        whose key holds an array of objects
+    """
+    try:
+        actions = json.loads(text).get(key)
+    except (json.JSONDecodeError, AttributeError) as e:
+        logger.warning(f"Response isn't a valid JSON object: {e}")
+        return None
+
+    if not isinstance(actions, list) or not all(isinstance(action, dict) for action in actions):
+        logger.warning(f"Response has no \"{key}\" array of objects")
+        return None
+    return actions
+
+
+class ActionStreamParser:
+    """Extracts each action from a streamed {"actions": [...]} response as soon as it is complete.
+
+    Feed it the response text as it arrives. It scans for the top-level key
+    holding the actions, tracking strings and nesting, and parses every object
+    in that array the moment its closing brace arrives.
+    """
+
+    def __init__(self, key: str = "actions"):
+        """Initialize the parser.
+
+        Args:
+            key: Top-level key holding the actions array
+        """
+        self.key = key
+        self.text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._object_start: Optional[int] = None
+        self.actions: List[Dict[str, Any]] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Add streamed text and return the actions it completed.
+
+        Args:
+            chunk: Next piece of the response text
+
+        Returns:
+            Actions completed by this chunk, in order
+        """
+        self.text += chunk
+        completed = []
+
+        for i in range(self._pos, len(self.text)):
+            char = self.text[i]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = self.text[self._string_start + 1:i]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":" and len(self._stack) == 1:
+                self._current_key = self._last_string
+            elif char == "," and len(self._stack) == 1:
+                self._current_key = None
+            elif char in "{[":
+                if char == "[" and len(self._stack) == 1 and self._current_key == self.key and self._array_depth is None:
+                    self._array_depth = len(self._stack) + 1
+                self._stack.append(char)
+                if char == "{" and self._array_depth is not None and len(self._stack) == self._array_depth + 1:
+                    self._object_start = i
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._object_start is not None and len(self._stack) == self._array_depth:
+                    action = self._parse(self.text[self._object_start:i + 1])
+                    self._object_start = None
+                    if action is not None:
+                        completed.append(action)
+                elif char == "]" and self._array_depth is not None and len(self._stack) == self._array_depth - 1:
+                    # The actions array is closed; anything after it is ignored
+                    self._array_depth = -1
+
+        self._pos = len(self.text)
+        self.actions.extend(completed)
+        return completed
+
+    @staticmethod
+    def _parse(fragment: str) -> Optional[Dict[str, Any]]:
+        try:
+            action = json.loads(fragment)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping unparseable streamed action: {e}")
+            return None
+        return action if isinstance(action, dict) else None
+
+    def final_actions(self) -> Optional[List[Dict[str, Any]]]:
+        """Parse the complete response once the stream has ended.
+
+        Returns:
+            The full actions array; if the response isn't valid, the actions parsed
+            so far, or None when there are none
+        """
+        actions = parse_actions(self.text, self.key)
+        if actions is None and self.actions:
+            logger.warning(f"Keeping the {len(self.actions)} actions parsed from the invalid streamed response")
+            return list(self.actions)
+        return actions
@@ -0,0 +1,213 @@
+"""Registry of the browser actions the LLM can plan, and batched in-page form filling."""
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+from lib.screenshots import EXPLICIT
+
+if TYPE_CHECKING:
+    from lib.llm_browser import LLMBrowser
+
+
+ActionHandler = Callable[["LLMBrowser", Dict[str, Any], int], Awaitable[None]]
+
+
+@dataclass
+class ActionType:
+    """A registered action type."""
+    name: str
+    handler: ActionHandler
+    capture: bool = True
+
+
+_REGISTRY: Dict[str, ActionType] = {}
+
+
+def register(*names: str, capture: bool = True) -> Callable[[ActionHandler], ActionHandler]:
+    """Register a handler for one or more action types.
+
+    The handler is called with the browser, the action dictionary and the
+    action's position in its plan, and raises to report a failure.
+
+    Args:
+        names: Action types the handler executes (matched case-insensitively)
+        capture: Whether an action screenshot is taken after the action runs
+
+    Returns:
+        Decorator that registers the handler and returns it unchanged
+    """
+    def decorator(handler: ActionHandler) -> ActionHandler:
+        for name in names:
+            _REGISTRY[name.lower()] = ActionType(name.lower(), handler, capture)
+        return handler
+    return decorator
+
+
+def get_action_type(name: str) -> Optional[ActionType]:
+    """Look up a registered action type.
+
+    Args:
+        name: Action type from the plan
+
+    Returns:
+        The registered action type, or None if nothing handles it
+    """
+    return _REGISTRY.get((name or "").lower())
+
+
+def registered_actions() -> List[str]:
+    """List the registered action type names.
+
+    Returns:
+        Sorted action type names
+    """
+    return sorted(_REGISTRY)
+
+
+@register("click")
+async def _click(browser: "LLMBrowser", action: Dict[str, Any], i: int) -> None:
+    await browser.page.click(action["selector"])
+
+
+@register("input", "fill")
+async def _fill(browser: "LLMBrowser", action: Dict[str, Any], i: int) -> None:
+    await browser.page.fill(action["selector"], action["value"])
+
+
+@register("type")
+async def _type(browser: "LLMBrowser", action: Dict[str, Any], i: int) -> None:
+    await browser.page.type(action["selector"], action["value"])
+
+
+@register("wait", capture=False)
+async def _wait(browser: "LLMBrowser", action: Dict[str, Any], i: int) -> None:
+    if "selector" in action:
+        await browser.page.wait_for_selector(action["selector"], timeout=action.get("timeout", browser.default_timeout))
+    elif "time" in action:
+        await asyncio.sleep(action["time"] / 1000)  # Convert ms to seconds
+    elif "navigation" in action and action["navigation"]:
+        await browser.page.wait_for_navigation(timeout=action.get("timeout", browser.navigation_timeout))
+    elif "load_state" in action:
+        await browser.page.wait_for_load_state(action["load_state"], timeout=action.get("timeout", browser.navigation_timeout))
+    else:
+        # Default to waiting for the UI to settle if no specific wait type is provided
+        await browser.wait_for_settle(timeout_ms=action.get("timeout"))
+
+
+@register("navigate")
+async def _navigate(browser: "LLMBrowser", action: Dict[str, Any], i: int) -> None:
+    await browser.page.goto(action["url"])
+
+
+@register("select")
+async def _select(browser: "LLMBrowser", action: Dict[str, Any], i: int) -> None:
+    if "value" in action:
+        await browser.page.select_option(action["selector"], value=action["value"])
+    elif "label" in action:
+        await browser.page.select_option(action["selector"], label=action["label"])
+    elif "index" in action:
+        await browser.page.select_option(action["selector"], index=action["index"])
+
+
+@register("check")
+async def _check(browser: "LLMBrowser", action: Dict[str, Any], i: int) -> None:
+    await browser.page.check(action["selector"])
+
+
+@register("uncheck")
+async def _uncheck(browser: "LLMBrowser", action: Dict[str, Any], i: int) -> None:
+    await browser.page.uncheck(action["selector"])
+
+
+@register("press")
+async def _press(browser: "LLMBrowser", action: Dict[str, Any], i: int) -> None:
+    await browser.page.press(action["selector"], action["key"])
+
+
+@register("screenshot", capture=False)
+async def _screenshot(browser: "LLMBrowser", action: Dict[str, Any], i: int) -> None:
+    await browser._capture_screenshot(action.get("name", f"custom_screenshot_{i}"), EXPLICIT)
+
+
+# Fills these fields in order through the native value setter, firing the input
+# and change events frameworks listen to. Stops at the first field it can't
+# fill and reports how many it filled.
+FILL_FIELDS_JS = """
+(fields) => {
+    const UNFILLABLE = ['checkbox', 'radio', 'file', 'submit', 'button', 'reset', 'image', 'hidden'];
+    for (let i = 0; i < fields.length; i++) {
+        const { selector, value } = fields[i];
+        let el;
+        try {
+            el = document.querySelector(selector);
+        } catch (e) {
+            return { filled: i, error: `Invalid selector ${selector}` };
+        }
+        if (!el) return { filled: i, error: `No element matches ${selector}` };
+        if (!(el instanceof HTMLInputElement || el instanceof HTMLTextAreaElement)
+                || (el instanceof HTMLInputElement && UNFILLABLE.includes(el.type))) {
+            return { filled: i, error: `Element ${selector} is not a text field` };
+        }
+        const rect = el.getBoundingClientRect();
+        if (!rect.width || !rect.height || el.disabled || el.readOnly) {
+            return { filled: i, error: `Element ${selector} is not visible and editable` };
+        }
+
+        el.focus();
+        const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+        Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+        el.dispatchEvent(new Event('input', { bubbles: true }));
+        el.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+    return { filled: fields.length, error: null };
+}
+"""
+
+_BATCH_FILL_TYPES = {"input", "fill"}
+
+# Playwright-only selector syntax that document.querySelector() can't evaluate
+_PLAYWRIGHT_SELECTOR_RE = re.compile(r"^\s*(?:[a-z_-]+=|//|\.\.)|>>|:(?:has-text|text|text-is|text-matches|nth-match|visible)\b",
+                                     re.IGNORECASE)
+
+
+def is_css_selector(selector: Any) -> bool:
+    """Whether a selector can be evaluated with document.querySelector().
+
+    Args:
+        selector: Selector from an action
+
+    Returns:
+        True for plain CSS selectors, False for Playwright selector engines and chains
+    """
+    return isinstance(selector, str) and bool(selector.strip()) and not _PLAYWRIGHT_SELECTOR_RE.search(selector)
+
+
+def is_batchable_fill(action: Dict[str, Any]) -> bool:
+    """Whether an action is a fill the in-page batch can perform.
+
+    Args:
+        action: Planned action
+
+    Returns:
+        True for fills with a CSS selector and a scalar value
+    """
+    return ((action.get("type") or "").lower() in _BATCH_FILL_TYPES
+            and is_css_selector(action.get("selector"))
+            and isinstance(action.get("value"), (str, int, float)))
+
+
+def fill_batch_length(actions: List[Dict[str, Any]], start: int) -> int:
+    """Count the consecutive fills from start that can be filled in one page.evaluate().
+
+    Args:
+        actions: Planned actions
+        start: Index of the first action to consider
+
+    Returns:
+        Number of batchable fills; batches of fewer than two aren't worth it, so 0 or at least 2
+    """
+    end = start
+    while end < len(actions) and is_batchable_fill(actions[end]):
+        end += 1
+    return end - start if end - start >= 2 else 0
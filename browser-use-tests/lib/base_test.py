@@ -1,10 +1,31 @@
 """Base test class for LLM-powered browser tests."""
 import asyncio
 import pytest
-from typing import Optional, Dict, Any, List
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+from urllib.parse import urlparse
 from loguru import logger
 
-from lib.llm_browser import LLMBrowser
+from config.config import LLM_RETRY_MAX_DELAY, LLM_STEP_MAX_WAITS
+
+from lib.checkpoints import AUTH_SCREEN_CHECKPOINT, CheckpointStore
+from lib.flows import FlowStage
+from lib.llm_browser import LLMBrowser, TaskPlan
+from lib.llm_client import LLMThrottledError, LLMUnavailableError, shared_llm_client
+from lib.llm_metrics import current_step
+from lib.model_router import ModelRouter
+from lib.plan_store import PlanStore
+
+
+@dataclass
+class StepSpec:
+    """A step of a scripted sequence, declared up front so the next one can be planned early."""
+    description: str
+    context: Optional[str] = None
+    verify_elements: Optional[List[str]] = None
+    name: Optional[str] = None
+    screenshot: Optional[str] = None
+    required: bool = True
 
 
 class BaseLLMTest:
@@ -13,16 +34,109 @@ class BaseLLMTest:
     # Class variables for test configuration
     llm_model = "gpt-4o"
     
+    # Compiled step plans shared by all tests
+    plan_store = PlanStore()
+    
+    # Plans steps on the cheapest model tier first and escalates on retries
+    model_router = ModelRouter()
+    
+    # Storage-state checkpoints shared by all tests
+    checkpoints = CheckpointStore()
+    
+    # Pooled LLM client shared by the browser and test helpers
+    llm_client = shared_llm_client()
+    
+    # Plan each test's steps in one conversation that sends page diffs after the first step
+    llm_conversation = False
+    
     @pytest.fixture
-    async def browser(self):
-        """Fixture to provide LLM Browser for tests."""
-        browser = LLMBrowser(model=self.llm_model)
-        await browser.start()
+    async def browser(self, request, browser_pool):
+        """Fixture to provide LLM Browser for tests.
         
-        try:
-            yield browser
-        finally:
-            await browser.stop()
+        Each test gets its own context and page in a browser leased from the
+        session-wide pool.
+        """
+        self.test_id = request.node.nodeid
+        
+        async with browser_pool.lease() as shared_browser:
+            browser = LLMBrowser(model=self.llm_model, llm_client=self.llm_client)
+            await browser.start(browser=shared_browser)
+            if self.llm_conversation:
+                browser.begin_conversation()
+            
+            try:
+                yield browser
+            finally:
+                await browser.stop()
+    
+    @pytest.fixture
+    async def at_auth_screen(self, browser):
+        """Fixture to provide an LLM Browser already on the auth screen."""
+        result = await self.reach_checkpoint(browser, AUTH_SCREEN_CHECKPOINT, self.navigate_to_auth_screen)
+        assert result["success"], f"Failed to reach auth screen: {result.get('error', 'Unknown error')}"
+        return browser
+    
+    async def save_checkpoint(self, browser: LLMBrowser, name: str) -> None:
+        """
+        Save the browser's storage state and URL as a named checkpoint.
+        
+        Args:
+            browser: LLM Browser instance
+            name: Checkpoint name
+        """
+        state = await browser.capture_state()
+        self.checkpoints.save(name, state["storage_state"], state["url"], await browser.app_build_id())
+    
+    async def restore_checkpoint(self, browser: LLMBrowser, name: str) -> bool:
+        """
+        Restore a named checkpoint into the browser, if one exists for the current app build.
+        
+        Args:
+            browser: LLM Browser instance
+            name: Checkpoint name
+            
+        Returns:
+            True if the browser is now at the checkpoint, False otherwise
+        """
+        checkpoint = self.checkpoints.load(name, await browser.app_build_id())
+        if not checkpoint:
+            return False
+        
+        await browser.restore_state(checkpoint["storage_state"], checkpoint["url"])
+        await browser.wait_for_settle()
+        
+        # The app redirects elsewhere if the saved session is no longer valid
+        if urlparse(browser.page.url).path != urlparse(checkpoint["url"]).path:
+            logger.warning(f"Checkpoint '{name}' landed on {browser.page.url}, discarding it")
+            self.checkpoints.invalidate(name)
+            await browser.restore_state(None, browser.base_url)
+            return False
+        
+        logger.info(f"Restored checkpoint '{name}'")
+        return True
+    
+    async def reach_checkpoint(self,
+                               browser: LLMBrowser,
+                               name: str,
+                               flow: Callable[[LLMBrowser], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Start at a named checkpoint, or run the flow that reaches it and save it for later tests.
+        
+        Args:
+            browser: LLM Browser instance
+            name: Checkpoint name
+            flow: Helper that navigates to the checkpoint state from a fresh session
+            
+        Returns:
+            Result dictionary with success status and other information
+        """
+        if await self.restore_checkpoint(browser, name):
+            return {"success": True, "stage": "complete", "checkpoint": name, "message": f"Restored checkpoint '{name}'"}
+        
+        result = await flow(browser)
+        if result.get("success", False):
+            await self.save_checkpoint(browser, name)
+        return result
     
     async def navigate_to_auth_screen(self, browser: LLMBrowser) -> Dict[str, Any]:
         """
@@ -43,18 +157,6 @@ class BaseLLMTest:
         Click the "Get Started" button to begin the intro sequence.
         """
         
-        result = await self.execute_step(
-            browser,
-            "Click the Get Started button on the initial Welcome screen",
-            context=welcome_context
-        )
-        if not result.get("success", False):
-            logger.error("Failed to click Get Started button")
-            return {"success": False, "stage": "get_started", "error": "Failed to click Get Started button"}
-        
-        # Wait briefly for animation
-        await asyncio.sleep(2)
-        
         # Step 2: Navigate through FIRST intro screen
         intro1_context = """
         You should now be on the FIRST intro screen of three.
@@ -63,18 +165,6 @@ class BaseLLMTest:
         This is the FIRST of THREE intro screens we need to navigate through.
         """
         
-        result = await self.execute_step(
-            browser,
-            "Click the Continue button on the FIRST intro screen",
-            context=intro1_context
-        )
-        if not result.get("success", False):
-            logger.error("Failed to navigate past first intro screen")
-            return {"success": False, "stage": "intro1", "error": "Failed to navigate past first intro screen"}
-        
-        # Wait briefly for animation
-        await asyncio.sleep(1.5)
-        
         # Step 3: Navigate through SECOND intro screen
         intro2_context = """
         You should now be on the SECOND intro screen of three.
@@ -83,17 +173,6 @@ class BaseLLMTest:
         This is the SECOND of THREE intro screens we need to navigate through.
         """
         
-        result = await self.execute_step(
-            browser,
-            "Click the Continue button on the SECOND intro screen",
-            context=intro2_context
-        )
-        if not result.get("success", False):
-            logger.error("Failed to navigate past second intro screen")
-            return {"success": False, "stage": "intro2", "error": "Failed to navigate past second intro screen"}
-        
-        await asyncio.sleep(1.5)
-        
         # Step 4: Navigate through THIRD intro screen
         intro3_context = """
         You should now be on the THIRD and FINAL intro screen of the three-screen sequence.
@@ -102,33 +181,37 @@ class BaseLLMTest:
         After this screen, we expect to reach the authentication screen.
         """
         
-        result = await self.execute_step(
-            browser,
-            "Click the Continue button on the THIRD and FINAL intro screen",
-            context=intro3_context
-        )
-        if not result.get("success", False):
-            logger.error("Failed to navigate past third intro screen")
-            return {"success": False, "stage": "intro3", "error": "Failed to navigate past third intro screen"}
-        
-        await asyncio.sleep(1.5)
-        
-        # Verify we reached the auth screen
+        # Step 5: Verify we reached the auth screen
         auth_screen_context = """
         After completing the three intro screens, we should now be on the authentication screen.
         This screen typically has options to Sign In or Sign Up.
         Verify we've reached this authentication screen.
         """
         
-        result = await self.execute_step(
-            browser,
-            "Verify we've reached the authentication screen with Sign In/Sign Up options",
-            context=auth_screen_context,
-            verify_elements=["Sign In button", "Sign Up button or Create Account button"]
-        )
-        if not result.get("success", False):
-            logger.error("Failed to reach the authentication screen")
-            return {"success": False, "stage": "auth_verification", "error": "Failed to reach the authentication screen"}
+        # The whole flow is planned in one LLM call, falling back to step by step if the app diverges
+        steps = [
+            StepSpec("Click the Get Started button on the initial Welcome screen", welcome_context,
+                     name="get_started"),
+            StepSpec("Click the Continue button on the FIRST intro screen", intro1_context, name="intro1"),
+            StepSpec("Click the Continue button on the SECOND intro screen", intro2_context, name="intro2"),
+            StepSpec("Click the Continue button on the THIRD and FINAL intro screen", intro3_context, name="intro3"),
+            StepSpec("Verify we've reached the authentication screen with Sign In/Sign Up options", auth_screen_context,
+                     verify_elements=["Sign In button", "Sign Up button or Create Account button"],
+                     name="auth_verification")
+        ]
+        errors = {
+            "get_started": "Failed to click Get Started button",
+            "intro1": "Failed to navigate past first intro screen",
+            "intro2": "Failed to navigate past second intro screen",
+            "intro3": "Failed to navigate past third intro screen",
+            "auth_verification": "Failed to reach the authentication screen"
+        }
+        
+        results = await self.execute_flow(browser, "Get from the Welcome screen to the authentication screen", steps)
+        for step, result in zip(steps, results):
+            if not result.get("success", False):
+                logger.error(errors[step.name])
+                return {"success": False, "stage": step.name, "error": errors[step.name]}
         
         logger.success("Successfully navigated to auth screen")
         return {"success": True, "stage": "complete", "message": "Successfully navigated to auth screen"}
@@ -136,6 +219,7 @@ class BaseLLMTest:
     async def navigate_to_signup_screen(self, browser: LLMBrowser) -> Dict[str, Any]:
         """
         Navigate to the Sign Up screen by going through intro screens and selecting Sign Up on the auth screen.
+        The intro screens are skipped when an auth screen checkpoint exists for the current app build.
         
         Args:
             browser: LLM Browser instance
@@ -144,7 +228,7 @@ class BaseLLMTest:
             Result dictionary with success status and other information
         """
         # First navigate to auth screen
-        auth_result = await self.navigate_to_auth_screen(browser)
+        auth_result = await self.reach_checkpoint(browser, AUTH_SCREEN_CHECKPOINT, self.navigate_to_auth_screen)
         if not auth_result.get("success", False):
             return auth_result
         
@@ -163,13 +247,14 @@ class BaseLLMTest:
             logger.error("Failed to navigate to sign up screen")
             return {"success": False, "stage": "signup_navigation", "error": "Failed to click Sign Up button"}
         
-        await asyncio.sleep(1)
+        await browser.wait_for_settle()
         logger.success("Successfully navigated to sign up screen")
         return {"success": True, "stage": "complete", "message": "Successfully navigated to sign up screen"}
     
     async def navigate_to_signin_screen(self, browser: LLMBrowser) -> Dict[str, Any]:
         """
         Navigate to the Sign In screen by going through intro screens and selecting Sign In on the auth screen.
+        The intro screens are skipped when an auth screen checkpoint exists for the current app build.
         
         Args:
             browser: LLM Browser instance
@@ -178,7 +263,7 @@ class BaseLLMTest:
             Result dictionary with success status and other information
         """
         # First navigate to auth screen
-        auth_result = await self.navigate_to_auth_screen(browser)
+        auth_result = await self.reach_checkpoint(browser, AUTH_SCREEN_CHECKPOINT, self.navigate_to_auth_screen)
         if not auth_result.get("success", False):
             return auth_result
         
@@ -197,7 +282,7 @@ class BaseLLMTest:
             logger.error("Failed to navigate to sign in screen")
             return {"success": False, "stage": "signin_navigation", "error": "Failed to click Sign In button"}
         
-        await asyncio.sleep(1)
+        await browser.wait_for_settle()
         logger.success("Successfully navigated to sign in screen")
         return {"success": True, "stage": "complete", "message": "Successfully navigated to sign in screen"}
     
@@ -207,41 +292,128 @@ class BaseLLMTest:
                           context: Optional[str] = None,
                           verify_elements: Optional[List[str]] = None,
                           max_retries: int = 3,
-                          timeout: int = 30000) -> Dict[str, Any]:
+                          timeout: int = 30000,
+                          plan: Optional[TaskPlan] = None,
+                          on_actions_done: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
         """Execute a test step with retry logic.
         
+        If a compiled plan was recorded for this step on the current screen, it is
+        replayed directly and the LLM is only consulted when the replay fails.
+        
+        The first attempt is planned with the cheapest model tier that has been
+        succeeding for this step; each retry moves one tier up. An attempt whose
+        actions fail, whose plan is empty or whose elements can't be verified
+        counts against its tier.
+        
         Args:
             browser: LLM Browser instance
             description: Natural language description of the step
             context: Additional context for the LLM
             verify_elements: List of elements to verify after the step
             max_retries: Maximum number of retries for the step
+            plan: Actions planned ahead of time for this step; discarded unless
+                the current screen matches the one they were planned against
+            on_actions_done: Called once, as soon as the step's actions have succeeded
+                and before its elements are verified
             
         Returns:
             Results of the step execution
         """
+        # Attribute every LLM call made during the step to it in the metrics report
+        step_token = current_step.set(description)
+        try:
+            return await self._run_step(browser, description, context, verify_elements, max_retries, plan, on_actions_done)
+        finally:
+            current_step.reset(step_token)
+    
+    async def _run_step(self,
+                        browser: LLMBrowser,
+                        description: str,
+                        context: Optional[str],
+                        verify_elements: Optional[List[str]],
+                        max_retries: int,
+                        speculative_plan: Optional[TaskPlan] = None,
+                        on_actions_done: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        test_id = getattr(self, "test_id", type(self).__name__)
+        
+        # Replay the compiled plan if the screen matches the one it was recorded on
+        fingerprint = await browser.screen_fingerprint()
+        plan = self.plan_store.lookup(test_id, description, context, fingerprint)
+        if plan:
+            result = await browser.execute_plan(description, plan["actions"])
+            if result.get("success"):
+                if on_actions_done:
+                    on_actions_done()
+                    on_actions_done = None
+                if verify_elements:
+                    verified = await self._verify_elements(browser, verify_elements, plan.get("verify"))
+                    result["all_elements_verified"] = len(verified) == len(verify_elements)
+                if result.get("all_elements_verified", True):
+                    logger.success(f"Step completed from compiled plan")
+                    return result
+                logger.warning("Compiled plan ran but its elements weren't verified, falling back to the LLM")
+            else:
+                logger.warning("Compiled plan failed, falling back to the LLM")
+            
+            self.plan_store.invalidate(test_id, description, context, fingerprint)
+            # The replay's actions may have changed the screen
+            fingerprint = await browser.screen_fingerprint()
+        
+        # A plan made ahead of time is only valid for the screen it was planned against
+        if speculative_plan and speculative_plan.fingerprint != fingerprint:
+            logger.info("Discarding speculative plan, the screen changed since it was planned")
+            speculative_plan = None
+        
         retry_count = 0
+        llm_waits = 0
+        task_key = self.model_router.task_key(description, context)
+        models = self.model_router.escalation(task_key)
         
         while retry_count < max_retries:
+            model = models[min(retry_count, len(models) - 1)]
+            result = None
             try:
-                logger.info(f"Executing step: {description}")
+                logger.info(f"Executing step: {description}" + (f" ({model})" if model else ""))
                 
-                # Execute the step
-                result = await browser.execute_task(description, context)
+                # Execute the step, using the speculative plan on the first attempt only
+                if speculative_plan:
+                    logger.info("Using speculative plan")
+                    result = await browser.execute_planned(speculative_plan)
+                    speculative_plan = None
+                else:
+                    result = await browser.execute_task(description, context, model=model,
+                                                        resolve_labels=retry_count == 0)
+                model = result.get("model") or model
+                
+                if result.get("success") and on_actions_done:
+                    on_actions_done()
+                    on_actions_done = None
                 
                 # Verify elements if needed
+                verified = {}
                 if verify_elements and result.get("success"):
-                    all_verified = True
-                    for element_desc in verify_elements:
-                        verified = await browser.verify_element(element_desc)
-                        if not verified:
-                            all_verified = False
-                            logger.warning(f"Element verification failed: {element_desc}")
-                    
-                    result["all_elements_verified"] = all_verified
+                    verified = await self._verify_elements(browser, verify_elements)
+                    result["all_elements_verified"] = len(verified) == len(verify_elements)
                 
-                # If successful, return the result
+                # Steps resolved without the LLM say nothing about the model tier
+                all_verified = result.get("all_elements_verified", True)
+                if not result.get("resolved"):
+                    self.model_router.record(task_key, description, model, result.get("success", False) and all_verified)
+                
+                # A weaker model may have acted on the wrong element; retry with a stronger one
+                # while the screen is still the one it planned against
+                if (result.get("success") and not all_verified and not self.model_router.is_strongest(model)
+                        and retry_count + 1 < max_retries
+                        and await browser.screen_fingerprint() == result["fingerprint"]):
+                    logger.warning(f"Elements not verified after {model}, escalating ({retry_count+1}/{max_retries})")
+                    retry_count += 1
+                    await browser.wait_for_settle()
+                    continue
+                
+                # If successful, record the plan for later runs and return the result
                 if result.get("success"):
+                    if all_verified:
+                        self.plan_store.record(test_id, description, context, result["fingerprint"], result["actions"], verified)
                     logger.success(f"Step completed successfully")
                     return result
                     
@@ -249,16 +421,198 @@ class BaseLLMTest:
                 logger.warning(f"Step failed, retrying ({retry_count+1}/{max_retries})")
                 retry_count += 1
                 
-                # Wait before retrying
-                await asyncio.sleep(2)
+                # Let the UI finish reacting before retrying
+                await browser.wait_for_settle()
+                
+            except LLMUnavailableError as e:
+                # The model is throttled or down, not the UI: wait without spending a retry
+                throttled = isinstance(e, LLMThrottledError)
+                llm_waits += 1
+                if llm_waits > LLM_STEP_MAX_WAITS:
+                    logger.error(f"Step abandoned, LLM {'throttled' if throttled else 'unavailable'}: {e}")
+                    return {"success": False, "throttled": throttled, "llm_unavailable": True, "error": str(e)}
+                
+                delay = e.retry_after or LLM_RETRY_MAX_DELAY
+                logger.warning(f"LLM {'throttled' if throttled else 'unavailable'}, waiting {delay:.0f}s before retrying the step")
+                await asyncio.sleep(delay)
                 
             except Exception as e:
                 logger.error(f"Error executing step: {e}")
+                # Only count the error against the tier if the model's plan ran; an error raised
+                # before that (or on a step resolved without the LLM) is the browser's, not the model's
+                if result is not None and not result.get("resolved"):
+                    self.model_router.record(task_key, description, model, False)
                 retry_count += 1
                 
-                # Wait before retrying
-                await asyncio.sleep(2)
+                # Let the UI finish reacting before retrying
+                await browser.wait_for_settle()
         
         # If we get here, all retries failed
         logger.error(f"Step failed after {max_retries} retries: {description}")
-        return {"success": False, "error": f"Failed after {max_retries} retries"}
\ No newline at end of file
+        return {"success": False, "error": f"Failed after {max_retries} retries"}
+    
+    async def execute_sequence(self,
+                               browser: LLMBrowser,
+                               steps: List[StepSpec],
+                               max_retries: int = 3) -> List[Dict[str, Any]]:
+        """Execute a scripted sequence of steps, planning each step while the previous one settles.
+        
+        As soon as a step's actions succeed, the next step is planned in the background
+        against the screen they lead to, hiding the LLM round trip behind the UI
+        transition. The speculative plan is discarded if the screen no longer matches
+        when the next step starts.
+        
+        Args:
+            browser: LLM Browser instance
+            steps: Steps to execute in order
+            max_retries: Maximum number of retries for each step
+            
+        Returns:
+            Results of the executed steps; the sequence stops after the first failed required step
+        """
+        results = []
+        speculation: Optional[asyncio.Task] = None
+        
+        try:
+            for index, step in enumerate(steps):
+                plan = await self._take_speculative_plan(speculation)
+                speculation = None
+                next_step = steps[index + 1] if index + 1 < len(steps) else None
+                
+                def speculate(next_step=next_step):
+                    nonlocal speculation
+                    if next_step:
+                        speculation = asyncio.create_task(self._speculate(browser, next_step))
+                
+                result = await self.execute_step(
+                    browser,
+                    step.description,
+                    context=step.context,
+                    verify_elements=step.verify_elements,
+                    max_retries=max_retries,
+                    plan=plan,
+                    on_actions_done=speculate
+                )
+                results.append(result)
+                
+                if step.screenshot:
+                    await browser._save_screenshot(step.screenshot)
+                
+                if not result.get("success", False):
+                    logger.error(f"Step failed: {step.name or step.description}")
+                    if step.required:
+                        break
+                
+                # The speculation waits for the UI to settle itself
+                if speculation is None:
+                    await browser.wait_for_settle()
+        finally:
+            if speculation:
+                speculation.cancel()
+        
+        return results
+    
+    async def execute_flow(self,
+                           browser: LLMBrowser,
+                           goal: str,
+                           steps: List[StepSpec],
+                           max_retries: int = 3) -> List[Dict[str, Any]]:
+        """Execute a scripted multi-screen flow from a single LLM plan.
+        
+        The browser plans every step in one call and re-plans from the point of
+        divergence. Steps it still can't complete run one at a time through
+        execute_sequence(). The last step's verify_elements are checked on the
+        screen the flow ends on.
+        
+        Args:
+            browser: LLM Browser instance
+            goal: What the whole flow achieves
+            steps: Steps of the flow, in order
+            max_retries: Maximum number of retries for each step run one at a time
+            
+        Returns:
+            Results of the executed steps, in the same shape as execute_sequence()
+        """
+        stages = [FlowStage(step.name or f"step_{i + 1}", step.description, step.context, step.screenshot)
+                  for i, step in enumerate(steps)]
+        
+        step_token = current_step.set(goal)
+        try:
+            flow = await browser.execute_flow(goal, stages)
+        except LLMUnavailableError as e:
+            logger.warning(f"Flow planning unavailable, running steps one at a time: {e}")
+            flow = {"stages": [], "error": str(e)}
+        finally:
+            current_step.reset(step_token)
+        
+        results = [{**stage, "flow": True} for stage in flow["stages"]]
+        
+        remaining = steps[len(results):]
+        if remaining:
+            logger.warning(f"Flow stopped before '{stages[len(results)].name}' ({flow['error']}), continuing step by step")
+            results.extend(await self.execute_sequence(browser, remaining, max_retries))
+        elif steps and steps[-1].verify_elements:
+            verified = await self._verify_elements(browser, steps[-1].verify_elements)
+            results[-1]["all_elements_verified"] = len(verified) == len(steps[-1].verify_elements)
+        
+        return results
+    
+    async def _speculate(self, browser: LLMBrowser, step: StepSpec) -> Optional[TaskPlan]:
+        """Plan a step as soon as the UI settles on the screen it will run against."""
+        current_step.set(step.description)
+        await browser.wait_for_settle()
+        
+        # Steps with a compiled plan don't need the LLM
+        test_id = getattr(self, "test_id", type(self).__name__)
+        if self.plan_store.lookup(test_id, step.description, step.context, await browser.screen_fingerprint()):
+            return None
+        
+        model = self.model_router.escalation(self.model_router.task_key(step.description, step.context))[0]
+        # Planned outside the conversation: the plan is discarded if the screen changes, and its
+        # turn would otherwise be committed while the current step may still be talking to the model
+        return await browser.plan_task(step.description, step.context, model=model, stateless=True)
+    
+    async def _take_speculative_plan(self, speculation: Optional[asyncio.Task]) -> Optional[TaskPlan]:
+        """Wait for a speculative plan, treating any failure as no plan."""
+        if speculation is None:
+            return None
+        try:
+            return await speculation
+        except Exception as e:
+            logger.warning(f"Speculative planning failed, planning the step again: {e}")
+            return None
+    
+    async def _verify_elements(self,
+                               browser: LLMBrowser,
+                               descriptions: List[str],
+                               known_selectors: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Verify that each described element exists on the page.
+        
+        Args:
+            browser: LLM Browser instance
+            descriptions: Natural language descriptions of the elements
+            known_selectors: Selectors recorded for these descriptions on an earlier run
+            
+        Returns:
+            Mapping of each verified description to the selector that located it
+        """
+        known_selectors = known_selectors or {}
+        verified = {}
+        
+        # Check the recorded selectors concurrently; only the misses go to the LLM
+        known = [desc for desc in descriptions if known_selectors.get(desc)]
+        checks = await asyncio.gather(*(browser._selector_exists(known_selectors[desc]) for desc in known))
+        for element_desc, found in zip(known, checks):
+            if found:
+                verified[element_desc] = known_selectors[element_desc]
+        
+        remaining = [desc for desc in descriptions if desc not in verified]
+        if remaining:
+            located = await browser.locate_elements(remaining)
+            for element_desc, selector in located.items():
+                if selector:
+                    verified[element_desc] = selector
+                else:
+                    logger.warning(f"Element verification failed: {element_desc}")
+        
+        return verified
\ No newline at end of file
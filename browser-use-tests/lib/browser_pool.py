@@ -0,0 +1,126 @@
+"""Session-wide pool of launched browsers shared across tests."""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from loguru import logger
+from playwright.async_api import Browser, Playwright, async_playwright
+
+from config.config import BROWSER_POOL_SIZE, BROWSER_RECYCLE_AFTER, BROWSER_TYPE, HEADLESS
+
+
+async def launch_browser(playwright: Playwright, browser_type: str, headless: bool) -> Browser:
+    """Launch a browser of the given type.
+
+    Args:
+        playwright: Started Playwright instance
+        browser_type: Type of browser to launch (chromium, firefox, webkit)
+        headless: Whether to run browser in headless mode
+
+    Returns:
+        Launched browser
+    """
+    if browser_type == "chromium":
+        return await playwright.chromium.launch(headless=headless)
+    elif browser_type == "firefox":
+        return await playwright.firefox.launch(headless=headless)
+    elif browser_type == "webkit":
+        return await playwright.webkit.launch(headless=headless)
+    else:
+        raise ValueError(f"Unsupported browser type: {browser_type}")
+
+
+class _PooledBrowser:
+    """A launched browser and the number of times it has been leased."""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.uses = 0
+
+
+class BrowserPool:
+    """Pool of launched browsers that tests lease for the duration of one test.
+
+    Browsers are launched lazily up to the pool size and relaunched after a
+    configurable number of leases to bound memory growth. Each lease gets the
+    shared Browser; callers create their own BrowserContext on it so tests stay
+    isolated. All Playwright objects are bound to the event loop the pool was
+    started on, so the pool must live in a session-scoped loop.
+    """
+
+    def __init__(self,
+                 size: int = BROWSER_POOL_SIZE,
+                 recycle_after: int = BROWSER_RECYCLE_AFTER,
+                 browser_type: str = BROWSER_TYPE,
+                 headless: bool = HEADLESS):
+        """Initialize the pool.
+
+        Args:
+            size: Maximum number of browsers launched at once
+            recycle_after: Number of leases after which a browser is relaunched
+            browser_type: Type of browser to launch (chromium, firefox, webkit)
+            headless: Whether to run browsers in headless mode
+        """
+        self.size = size
+        self.recycle_after = recycle_after
+        self.browser_type = browser_type
+        self.headless = headless
+
+        self.playwright: Optional[Playwright] = None
+        self._all: List[_PooledBrowser] = []
+        self._available: asyncio.Queue = asyncio.Queue()
+        self._launch_lock = asyncio.Lock()
+
+    async def _launch(self) -> Browser:
+        if not self.playwright:
+            self.playwright = await async_playwright().start()
+
+        logger.info(f"Launching pooled {self.browser_type} browser")
+        return await launch_browser(self.playwright, self.browser_type, self.headless)
+
+    async def _acquire(self) -> _PooledBrowser:
+        async with self._launch_lock:
+            if self._available.empty() and len(self._all) < self.size:
+                pooled = _PooledBrowser(await self._launch())
+                self._all.append(pooled)
+                self._available.put_nowait(pooled)
+
+        pooled = await self._available.get()
+
+        if pooled.uses >= self.recycle_after or not pooled.browser.is_connected():
+            logger.info(f"Recycling pooled browser after {pooled.uses} uses")
+            try:
+                await pooled.browser.close()
+            except Exception as e:
+                logger.warning(f"Failed to close recycled browser: {e}")
+            pooled.browser = await self._launch()
+            pooled.uses = 0
+
+        pooled.uses += 1
+        return pooled
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Browser]:
+        """Lease a browser for the duration of a test.
+
+        Yields:
+            A launched browser; the caller owns any contexts it creates on it
+        """
+        pooled = await self._acquire()
+        try:
+            yield pooled.browser
+        finally:
+            self._available.put_nowait(pooled)
+
+    async def stop(self) -> None:
+        """Close every pooled browser and stop Playwright."""
+        for pooled in self._all:
+            try:
+                await pooled.browser.close()
+            except Exception as e:
+                logger.warning(f"Failed to close pooled browser: {e}")
+        self._all.clear()
+
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
@@ -0,0 +1,151 @@
+"""Named storage-state checkpoints that let tests skip repeated navigation."""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from playwright.async_api import Page
+
+from config.config import APP_BUILD_ID, CHECKPOINT_DIR, CHECKPOINTS_ENABLED
+
+
+# Names of the checkpoints saved by the shared navigation helpers
+AUTH_SCREEN_CHECKPOINT = "at_auth_screen"
+
+
+def signed_in_checkpoint(email: str) -> str:
+    """Name of the checkpoint for a session signed in as the given user.
+
+    Args:
+        email: Email address of the signed-in account
+
+    Returns:
+        Checkpoint name
+    """
+    return f"signed_in_as_{email}"
+
+
+async def detect_build_id(page: Page) -> str:
+    """Identify the app build currently served to the page.
+
+    APP_BUILD_ID takes precedence (CI can set it to the commit being tested).
+    Otherwise the build is identified by the bundle URLs the page loaded and
+    the validators the server sends for them, which change on every rebuild.
+
+    Args:
+        page: Playwright page showing the app
+
+    Returns:
+        Opaque build identifier
+    """
+    if APP_BUILD_ID:
+        return APP_BUILD_ID
+
+    sources = await page.evaluate(
+        "() => Array.from(document.querySelectorAll('script[src], link[rel=stylesheet]'))"
+        ".map((el) => el.src || el.href)"
+    )
+
+    parts = []
+    for source in sorted(sources):
+        parts.append(source)
+        try:
+            response = await page.request.head(source)
+            parts.append(response.headers.get("etag", ""))
+            parts.append(response.headers.get("last-modified", ""))
+            parts.append(response.headers.get("content-length", ""))
+        except Exception as e:
+            logger.debug(f"Could not read validators for {source}: {e}")
+
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class CheckpointStore:
+    """On-disk store of browser storage states captured at known app states."""
+
+    def __init__(self, checkpoint_dir: str = CHECKPOINT_DIR, enabled: bool = CHECKPOINTS_ENABLED):
+        """Initialize the checkpoint store.
+
+        Args:
+            checkpoint_dir: Directory where checkpoints are stored
+            enabled: Whether checkpoints are used at all
+        """
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.enabled = enabled
+
+    def _path(self, name: str) -> Path:
+        safe_name = re.sub(r"[^\w.-]+", "_", name)
+        return self.checkpoint_dir / f"{safe_name}.json"
+
+    def save(self, name: str, storage_state: Dict[str, Any], url: str, build_id: str) -> None:
+        """Save a checkpoint.
+
+        Args:
+            name: Checkpoint name
+            storage_state: Storage state of the browser context
+            url: URL the page was on
+            build_id: Identifier of the app build the state was captured on
+        """
+        if not self.enabled:
+            return
+
+        self.checkpoint_dir.mkdir(exist_ok=True, parents=True)
+        path = self._path(name)
+
+        # Workers share the checkpoint directory, so each write goes through its own temporary file
+        with tempfile.NamedTemporaryFile("w", dir=self.checkpoint_dir, suffix=".tmp", delete=False) as f:
+            json.dump({
+                "name": name,
+                "url": url,
+                "build_id": build_id,
+                "storage_state": storage_state,
+                "created": time.time()
+            }, f)
+        os.replace(f.name, path)
+
+        logger.info(f"Saved checkpoint '{name}' at {url}")
+
+    def load(self, name: str, build_id: str) -> Optional[Dict[str, Any]]:
+        """Load a checkpoint captured on the given app build.
+
+        Args:
+            name: Checkpoint name
+            build_id: Identifier of the app build currently served
+
+        Returns:
+            Checkpoint dictionary, or None if missing or from another build
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(name)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, "r") as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable checkpoint {path}: {e}")
+            self.invalidate(name)
+            return None
+
+        if checkpoint.get("build_id") != build_id:
+            logger.info(f"Checkpoint '{name}' was captured on another app build, discarding it")
+            self.invalidate(name)
+            return None
+
+        return checkpoint
+
+    def invalidate(self, name: str) -> None:
+        """Delete a checkpoint.
+
+        Args:
+            name: Checkpoint name
+        """
+        self._path(name).unlink(missing_ok=True)
@@ -0,0 +1,110 @@
+"""Stateful action-planning conversations that send page diffs instead of full snapshots."""
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from config.config import LLM_CONVERSATION_MAX_DIFF_RATIO, LLM_CONVERSATION_MAX_TURNS
+from lib.dom_snapshot import DomSnapshot, diff_snapshots
+
+
+class ConversationSession:
+    """Chat history shared by the steps of a test.
+
+    The first turn carries the full page snapshot. Later turns carry only the
+    structural diff against the snapshot the model last saw, together with the
+    outcome of the steps run since. The history starts over with a full
+    snapshot when the screen changed too much for a diff to be smaller, or
+    after max_turns turns.
+    """
+
+    def __init__(self,
+                 max_turns: int = LLM_CONVERSATION_MAX_TURNS,
+                 max_diff_ratio: float = LLM_CONVERSATION_MAX_DIFF_RATIO):
+        """Initialize the session.
+
+        Args:
+            max_turns: Turns before the history starts over
+            max_diff_ratio: Largest diff, as a fraction of the page's elements, sent instead of a full snapshot
+        """
+        self.max_turns = max_turns
+        self.max_diff_ratio = max_diff_ratio
+
+        self.history: List[Dict[str, str]] = []
+        self.last_snapshot: Optional[DomSnapshot] = None
+        self.pending_outcomes: List[str] = []
+        self._turn: Optional[tuple] = None
+        self.full_turns = 0
+        self.diff_turns = 0
+
+    def reset(self) -> None:
+        """Forget the history; the next turn sends a full snapshot."""
+        self.history = []
+        self.last_snapshot = None
+
+    def next_prompt(self,
+                    task: str,
+                    context: Optional[str],
+                    snapshot: DomSnapshot,
+                    full_prompt: Callable[[str, str, Optional[str]], str]) -> str:
+        """Build the user message for the next turn; send it after the history.
+
+        Args:
+            task: The task to execute
+            context: Additional context about the application
+            snapshot: Snapshot of the current page
+            full_prompt: Builds a stateless prompt from the task, page content and context
+
+        Returns:
+            Full prompt on the first turn, otherwise the diff and previous outcomes
+        """
+        diff = diff_snapshots(self.last_snapshot, snapshot) if self.last_snapshot else None
+        too_big = diff is None or diff.size > self.max_diff_ratio * max(1, len(snapshot.elements))
+        if too_big or len(self.history) >= 2 * self.max_turns:
+            self.reset()
+
+        outcomes = "\n".join(self.pending_outcomes)
+        if not self.history:
+            content = full_prompt(task, snapshot.to_prompt(), context)
+            if outcomes:
+                content += f"\n\nOutcome of the previous steps:\n{outcomes}"
+            self.full_turns += 1
+        else:
+            content = (
+                f"Next task:\n{task}\n\n"
+                f"Outcome of the previous steps:\n{outcomes or 'No steps ran since your last answer.'}\n\n"
+                f"Changes on the page since the last snapshot:\n{diff.to_prompt()}"
+            )
+            if context:
+                content += f"\n\nAdditional context:\n{context}"
+            content += "\n\nAnswer with a JSON object with an \"actions\" key, in the same format as before."
+            self.diff_turns += 1
+            logger.debug(f"Conversation turn with a {diff.size}-element diff")
+
+        self._turn = ({"role": "user", "content": content}, snapshot)
+        return content
+
+    def add_reply(self, actions: List[Dict[str, Any]]) -> None:
+        """Commit the turn built by next_prompt() along with the model's answer.
+
+        Args:
+            actions: Actions the model answered with
+        """
+        message, snapshot = self._turn
+        self.history.extend([message, {"role": "assistant", "content": json.dumps({"actions": actions})}])
+        self.last_snapshot = snapshot
+        self.pending_outcomes = []
+
+    def record_outcome(self, task: str, results: List[Dict[str, Any]]) -> None:
+        """Remember how a step went, to report in the next turn.
+
+        Args:
+            task: The task that was executed
+            results: Per-action results
+        """
+        failures = [f"{r['action'].get('type', '?')} {r['action'].get('selector', '')}: {r['error']}"
+                    for r in results if not r.get("success", False)]
+        if failures:
+            self.pending_outcomes.append(f"- {task}: failed ({'; '.join(failures)})")
+        else:
+            self.pending_outcomes.append(f"- {task}: {len(results)} action(s) succeeded")
@@ -0,0 +1,379 @@
+"""Compact, token-efficient snapshots of the interactive parts of a page."""
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from playwright.async_api import Page
+
+from lib.llm_cache import page_fingerprint
+
+
+# Runs in the page and returns one record per visible interactable element,
+# heading or text block. Text inside an interactable element is folded into
+# that element's name instead of being listed separately.
+_EXTRACT_ELEMENTS_JS = """
+(maxElements) => {
+    const INTERACTIVE_ROLES = new Set([
+        'button', 'link', 'checkbox', 'radio', 'tab', 'switch', 'menuitem', 'option',
+        'textbox', 'combobox', 'slider', 'searchbox', 'spinbutton'
+    ]);
+    const clean = (s) => (s || '').replace(/\\s+/g, ' ').trim();
+    const quote = (s) => JSON.stringify(s);
+
+    const implicitRole = (el) => {
+        const tag = el.tagName.toLowerCase();
+        if (tag === 'button') return 'button';
+        if (tag === 'a' && el.hasAttribute('href')) return 'link';
+        if (tag === 'select') return 'combobox';
+        if (tag === 'textarea') return 'textbox';
+        if (tag === 'input') {
+            const type = (el.getAttribute('type') || 'text').toLowerCase();
+            if (type === 'hidden') return '';
+            if (type === 'checkbox' || type === 'radio') return type;
+            if (['button', 'submit', 'reset'].includes(type)) return 'button';
+            return 'textbox';
+        }
+        if (/^h[1-6]$/.test(tag)) return 'heading';
+        return '';
+    };
+
+    const accessibleName = (el) => {
+        const labelledBy = el.getAttribute('aria-labelledby');
+        if (labelledBy) {
+            const text = labelledBy.split(/\\s+/)
+                .map((id) => document.getElementById(id))
+                .filter(Boolean)
+                .map((node) => node.innerText)
+                .join(' ');
+            if (clean(text)) return clean(text);
+        }
+        return clean(el.getAttribute('aria-label'))
+            || clean(el.innerText)
+            || clean(el.getAttribute('placeholder'))
+            || clean(el.getAttribute('title'))
+            || clean(el.getAttribute('alt'))
+            || (el.tagName === 'INPUT' && ['button', 'submit'].includes(el.type) ? clean(el.value) : '');
+    };
+
+    const cssPath = (el) => {
+        const parts = [];
+        while (el && el.nodeType === 1 && el !== document.body) {
+            let index = 1;
+            for (let sib = el.previousElementSibling; sib; sib = sib.previousElementSibling) {
+                if (sib.tagName === el.tagName) index++;
+            }
+            parts.unshift(`${el.tagName.toLowerCase()}:nth-of-type(${index})`);
+            el = el.parentElement;
+        }
+        return ['body', ...parts].join(' > ');
+    };
+
+    const stableSelector = (el, role, name) => {
+        const tag = el.tagName.toLowerCase();
+        const testId = el.getAttribute('data-testid') || el.getAttribute('data-test-id');
+        if (testId) return `[data-testid=${quote(testId)}]`;
+        if (el.id && /^[A-Za-z][\\w-]*$/.test(el.id) && !/\\d{3,}/.test(el.id)) return `#${el.id}`;
+        if (['input', 'textarea', 'select'].includes(tag)) {
+            if (el.getAttribute('name')) return `${tag}[name=${quote(el.getAttribute('name'))}]`;
+            if (el.getAttribute('placeholder')) return `${tag}[placeholder=${quote(el.getAttribute('placeholder'))}]`;
+            if (el.getAttribute('aria-label')) return `${tag}[aria-label=${quote(el.getAttribute('aria-label'))}]`;
+        }
+        if (name && name.length <= 80) {
+            if (role && role !== 'text') return `role=${role}[name=${quote(name)}]`;
+            return `text=${quote(name)}`;
+        }
+        return cssPath(el);
+    };
+
+    const isVisible = (el, rect, style) => rect.width > 0 && rect.height > 0
+        && style.visibility !== 'hidden' && style.display !== 'none' && parseFloat(style.opacity) > 0;
+
+    const included = new Set();
+    const insideIncluded = (el) => {
+        for (let p = el.parentElement; p; p = p.parentElement) {
+            if (included.has(p)) return true;
+        }
+        return false;
+    };
+
+    const records = [];
+    const root = document.body;
+    if (!root) return records;
+
+    for (const el of root.querySelectorAll('*')) {
+        if (records.length >= maxElements) break;
+        if (['SCRIPT', 'STYLE', 'NOSCRIPT'].includes(el.tagName) || el.closest('svg')) continue;
+
+        const style = window.getComputedStyle(el);
+        const rect = el.getBoundingClientRect();
+        if (!isVisible(el, rect, style)) continue;
+
+        let role = clean(el.getAttribute('role')) || implicitRole(el);
+        const tabIndex = el.getAttribute('tabindex');
+        const parentStyle = el.parentElement ? window.getComputedStyle(el.parentElement) : null;
+        const pointer = style.cursor === 'pointer' && (!parentStyle || parentStyle.cursor !== 'pointer');
+        const interactive = INTERACTIVE_ROLES.has(role) || (tabIndex !== null && parseInt(tabIndex, 10) >= 0) || pointer;
+
+        let kind = '';
+        if (interactive && !insideIncluded(el)) {
+            kind = 'interactive';
+            if (!role) role = 'button';
+        } else if (role === 'heading' && !insideIncluded(el)) {
+            kind = 'heading';
+        } else {
+            const ownText = clean(Array.from(el.childNodes)
+                .filter((n) => n.nodeType === Node.TEXT_NODE)
+                .map((n) => n.textContent)
+                .join(' '));
+            if (ownText && !insideIncluded(el)) {
+                kind = 'text';
+                role = 'text';
+            }
+        }
+        if (!kind) continue;
+
+        included.add(el);
+        const name = kind === 'text' ? clean(el.innerText) : accessibleName(el);
+        const text = clean(el.innerText);
+        const tag = el.tagName.toLowerCase();
+        const record = {
+            role,
+            name: name.slice(0, 80),
+            text: text !== name ? text.slice(0, 80) : '',
+            test_id: el.getAttribute('data-testid') || el.getAttribute('data-test-id') || '',
+            tag,
+            selector: stableSelector(el, kind === 'text' ? 'text' : role, name),
+            bbox: [Math.round(rect.x), Math.round(rect.y), Math.round(rect.width), Math.round(rect.height)],
+            state: {}
+        };
+        if (tag === 'input' || tag === 'textarea') {
+            record.state.type = el.type || 'text';
+            record.state.value = el.type === 'password' && el.value ? '********' : clean(el.value).slice(0, 40);
+        }
+        if (el.checked || el.getAttribute('aria-checked') === 'true' || el.getAttribute('aria-selected') === 'true') {
+            record.state.checked = true;
+        }
+        if (el.disabled || el.getAttribute('aria-disabled') === 'true') {
+            record.state.disabled = true;
+        }
+        records.push(record);
+    }
+    return records;
+}
+"""
+
+
+@dataclass
+class DomElement:
+    """A single visible element in a DOM snapshot."""
+    role: str
+    name: str
+    selector: str
+    tag: str = ""
+    text: str = ""
+    test_id: str = ""
+    bbox: Tuple[int, int, int, int] = (0, 0, 0, 0)
+    state: Dict[str, Any] = field(default_factory=dict)
+
+    def describe(self, include_bbox: bool = True) -> str:
+        """Render the element as a single compact prompt line.
+
+        Args:
+            include_bbox: Whether to include the element's position and size
+
+        Returns:
+            One-line description of the element
+        """
+        parts = [self.role]
+        if self.name:
+            parts.append(f'"{self.name}"')
+        if self.text:
+            parts.append(f'text="{self.text}"')
+        parts.append(f"sel={self.selector}")
+        for key, value in self.state.items():
+            parts.append(key if value is True else f'{key}="{value}"')
+        if include_bbox:
+            x, y, w, h = self.bbox
+            parts.append(f"@{x},{y},{w}x{h}")
+        return " ".join(parts)
+
+
+@dataclass
+class DomSnapshot:
+    """Distilled view of a page used to build prompts and fingerprint screens."""
+    url: str
+    elements: List[DomElement] = field(default_factory=list)
+    html: Optional[str] = None
+
+    @classmethod
+    def from_records(cls, url: str, records: List[Dict[str, Any]]) -> "DomSnapshot":
+        """Build a snapshot from the records returned by the in-page extractor.
+
+        Selectors that match more than one listed element are disambiguated
+        with Playwright's nth= suffix in document order.
+
+        Args:
+            url: URL of the page
+            records: Element records from the extractor script
+
+        Returns:
+            DomSnapshot with one DomElement per record
+        """
+        counts: Dict[str, int] = {}
+        for record in records:
+            counts[record["selector"]] = counts.get(record["selector"], 0) + 1
+
+        seen: Dict[str, int] = {}
+        elements = []
+        for record in records:
+            selector = record["selector"]
+            if counts[selector] > 1:
+                index = seen.get(selector, 0)
+                seen[selector] = index + 1
+                selector = f"{selector} >> nth={index}"
+
+            elements.append(DomElement(
+                role=record.get("role", ""),
+                name=record.get("name", ""),
+                selector=selector,
+                tag=record.get("tag", ""),
+                text=record.get("text", ""),
+                test_id=record.get("test_id", ""),
+                bbox=tuple(record.get("bbox", (0, 0, 0, 0))),
+                state=record.get("state", {}),
+            ))
+
+        return cls(url=url, elements=elements)
+
+    @classmethod
+    def from_html(cls, url: str, html: str) -> "DomSnapshot":
+        """Build a fallback snapshot that carries raw HTML instead of elements.
+
+        Args:
+            url: URL of the page
+            html: HTML content of the page
+
+        Returns:
+            DomSnapshot without distilled elements
+        """
+        return cls(url=url, html=html)
+
+    @property
+    def is_compact(self) -> bool:
+        """Whether the snapshot holds distilled elements rather than raw HTML."""
+        return self.html is None
+
+    def to_prompt(self, max_html_chars: int = 10000) -> str:
+        """Render the snapshot for inclusion in an LLM prompt.
+
+        Args:
+            max_html_chars: Truncation limit used for raw HTML snapshots
+
+        Returns:
+            Prompt text describing the page
+        """
+        if not self.is_compact:
+            return self.html[:max_html_chars]
+
+        lines = [f"URL: {self.url}"]
+        lines.extend(f"[{i}] {element.describe()}" for i, element in enumerate(self.elements))
+        return "\n".join(lines)
+
+    @property
+    def fingerprint(self) -> str:
+        """Structural hash of the screen, insensitive to layout jitter."""
+        if not self.is_compact:
+            return page_fingerprint(self.html)
+
+        material = "\n".join(element.describe(include_bbox=False) for element in self.elements)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SnapshotDiff:
+    """Structural changes between two compact snapshots of a page."""
+    url_before: str
+    url_after: str
+    added: List[Tuple[int, DomElement]] = field(default_factory=list)
+    removed: List[DomElement] = field(default_factory=list)
+    changed: List[Tuple[int, DomElement, DomElement]] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        """Number of added, removed and changed elements."""
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def to_prompt(self) -> str:
+        """Render the diff for inclusion in an LLM prompt.
+
+        Returns:
+            Prompt text listing the changes, with the elements' current indexes
+        """
+        lines = [f"URL: {self.url_after}" if self.url_after != self.url_before else "URL: unchanged"]
+        if not self.size:
+            lines.append("No elements changed.")
+        if self.removed:
+            lines.append("Removed:")
+            lines.extend(f"- {element.describe(include_bbox=False)}" for element in self.removed)
+        if self.added:
+            lines.append("Added:")
+            lines.extend(f"[{i}] {element.describe()}" for i, element in self.added)
+        if self.changed:
+            lines.append("Changed (before => after):")
+            lines.extend(f"[{i}] {before.describe(include_bbox=False)} => {after.describe(include_bbox=False)}"
+                         for i, before, after in self.changed)
+        return "\n".join(lines)
+
+
+def diff_snapshots(before: DomSnapshot, after: DomSnapshot) -> Optional[SnapshotDiff]:
+    """Compute the structural diff between two snapshots of a page.
+
+    Elements are matched by selector; position and size changes are ignored.
+
+    Args:
+        before: Earlier snapshot
+        after: Later snapshot
+
+    Returns:
+        The diff, or None if either snapshot holds raw HTML
+    """
+    if not before.is_compact or not after.is_compact:
+        return None
+
+    previous = {element.selector: element for element in before.elements}
+    diff = SnapshotDiff(before.url, after.url)
+    for i, element in enumerate(after.elements):
+        old = previous.pop(element.selector, None)
+        if old is None:
+            diff.added.append((i, element))
+        elif old.describe(include_bbox=False) != element.describe(include_bbox=False):
+            diff.changed.append((i, old, element))
+    diff.removed = list(previous.values())
+    return diff
+
+
+async def capture_snapshot(page: Page, max_elements: int = 250, compact: bool = True) -> DomSnapshot:
+    """Capture a snapshot of the current page.
+
+    Falls back to raw HTML if compact extraction is disabled, fails, or finds
+    nothing (e.g. while the app is still booting).
+
+    Args:
+        page: Playwright page to snapshot
+        max_elements: Maximum number of elements to extract
+        compact: Whether to distill the DOM instead of using raw HTML
+
+    Returns:
+        DomSnapshot of the page
+    """
+    if compact:
+        try:
+            records = await page.evaluate(_EXTRACT_ELEMENTS_JS, max_elements)
+            if records:
+                return DomSnapshot.from_records(page.url, records)
+            logger.debug("DOM extractor found no elements, falling back to HTML")
+        except Exception as e:
+            logger.warning(f"DOM extraction failed, falling back to HTML: {e}")
+
+    return DomSnapshot.from_html(page.url, await page.content())
@@ -0,0 +1,105 @@
+"""Multi-screen flow plans requested from the LLM in a single call."""
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from playwright.async_api import Page
+
+
+@dataclass
+class FlowStage:
+    """One screen of a scripted flow, as described by the test."""
+    name: str
+    task: str
+    context: Optional[str] = None
+    screenshot: Optional[str] = None
+
+
+@dataclass
+class FlowScreen:
+    """The model's plan for one stage of a flow.
+
+    Conditions are dictionaries with one of "selector", "text" or
+    "url_contains"; an empty condition is always met.
+    """
+    stage: str
+    expect: Dict[str, str] = field(default_factory=dict)
+    actions: List[Dict[str, Any]] = field(default_factory=list)
+    wait_for: Dict[str, str] = field(default_factory=dict)
+
+
+def _one_line(text: Optional[str]) -> str:
+    return " ".join((text or "").split())
+
+
+def stages_key(stages: List[FlowStage]) -> str:
+    """Serialize stages for use in a cache key.
+
+    Args:
+        stages: Stages the plan covers
+
+    Returns:
+        Canonical JSON of the stages' tasks and contexts
+    """
+    return json.dumps([[stage.name, _one_line(stage.task), _one_line(stage.context)] for stage in stages])
+
+
+def parse_flow_plan(screens: List[Dict[str, Any]], stages: List[FlowStage]) -> List[FlowScreen]:
+    """Match the screens of a flow plan to the stages they were planned for.
+
+    Args:
+        screens: "screens" array from the model (or the cache)
+        stages: Stages the plan was requested for
+
+    Returns:
+        Plan for each stage, in order; shorter than stages if the model planned fewer screens
+    """
+    plan = []
+    for stage, screen in zip(stages, screens):
+        if screen.get("stage") != stage.name:
+            logger.debug(f"Flow plan screen '{screen.get('stage')}' taken for stage '{stage.name}'")
+        plan.append(FlowScreen(
+            stage=stage.name,
+            expect=screen.get("expect") or {},
+            actions=screen.get("actions") or [],
+            wait_for=screen.get("wait_for") or {}
+        ))
+    return plan
+
+
+def plan_to_json(plan: List[FlowScreen]) -> List[Dict[str, Any]]:
+    """Serialize a flow plan for the cache.
+
+    Args:
+        plan: Plan to serialize
+
+    Returns:
+        List of screen dictionaries, as parse_flow_plan() accepts them
+    """
+    return [asdict(screen) for screen in plan]
+
+
+async def wait_for_condition(page: Page, condition: Dict[str, str], timeout_ms: int) -> bool:
+    """Wait for a flow condition to hold.
+
+    Args:
+        page: Playwright page showing the app
+        condition: Condition with one of "selector", "text" or "url_contains"
+        timeout_ms: How long to wait
+
+    Returns:
+        True if the condition held within the timeout (or was empty), False otherwise
+    """
+    try:
+        if condition.get("selector"):
+            await page.wait_for_selector(condition["selector"], state="visible", timeout=timeout_ms)
+        elif condition.get("text"):
+            await page.get_by_text(condition["text"]).first.wait_for(state="visible", timeout=timeout_ms)
+        elif condition.get("url_contains"):
+            fragment = condition["url_contains"]
+            await page.wait_for_url(lambda url: fragment in url, timeout=timeout_ms)
+        return True
+    except Exception as e:
+        logger.debug(f"Flow condition {condition} not met: {e}")
+        return False
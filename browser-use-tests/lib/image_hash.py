@@ -0,0 +1,42 @@
+"""Perceptual hashing of screenshots."""
+import io
+
+from PIL import Image
+
+
+def dhash(image_bytes: bytes, hash_size: int = 8) -> int:
+    """Compute the difference hash of an encoded image.
+
+    Visually equivalent images (re-encoded, slightly shifted anti-aliasing,
+    a blinking caret) hash to the same or a nearby value.
+
+    Args:
+        image_bytes: Encoded image (PNG, JPEG, WebP)
+        hash_size: Width and height of the hash grid
+
+    Returns:
+        Hash as an integer of hash_size * hash_size bits
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        pixels = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS).tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Count the bits that differ between two hashes.
+
+    Args:
+        a: First hash
+        b: Second hash
+
+    Returns:
+        Number of differing bits
+    """
+    return bin(a ^ b).count("1")
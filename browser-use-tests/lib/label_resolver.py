@@ -0,0 +1,133 @@
+"""Resolve simple "click the X button" tasks against the page without the LLM."""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from playwright.async_api import Page
+
+from lib.dom_snapshot import DomElement, DomSnapshot
+from lib.llm_cache import normalize_text
+
+
+# 'Click "Continue"', 'Tap the "Sign In" link'
+_CLICK_QUOTED_RE = re.compile(
+    r'^\s*(?:find and )?(?:click|tap|press)(?: on)?(?: the)?\s+["“](?P<target>[^"”\n]+)["”](?P<rest>.*)$',
+    re.IGNORECASE | re.DOTALL
+)
+
+# "Click the Next or Continue button to proceed", "Find and click the Done button"
+_CLICK_TASK_RE = re.compile(
+    r"^\s*(?:find and )?(?:click|tap|press)(?: on)?(?: the)?\s+(?P<target>.+?)\s+(?:button|link|tab)s?\b(?P<rest>.*)$",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Straight or curly double quotes; single quotes collide with apostrophes
+_QUOTED_RE = re.compile(r'"([^"\n]{1,60})"|“([^”\n]{1,60})”')
+
+# Tasks that do more than one thing go to the LLM
+_COMPOUND_RE = re.compile(r"\b(?:and|then)\b|[,;]", re.IGNORECASE)
+
+_GENERIC_TARGETS = {"the", "a", "an", "any", "this", "that", "next screen", "appropriate", "correct", "right"}
+
+_CLICKABLE_ROLES = {"button", "link", "tab", "menuitem", "option", "radio", "checkbox", "switch"}
+
+
+def _quoted(text: Optional[str]) -> List[str]:
+    return [(straight or curly).strip() for straight, curly in _QUOTED_RE.findall(text or "")]
+
+
+def extract_labels(task: str, context: Optional[str] = None) -> List[str]:
+    """Pull the labels of the control a single-click task names.
+
+    Args:
+        task: Task description, e.g. "Click the Sign Up or Create Account button"
+        context: Step context; its quoted labels are added as candidates
+
+    Returns:
+        Candidate labels in order (task first, then context), or an empty list
+        if the task isn't a single click on a named control
+    """
+    match = _CLICK_QUOTED_RE.match(task) or _CLICK_TASK_RE.match(task)
+    if not match or _COMPOUND_RE.search(match.group("rest")):
+        return []
+
+    target = match.group("target").strip()
+    if _COMPOUND_RE.search(target) or normalize_text(target) in _GENERIC_TARGETS:
+        return []
+
+    labels = [label.strip() for label in re.split(r"\s+or\s+|/", target, flags=re.IGNORECASE)]
+    labels += _quoted(task) + _quoted(context)
+
+    unique = []
+    for label in labels:
+        if label and normalize_text(label) not in _GENERIC_TARGETS and label not in unique:
+            unique.append(label)
+    return unique
+
+
+def match_labels(snapshot: DomSnapshot, labels: List[str]) -> List[DomElement]:
+    """Find the visible clickable elements whose accessible name is exactly one of the labels.
+
+    Args:
+        snapshot: Compact snapshot of the current page
+        labels: Labels from extract_labels()
+
+    Returns:
+        Matching elements in document order
+    """
+    wanted = {normalize_text(label) for label in labels}
+    return [element for element in snapshot.elements
+            if element.role in _CLICKABLE_ROLES and normalize_text(element.name) in wanted]
+
+
+async def resolve_click(page: Page,
+                        snapshot: DomSnapshot,
+                        task: str,
+                        context: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Turn a single-click task into a click action when exactly one visible control matches.
+
+    Args:
+        page: Playwright page showing the app
+        snapshot: Compact snapshot of the current page
+        task: Task description
+        context: Step context
+
+    Returns:
+        Click action, or None when the task names no control, nothing or more than
+        one control matches, or the match is disabled
+    """
+    if not snapshot.is_compact:
+        return None
+
+    labels = extract_labels(task, context)
+    if not labels:
+        return None
+
+    matches = match_labels(snapshot, labels)
+    if len(matches) != 1:
+        logger.debug(f"Label resolver found {len(matches)} controls for {labels}, deferring to the LLM")
+        return None
+
+    element = matches[0]
+    if element.state.get("disabled") or " >> nth=" in element.selector:
+        return None
+
+    # The selector must pick out that one control on the live page; controls that are only
+    # clickable through a pointer cursor have no ARIA role, so fall back to their exact text
+    for selector in dict.fromkeys([element.selector, f"text={json.dumps(element.name)}"]):
+        try:
+            locator = page.locator(selector)
+            if await locator.count() != 1 or not await locator.is_visible():
+                continue
+        except Exception as e:
+            logger.debug(f"Label resolver selector {selector} failed: {e}")
+            continue
+
+        logger.info(f"Resolved '{task}' to {element.role} \"{element.name}\" without the LLM")
+        return {
+            "type": "click",
+            "selector": selector,
+            "description": f"Click the {element.role} \"{element.name}\" named by the task"
+        }
+    return None
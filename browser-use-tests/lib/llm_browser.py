@@ -1,16 +1,47 @@
 """LLM-powered browser automation module."""
 import asyncio
 import os
-from typing import Optional, List, Dict, Any, Callable, Union
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Union
 from pathlib import Path
 import time
 import json
 
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext
-from openai import AsyncOpenAI
 from loguru import logger
 
-from config.config import OPENAI_API_KEY, BASE_URL, DEFAULT_TIMEOUT, NAVIGATION_TIMEOUT, HEADLESS, BROWSER_TYPE, SCREENSHOT_DIR
+from config.config import (OPENAI_API_KEY, BASE_URL, DEFAULT_TIMEOUT, NAVIGATION_TIMEOUT, HEADLESS, BROWSER_TYPE, SCREENSHOT_DIR,
+                           DOM_SNAPSHOT_MODE, DOM_SNAPSHOT_MAX_ELEMENTS, FLOW_EXPECT_TIMEOUT, FLOW_MAX_REPLANS,
+                           LABEL_RESOLVER_ENABLED, LLM_STREAM_ACTIONS)
+from lib.action_stream import ActionStreamParser, parse_actions
+from lib.actions import FILL_FIELDS_JS, fill_batch_length, get_action_type
+from lib.browser_pool import launch_browser
+from lib.checkpoints import detect_build_id
+from lib.conversation import ConversationSession
+from lib.dom_snapshot import DomSnapshot, capture_snapshot
+from lib.flows import FlowScreen, FlowStage, parse_flow_plan, plan_to_json, stages_key, wait_for_condition
+from lib.label_resolver import resolve_click
+from lib.llm_cache import LLMCache
+from lib.llm_client import LLMClient, LLMUnavailableError, shared_llm_client
+from lib.llm_metrics import llm_metrics
+from lib.prompts import (ACTIONS_SYSTEM_PROMPT, FLOW_SYSTEM_PROMPT, LOCATE_SYSTEM_PROMPT, flow_prompt, locate_prompt,
+                         task_prompt)
+from lib.screenshots import ACTION, ERROR, EXPLICIT, TASK, ScreenshotWriter
+from lib.settle import SETTLE_INIT_JS, wait_for_settle
+
+
+@dataclass
+class TaskPlan:
+    """Actions planned for a task against a specific screen."""
+    task: str
+    context: Optional[str]
+    actions: List[Dict[str, Any]]
+    fingerprint: str
+    cache_key: str
+    cached: bool
+    model: Optional[str] = None
+    malformed: bool = False
+    resolved: bool = False
 
 
 class LLMBrowser:
@@ -24,7 +55,9 @@ class LLMBrowser:
                  default_timeout: int = DEFAULT_TIMEOUT,
                  navigation_timeout: int = NAVIGATION_TIMEOUT,
                  screenshot_dir: str = SCREENSHOT_DIR,
-                 api_key: str = OPENAI_API_KEY):
+                 api_key: str = OPENAI_API_KEY,
+                 cache: Optional[LLMCache] = None,
+                 llm_client: Optional[LLMClient] = None):
         """Initialize the LLM Browser.
         
         Args:
@@ -36,6 +69,8 @@ class LLMBrowser:
             navigation_timeout: Navigation timeout in ms
             screenshot_dir: Directory to save screenshots
             api_key: OpenAI API key
+            cache: LLM response cache (defaults to the on-disk cache from config)
+            llm_client: LLM client to send requests through (defaults to the shared pooled client)
         """
         self.model = model
         self.base_url = base_url
@@ -48,8 +83,16 @@ class LLMBrowser:
         self.screenshot_dir = Path(screenshot_dir)
         self.screenshot_dir.mkdir(exist_ok=True, parents=True)
         
-        # Initialize OpenAI client
-        self.client = AsyncOpenAI(api_key=api_key)
+        # Screenshots are encoded and written by a background task
+        self.screenshots = ScreenshotWriter(self.screenshot_dir)
+        
+        # Requests go through the process-wide connection pool unless another key is used
+        if llm_client is None:
+            llm_client = shared_llm_client() if api_key == OPENAI_API_KEY else LLMClient(api_key=api_key)
+        self.llm = llm_client
+        
+        # Cache of LLM results keyed on task and page structure
+        self.cache = cache if cache is not None else LLMCache()
         
         # Playwright instances will be set during start()
         self.playwright = None
@@ -57,92 +100,486 @@ class LLMBrowser:
         self.context = None
         self.page = None
         
-    async def start(self):
-        """Start the browser session."""
-        logger.info(f"Starting {self.browser_type} browser")
+        # Whether this instance launched the browser (False when leased from a pool)
+        self.owns_browser = False
+        
+        # App build identifier, detected lazily for checkpoint validation
+        self.build_id = None
         
+        # Stateful planning conversation, when enabled with begin_conversation()
+        self.conversation: Optional[ConversationSession] = None
+        
+    async def start(self, browser: Optional[Browser] = None):
+        """Start the browser session.
+        
+        Args:
+            browser: Already launched browser to open the session in (e.g. from a
+                BrowserPool). If omitted, a dedicated browser is launched.
+        """
         if self.browser:
             logger.warning("Browser is already started. Stopping existing browser first.")
             await self.stop()
-            
-        # Start playwright and launch browser
-        self.playwright = await async_playwright().start()
         
-        # Get the browser instance based on browser_type
-        if self.browser_type == "chromium":
-            self.browser = await self.playwright.chromium.launch(headless=self.headless)
-        elif self.browser_type == "firefox":
-            self.browser = await self.playwright.firefox.launch(headless=self.headless)
-        elif self.browser_type == "webkit":
-            self.browser = await self.playwright.webkit.launch(headless=self.headless)
+        if browser:
+            logger.info("Starting session in shared browser")
+            self.browser = browser
+            self.owns_browser = False
         else:
-            raise ValueError(f"Unsupported browser type: {self.browser_type}")
+            logger.info(f"Starting {self.browser_type} browser")
+            
+            # Start playwright and launch browser
+            self.playwright = await async_playwright().start()
+            self.browser = await launch_browser(self.playwright, self.browser_type, self.headless)
+            self.owns_browser = True
         
         # Create context and page
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
-        
-        # Set timeouts
-        self.page.set_default_timeout(self.default_timeout)
-        self.page.set_default_navigation_timeout(self.navigation_timeout)
+        await self._open_context()
         
         # Navigate to base URL
         await self.page.goto(self.base_url)
         logger.info(f"Navigated to {self.base_url}")
         
         # Take initial screenshot
-        await self._save_screenshot("initial_load")
+        await self._capture_screenshot("initial_load", TASK)
         
         return self
     
+    async def _open_context(self, storage_state: Optional[Dict[str, Any]] = None):
+        """Open a fresh context and page, replacing the current ones.
+        
+        Args:
+            storage_state: Cookies and local storage to seed the context with
+        """
+        if self.context:
+            await self.context.close()
+        
+        self.context = await self.browser.new_context(storage_state=storage_state)
+        await self.context.add_init_script(SETTLE_INIT_JS)
+        self.page = await self.context.new_page()
+        
+        # Set timeouts
+        self.page.set_default_timeout(self.default_timeout)
+        self.page.set_default_navigation_timeout(self.navigation_timeout)
+    
+    async def wait_for_settle(self, quiet_ms: Optional[int] = None, timeout_ms: Optional[int] = None) -> Dict[str, Any]:
+        """Wait until the UI is stable instead of sleeping for a fixed time.
+        
+        Args:
+            quiet_ms: How long the DOM and network must stay quiet (defaults to config)
+            timeout_ms: Upper bound on the wait (defaults to config)
+            
+        Returns:
+            Dictionary with "settled" and "elapsed_ms" keys
+        """
+        if not self.page:
+            raise RuntimeError("Browser is not started. Call start() first.")
+        
+        kwargs = {}
+        if quiet_ms is not None:
+            kwargs["quiet_ms"] = quiet_ms
+        if timeout_ms is not None:
+            kwargs["timeout_ms"] = timeout_ms
+        return await wait_for_settle(self.page, **kwargs)
+    
+    async def capture_state(self) -> Dict[str, Any]:
+        """Capture the session's storage state and current URL.
+        
+        Returns:
+            Dictionary with "storage_state" and "url" keys
+        """
+        if not self.browser or not self.page:
+            raise RuntimeError("Browser is not started. Call start() first.")
+        
+        return {
+            "storage_state": await self.context.storage_state(),
+            "url": self.page.url
+        }
+    
+    async def restore_state(self, storage_state: Optional[Dict[str, Any]], url: str):
+        """Replace the session with a fresh context seeded with a storage state.
+        
+        Args:
+            storage_state: Storage state captured by capture_state(), or None for a clean session
+            url: URL to open in the new context
+        """
+        if not self.browser:
+            raise RuntimeError("Browser is not started. Call start() first.")
+        
+        await self._open_context(storage_state)
+        await self.page.goto(url)
+        logger.info(f"Restored session at {url}")
+    
+    async def app_build_id(self) -> str:
+        """Identify the app build the session is running against.
+        
+        Returns:
+            Opaque build identifier, detected once per session
+        """
+        if not self.build_id:
+            self.build_id = await detect_build_id(self.page)
+        return self.build_id
+    
     async def stop(self):
-        """Stop the browser session."""
+        """Stop the browser session.
+        
+        A shared browser is left running; only this session's context is closed.
+        """
+        await self.screenshots.close()
+        
+        if self.context and not self.owns_browser:
+            logger.info("Closing browser context")
+            await self.context.close()
+        
         if self.browser:
-            logger.info("Closing browser")
-            await self.browser.close()
+            if self.owns_browser:
+                logger.info("Closing browser")
+                await self.browser.close()
             self.browser = None
+            self.context = None
             self.page = None
             
         if self.playwright:
             await self.playwright.stop()
             self.playwright = None
     
-    async def execute_task(self, task_description: str, context: Optional[str] = None) -> Dict[str, Any]:
+    async def execute_task(self,
+                           task_description: str,
+                           context: Optional[str] = None,
+                           model: Optional[str] = None,
+                           resolve_labels: bool = True) -> Dict[str, Any]:
         """Execute a task described in natural language.
         
         Args:
             task_description: Natural language description of the task
             context: Additional context about the application state
+            model: Model to plan the actions with instead of the browser's default
+            resolve_labels: Whether a click on a control the task names may skip the LLM
             
         Returns:
             Dictionary with task execution results
+            
+        Raises:
+            LLMUnavailableError: The model was throttled or unreachable even after retrying
+        """
+        if not LLM_STREAM_ACTIONS:
+            return await self.execute_planned(
+                await self.plan_task(task_description, context, model=model, resolve_labels=resolve_labels))
+        
+        # Execute each action as soon as the model has finished generating it. Actions generated
+        # while the browser is still busy queue up, and fills that piled up run as one batch
+        results = []
+        queue = []
+        worker = None
+        
+        async def drain() -> None:
+            while queue:
+                batch = list(queue)
+                queue.clear()
+                results.extend(await self._execute_actions(batch, len(results), len(results) + len(batch)))
+        
+        async def dispatch(action: Dict[str, Any]) -> None:
+            nonlocal worker
+            queue.append(action)
+            if worker is None or worker.done():
+                worker = asyncio.create_task(drain())
+        
+        try:
+            plan = await self.plan_task(task_description, context, on_action=dispatch, model=model, resolve_labels=resolve_labels)
+        finally:
+            if worker is not None:
+                await worker
+        return await self.execute_planned(plan, results)
+    
+    async def plan_task(self,
+                        task_description: str,
+                        context: Optional[str] = None,
+                        on_action: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                        model: Optional[str] = None,
+                        resolve_labels: bool = True,
+                        stateless: bool = False) -> TaskPlan:
+        """Plan the actions for a task against the current screen.
+        
+        Args:
+            task_description: Natural language description of the task
+            context: Additional context about the application state
+            on_action: Called with each action as soon as it is generated, when the
+                plan comes from the LLM; the actions are not executed otherwise
+            model: Model to plan with instead of the browser's default
+            resolve_labels: Whether a click on a control the task names may be planned
+                without the LLM, when exactly one visible control matches
+            stateless: Plan outside the conversation, for plans that may be discarded
+                (e.g. speculative ones); a conversation turn can't be taken back
+            
+        Returns:
+            The planned actions and the fingerprint of the screen they were planned for
+            
+        Raises:
+            LLMUnavailableError: The model was throttled or unreachable even after retrying
         """
         if not self.browser or not self.page:
             raise RuntimeError("Browser is not started. Call start() first.")
             
         # Get page contents and screenshot for context
-        page_content = await self.page.content()
-        screenshot_path = await self._save_screenshot(f"pre_task_{int(time.time())}")
+        snapshot = await self._snapshot_page()
+        await self._capture_screenshot(f"pre_task_{int(time.time())}", TASK)
         
-        # Build prompt with all relevant context
-        prompt = self._build_task_prompt(task_description, page_content, context)
+        # A click on a control the task names needs no model when exactly one control matches
+        if LABEL_RESOLVER_ENABLED and resolve_labels:
+            action = await resolve_click(self.page, snapshot, task_description, context)
+            if action:
+                return TaskPlan(task_description, context, [action], snapshot.fingerprint, "", False, resolved=True)
         
-        # Get LLM response with browser actions
-        actions = await self._get_llm_actions(prompt)
+        # Reuse a previous plan if the same task ran against the same screen with the same model
+        model = model or self.model
+        cache_key = LLMCache.make_key("actions", model, task_description, context, snapshot.fingerprint,
+                                      prompt=ACTIONS_SYSTEM_PROMPT)
+        actions = self.cache.get(cache_key)
+        cached = actions is not None
         
-        # Execute the actions
-        results = await self._execute_actions(actions)
+        if not cached and self.conversation is not None and not stateless:
+            # Continue the conversation with what changed since the model last saw the page
+            prompt = self.conversation.next_prompt(task_description, context, snapshot, self._build_task_prompt)
+            actions = await self._get_llm_actions(prompt, on_action, self.conversation.history, model)
+            if actions is not None:
+                self.conversation.add_reply(actions)
+        elif not cached:
+            # Build prompt with all relevant context
+            prompt = self._build_task_prompt(task_description, snapshot.to_prompt(), context)
+            
+            # Get LLM response with browser actions
+            actions = await self._get_llm_actions(prompt, on_action, model=model)
+        else:
+            logger.info(f"Using cached actions for task: {task_description}")
+            llm_metrics.record_cache_hit("actions", model)
+        
+        # An answer that couldn't be parsed counts as a failed plan; an empty actions list is a valid answer
+        malformed = actions is None
+        if malformed:
+            logger.warning(f"{model} returned an unusable response for task: {task_description}")
+            actions = []
+        
+        return TaskPlan(task_description, context, actions, snapshot.fingerprint, cache_key, cached, model, malformed)
+    
+    async def execute_planned(self, plan: TaskPlan, results: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Execute actions planned by plan_task().
+        
+        Args:
+            plan: The plan to execute
+            results: Results of the plan's leading actions, if they were already executed while streaming
+            
+        Returns:
+            Dictionary with task execution results
+        """
+        # Execute the actions that haven't run yet
+        results = list(results or [])
+        if len(results) < len(plan.actions):
+            results.extend(await self._execute_actions(plan.actions[len(results):], len(results), len(plan.actions)))
+        success = not plan.malformed and all(result.get("success", False) for result in results)
+        
+        if self.conversation is not None:
+            self.conversation.record_outcome(plan.task, results)
+        
+        # Only remember plans that worked, and forget cached ones that stopped working
+        if success and plan.actions and not plan.cached and not plan.resolved:
+            self.cache.set(plan.cache_key, plan.actions)
+        elif plan.cached and not success:
+            self.cache.invalidate(plan.cache_key)
         
         # Take post-action screenshot
-        await self._save_screenshot(f"post_task_{int(time.time())}")
+        await self._capture_screenshot(f"post_task_{int(time.time())}", TASK)
+        
+        return {
+            "task": plan.task,
+            "actions": plan.actions,
+            "results": results,
+            "success": success,
+            "cached": plan.cached,
+            "fingerprint": plan.fingerprint,
+            "model": plan.model,
+            "malformed": plan.malformed,
+            "resolved": plan.resolved
+        }
+    
+    async def execute_plan(self, task_description: str, actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Execute a previously compiled action list directly, without the LLM.
+        
+        Args:
+            task_description: Natural language description of the task
+            actions: Actions recorded from an earlier successful run
+            
+        Returns:
+            Dictionary with task execution results, in the same shape as execute_task()
+        """
+        if not self.browser or not self.page:
+            raise RuntimeError("Browser is not started. Call start() first.")
+        
+        logger.info(f"Replaying compiled plan for task: {task_description}")
+        results = await self._execute_actions(actions)
+        if self.conversation is not None:
+            self.conversation.record_outcome(task_description, results)
+        
+        await self._capture_screenshot(f"post_plan_{int(time.time())}", TASK)
         
         return {
             "task": task_description,
             "actions": actions,
             "results": results,
-            "success": all(result.get("success", False) for result in results)
+            "success": all(result.get("success", False) for result in results),
+            "compiled": True
         }
     
+    async def execute_flow(self,
+                           goal: str,
+                           stages: List[FlowStage],
+                           max_replans: int = FLOW_MAX_REPLANS) -> Dict[str, Any]:
+        """Execute a multi-screen flow from a single plan covering all of its stages.
+        
+        The model plans every stage at once, with the screen each stage expects
+        and the condition that shows its transition finished. When the app stops
+        matching the plan, the remaining stages are planned again from the
+        current screen.
+        
+        Args:
+            goal: What the whole flow achieves
+            stages: Stages of the flow, starting with the one on the current screen
+            max_replans: Maximum number of re-plans after the first plan
+            
+        Returns:
+            Dictionary with the completed stages, the stage the flow stopped at and the number of LLM calls
+            
+        Raises:
+            LLMUnavailableError: The model was throttled or unreachable even after retrying
+        """
+        if not self.browser or not self.page:
+            raise RuntimeError("Browser is not started. Call start() first.")
+        
+        completed = []
+        index = 0
+        llm_calls = 0
+        divergence = None
+        
+        while index < len(stages) and llm_calls <= max_replans:
+            remaining = stages[index:]
+            snapshot = await self._snapshot_page()
+            
+            # Reuse a previous plan if the same stages ran from the same screen
+            cache_key = LLMCache.make_key("flow", self.model, goal, stages_key(remaining), snapshot.fingerprint,
+                                          prompt=FLOW_SYSTEM_PROMPT)
+            cached_plan = self.cache.get(cache_key)
+            if cached_plan is not None:
+                logger.info(f"Using cached flow plan from stage '{remaining[0].name}'")
+                llm_metrics.record_cache_hit("flow", self.model)
+                plan = parse_flow_plan(cached_plan, remaining)
+            else:
+                logger.info(f"Planning flow from stage '{remaining[0].name}' ({len(remaining)} stages)")
+                prompt = flow_prompt(goal, remaining, snapshot.to_prompt(), divergence)
+                plan = parse_flow_plan(await self._get_llm_flow(prompt), remaining)
+                llm_calls += 1
+            
+            divergence = await self._run_flow_plan(plan, remaining, completed)
+            index = len(completed)
+            
+            if divergence is None and not plan:
+                divergence = "the plan had no screens"
+            
+            if divergence is None:
+                # The plan took us through every stage it covered
+                if cached_plan is None and index == len(stages):
+                    self.cache.set(cache_key, plan_to_json(plan))
+                continue
+            
+            if cached_plan is not None:
+                self.cache.invalidate(cache_key)
+            if index < len(stages):
+                logger.warning(f"Flow diverged at stage '{stages[index].name}': {divergence}")
+        
+        success = index == len(stages)
+        if success:
+            logger.success(f"Flow completed with {llm_calls} LLM call(s): {goal}")
+        
+        return {
+            "goal": goal,
+            "success": success,
+            "stages": completed,
+            "failed_stage": None if success else stages[index].name,
+            "error": None if success else divergence,
+            "llm_calls": llm_calls
+        }
+    
+    async def _run_flow_plan(self,
+                             plan: List[FlowScreen],
+                             stages: List[FlowStage],
+                             completed: List[Dict[str, Any]]) -> Optional[str]:
+        """Run the screens of a flow plan until one no longer matches the app.
+        
+        Args:
+            plan: Planned screens, one per stage
+            stages: Stages the plan covers
+            completed: Results of completed stages, appended to as stages finish
+            
+        Returns:
+            Why the app diverged from the plan, or None if every planned screen ran
+        """
+        for stage, screen in zip(stages, plan):
+            if not await wait_for_condition(self.page, screen.expect, FLOW_EXPECT_TIMEOUT):
+                await self._capture_screenshot(f"flow_{stage.name}_unexpected", ERROR)
+                return f"the {stage.name} screen never showed {screen.expect}"
+            
+            logger.info(f"Flow stage '{stage.name}': {len(screen.actions)} action(s)")
+            results = await self._execute_actions(screen.actions)
+            if not all(result.get("success", False) for result in results):
+                errors = [result["error"] for result in results if not result.get("success", False)]
+                return f"actions on the {stage.name} screen failed: {errors}"
+            
+            # A missed wait condition isn't fatal; the next stage's expectation decides
+            if screen.wait_for and not await wait_for_condition(self.page, screen.wait_for, self.navigation_timeout):
+                logger.warning(f"Flow stage '{stage.name}' never reached {screen.wait_for}")
+            await self.wait_for_settle()
+            
+            if stage.screenshot:
+                await self._save_screenshot(stage.screenshot)
+            
+            completed.append({
+                "stage": stage.name,
+                "task": stage.task,
+                "actions": screen.actions,
+                "results": results,
+                "success": True
+            })
+        
+        return None
+    
+    def begin_conversation(self) -> ConversationSession:
+        """Plan the following tasks in one stateful conversation.
+        
+        The first task sends the full page snapshot; later tasks send only what
+        changed on the page and how the previous steps went.
+        
+        Returns:
+            The conversation session
+        """
+        self.conversation = ConversationSession()
+        return self.conversation
+    
+    def end_conversation(self) -> None:
+        """Go back to planning every task in a fresh, stateless chat."""
+        if self.conversation is not None:
+            logger.debug(f"Conversation ended after {self.conversation.full_turns} full and "
+                         f"{self.conversation.diff_turns} diff turns")
+        self.conversation = None
+    
+    async def screen_fingerprint(self) -> str:
+        """Get the structural fingerprint of the current screen.
+        
+        Returns:
+            Fingerprint that identifies the screen independently of layout jitter
+        """
+        if not self.browser or not self.page:
+            raise RuntimeError("Browser is not started. Call start() first.")
+        
+        snapshot = await self._snapshot_page()
+        return snapshot.fingerprint
+    
     async def verify_element(self, description: str) -> bool:
         """Verify if an element described in natural language exists on the page.
         
@@ -152,167 +589,334 @@ class LLMBrowser:
         Returns:
             True if the element is found, False otherwise
         """
+        return await self.locate_element(description) is not None
+    
+    async def locate_element(self, description: str) -> Optional[str]:
+        """Find a selector for an element described in natural language.
+        
+        Args:
+            description: Natural language description of the element
+            
+        Returns:
+            Selector that matches the element on the current page, or None if not found
+        """
+        located = await self.locate_elements([description])
+        return located[description]
+    
+    async def verify_elements(self, descriptions: List[str]) -> Dict[str, bool]:
+        """Verify several described elements against one page snapshot and a single LLM call.
+        
+        Args:
+            descriptions: Natural language descriptions of the elements
+            
+        Returns:
+            Mapping of each description to whether the element was found
+        """
+        located = await self.locate_elements(descriptions)
+        return {description: selector is not None for description, selector in located.items()}
+    
+    async def locate_elements(self, descriptions: List[str]) -> Dict[str, Optional[str]]:
+        """Find selectors for several elements described in natural language.
+        
+        The page is snapshotted once, descriptions already cached for this screen
+        skip the LLM, the rest are resolved in a single LLM call, and all
+        selectors are then checked against the page concurrently.
+        
+        Args:
+            descriptions: Natural language descriptions of the elements
+            
+        Returns:
+            Mapping of each description to a selector that matches it, or None if not found
+        """
         if not self.browser or not self.page:
             raise RuntimeError("Browser is not started. Call start() first.")
         
-        page_content = await self.page.content()
+        snapshot = await self._snapshot_page()
+        cache_keys = {
+            description: LLMCache.make_key("verify", self.model, description, snapshot.fingerprint, prompt=LOCATE_SYSTEM_PROMPT)
+            for description in descriptions
+        }
+        
+        # Selectors proposed for each description, from the cache or the LLM
+        candidates: Dict[str, Optional[str]] = {}
+        for description in descriptions:
+            cached = self.cache.get(cache_keys[description])
+            if cached is not None:
+                candidates[description] = cached["selector"]
+                llm_metrics.record_cache_hit("verify", self.model)
         
-        prompt = f"""
-        You are an AI assistant helping with browser automation. Based on the following page content,
-        determine if an element matching this description exists: "{description}"
+        uncached = [description for description in descriptions if description not in candidates]
+        if uncached:
+            candidates.update(await self._llm_locate_elements(uncached, snapshot))
         
-        If it exists, provide the most appropriate selector to find it.
-        If it doesn't exist, explain why it might not be found.
+        # Double-check every proposed selector against the page
+        checks = await asyncio.gather(*(
+            self._selector_exists(candidates[description]) if candidates.get(description) else self._not_found()
+            for description in descriptions
+        ))
+        
+        located: Dict[str, Optional[str]] = {}
+        for description, found in zip(descriptions, checks):
+            cache_key = cache_keys[description]
+            if found:
+                located[description] = candidates[description]
+                # Cache hits are already stored; rewriting them would only rescan the cache for eviction
+                if description in uncached:
+                    self.cache.set(cache_key, {"selector": candidates[description]})
+            else:
+                located[description] = None
+                self.cache.invalidate(cache_key)
         
-        Page Content:
-        {page_content}
+        return located
+    
+    async def _llm_locate_elements(self, descriptions: List[str], snapshot: DomSnapshot) -> Dict[str, Optional[str]]:
+        """Ask the LLM for selectors of several described elements in one request.
         
-        Return your response in this JSON format:
-        {{
-            "exists": true/false,
-            "selector": "selector string if exists",
-            "explanation": "explanation of your reasoning"
-        }}
+        Args:
+            descriptions: Natural language descriptions of the elements
+            snapshot: Snapshot of the current page
+            
+        Returns:
+            Mapping of each description to the proposed selector, or None if the LLM found no match
         """
+        prompt = locate_prompt(descriptions, snapshot.to_prompt())
         
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": "You are a browser automation expert that analyzes HTML and finds elements."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        proposed: Dict[str, Optional[str]] = {description: None for description in descriptions}
         
-        result = response.choices[0].message.content
-        logger.debug(f"LLM verification result: {result}")
+        try:
+            response = await self.llm.chat(
+                "verify",
+                model=self.model,
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": LOCATE_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            
+            result = response.choices[0].message.content
+            logger.debug(f"LLM verification result: {result}")
+            
+            for position, entry in enumerate(json.loads(result).get("elements", [])):
+                index = entry.get("index", position)
+                if isinstance(index, int) and 0 <= index < len(descriptions) and entry.get("exists") and entry.get("selector"):
+                    proposed[descriptions[index]] = entry["selector"]
+                    
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to get LLM verification: {e}")
         
+        return proposed
+    
+    @staticmethod
+    async def _not_found() -> bool:
+        return False
+    
+    async def _selector_exists(self, selector: str) -> bool:
+        """Check whether a selector matches an element on the current page.
+        
+        Args:
+            selector: Selector to look up
+            
+        Returns:
+            True if an element matches, False otherwise
+        """
         try:
-            parsed = json.loads(result)
-            
-            if parsed.get("exists", False) and parsed.get("selector"):
-                # Double-check by trying to find the element
-                try:
-                    element = await self.page.query_selector(parsed["selector"])
-                    return element is not None
-                except Exception as e:
-                    logger.warning(f"Failed to verify element with selector {parsed['selector']}: {e}")
-                    return False
-            else:
-                return False
-                
+            element = await self.page.query_selector(selector)
+            return element is not None
         except Exception as e:
-            logger.error(f"Failed to parse LLM response: {e}")
+            logger.warning(f"Failed to verify element with selector {selector}: {e}")
             return False
     
-    async def _save_screenshot(self, name: str) -> str:
-        """Save a screenshot of the current page.
+    async def _snapshot_page(self) -> DomSnapshot:
+        """Capture a compact snapshot of the current page for prompts and fingerprinting.
+        
+        Returns:
+            DomSnapshot of the current page
+        """
+        return await capture_snapshot(
+            self.page,
+            max_elements=DOM_SNAPSHOT_MAX_ELEMENTS,
+            compact=DOM_SNAPSHOT_MODE == "compact"
+        )
+    
+    async def _save_screenshot(self, name: str) -> Optional[str]:
+        """Save a screenshot of the current page and wait until it is on disk.
+        
+        Explicit screenshots are always captured and written, whatever the
+        capture policy and deduplication settings.
         
         Args:
-            name: Name of the screenshot file
+            name: Name of the screenshot file (without extension)
             
         Returns:
-            Path to the saved screenshot
+            Path to the saved screenshot, or None if it could not be written
         """
         if not self.page:
             raise RuntimeError("Browser is not started. Call start() first.")
             
-        filename = f"{name}.png"
-        path = self.screenshot_dir / filename
+        return await self.screenshots.capture(self.page, name, kind=EXPLICIT, wait=True)
+    
+    async def _capture_screenshot(self, name: str, kind: str) -> None:
+        """Capture a screenshot without waiting for it to be written.
         
-        await self.page.screenshot(path=str(path))
-        logger.debug(f"Saved screenshot to {path}")
+        Args:
+            name: Name of the screenshot file (without extension)
+            kind: Screenshot kind, which decides whether the capture policy keeps it
+        """
+        if not self.page:
+            raise RuntimeError("Browser is not started. Call start() first.")
         
-        return str(path)
+        try:
+            await self.screenshots.capture(self.page, name, kind=kind)
+        except Exception as e:
+            logger.warning(f"Failed to capture screenshot {name}: {e}")
     
     def _build_task_prompt(self, task: str, page_content: str, context: Optional[str]) -> str:
         """Build prompt for the LLM to generate browser actions.
         
         Args:
             task: The task to execute
-            page_content: HTML content of the current page
+            page_content: Snapshot of the current page (element list or HTML)
             context: Additional context about the application
             
         Returns:
-            Formatted prompt string
-        """
-        prompt = f"""
-        You are an AI assistant helping with browser automation. Your task is to:
-        
-        {task}
-        
-        Based on the current page content, determine what browser actions should be taken to accomplish this task.
-        Focus on identifying the right elements and interactions.
-        
-        Current page content:
-        {page_content[:10000]}  # Truncated to avoid token limits
-        """
-        
-        if context:
-            prompt += f"\n\nAdditional context:\n{context}"
-            
-        prompt += """
-        Return your response as a JSON object with an "actions" key containing an array of actions. Each action should have:
-        1. A "type" (click, input, wait, navigate, etc.)
-        2. Necessary parameters for that action type
-        3. A "description" explaining why this action is needed
-        
-        Example:
-        {
-          "actions": [
-            {
-              "type": "click",
-              "selector": "button.sign-up",
-              "description": "Click the Sign Up button to begin registration"
-            },
-            {
-              "type": "input",
-              "selector": "input[name='email']",
-              "value": "test@example.com",
-              "description": "Enter email address in the email field"
-            }
-          ]
-        }
+            User message to send after the static ACTIONS_SYSTEM_PROMPT
         """
-        
-        return prompt
+        return task_prompt(task, page_content, context)
     
-    async def _get_llm_actions(self, prompt: str) -> List[Dict[str, Any]]:
+    async def _get_llm_actions(self,
+                               prompt: str,
+                               on_action: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                               history: Optional[List[Dict[str, str]]] = None,
+                               model: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
         """Get actions from LLM based on prompt.
         
+        With on_action, the completion is streamed and each action is handed
+        over as soon as it is complete, while the rest is still being generated.
+        
         Args:
             prompt: Prompt for the LLM
+            on_action: Called with each action as it completes
+            history: Earlier turns of the conversation, sent before the prompt
+            model: Model to ask instead of the browser's default
             
         Returns:
-            List of action dictionaries
+            List of action dictionaries (empty if there is nothing to do), or None
+            if the response was missing or couldn't be parsed
         """
+        request = {
+            "model": model or self.model,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": ACTIONS_SYSTEM_PROMPT},
+                *(history or []),
+                {"role": "user", "content": prompt}
+            ]
+        }
+        
+        if on_action is not None:
+            return await self._stream_llm_actions(request, on_action)
+        
         try:
-            response = await self.client.chat.completions.create(
+            response = await self.llm.chat("actions", **request)
+            
+            result = response.choices[0].message.content
+            logger.debug(f"LLM response: {result}")
+            
+            return parse_actions(result or "")
+            
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to get LLM actions: {e}")
+            return None
+    
+    async def _stream_llm_actions(self,
+                                  request: Dict[str, Any],
+                                  on_action: Callable[[Dict[str, Any]], Awaitable[None]]) -> Optional[List[Dict[str, Any]]]:
+        """Stream an actions completion, handing over each action as soon as it is complete.
+        
+        Args:
+            request: Chat completion request
+            on_action: Called with each action as it completes
+            
+        Returns:
+            List of action dictionaries, the leading ones already handed to on_action;
+            None if the response failed or was unusable before any action was handed over
+        """
+        parser = ActionStreamParser()
+        try:
+            async for delta in self.llm.stream("actions", **request):
+                for action in parser.feed(delta):
+                    await on_action(action)
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            # Actions already on the page can't be taken back; let the step retry from the new state
+            if parser.actions:
+                raise
+            logger.error(f"Failed to get LLM actions: {e}")
+            return None
+        
+        logger.debug(f"LLM response: {parser.text}")
+        actions = parser.final_actions()
+        if actions is None:
+            return None
+        
+        # Whatever already ran stays first; the caller executes anything the stream missed
+        streamed = parser.actions
+        if actions[:len(streamed)] != streamed:
+            logger.warning("Streamed actions differ from the final response, keeping the streamed ones")
+            actions = streamed + [action for action in actions if action not in streamed]
+        return actions
+    
+    async def _get_llm_flow(self, prompt: str) -> List[Dict[str, Any]]:
+        """Get a multi-screen flow plan from the LLM.
+        
+        Args:
+            prompt: User message from flow_prompt()
+            
+        Returns:
+            List of planned screen dictionaries (empty if the response was unusable)
+        """
+        try:
+            response = await self.llm.chat(
+                "flow",
                 model=self.model,
                 response_format={"type": "json_object"},
                 messages=[
-                    {"role": "system", "content": "You are a browser automation expert that helps users interact with web applications."},
+                    {"role": "system", "content": FLOW_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ]
             )
             
             result = response.choices[0].message.content
-            logger.debug(f"LLM response: {result}")
+            logger.debug(f"LLM flow plan: {result}")
             
-            parsed = json.loads(result)
-            actions = parsed.get("actions", [])
-                
-            return actions
+            return json.loads(result).get("screens", [])
             
+        except LLMUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to get LLM actions: {e}")
+            logger.error(f"Failed to get LLM flow plan: {e}")
             return []
     
-    async def _execute_actions(self, actions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def _execute_actions(self,
+                               actions: List[Dict[str, Any]],
+                               start: int = 0,
+                               total: Optional[int] = None) -> List[Dict[str, Any]]:
         """Execute a list of browser actions.
         
+        Runs of two or more fills with CSS selectors are filled in a single
+        page.evaluate() round trip; everything else goes through the action
+        registry one action at a time.
+        
         Args:
             actions: List of action dictionaries from LLM
+            start: Position of the first action in its plan (0-based)
+            total: Number of actions in the plan, if different from len(actions)
             
         Returns:
             List of result dictionaries (one per action)
@@ -321,96 +925,104 @@ class LLMBrowser:
             raise RuntimeError("Browser is not started. Call start() first.")
             
         results = []
+        total = total or start + len(actions)
         
-        for i, action in enumerate(actions):
-            action_type = action.get("type", "").lower()
-            logger.info(f"Executing action {i+1}/{len(actions)}: {action_type} - {action.get('description', '')}")
-            
-            result = {
-                "action": action,
-                "success": False,
-                "error": None
-            }
-            
-            try:
-                if action_type == "click":
-                    await self.page.click(action["selector"])
-                    result["success"] = True
-                
-                elif action_type == "input" or action_type == "fill":
-                    await self.page.fill(action["selector"], action["value"])
-                    result["success"] = True
-                
-                elif action_type == "type":
-                    await self.page.type(action["selector"], action["value"])
-                    result["success"] = True
-                
-                elif action_type == "wait":
-                    if "selector" in action:
-                        await self.page.wait_for_selector(action["selector"], timeout=action.get("timeout", self.default_timeout))
-                        result["success"] = True
-                    elif "time" in action:
-                        await asyncio.sleep(action["time"] / 1000)  # Convert ms to seconds
-                        result["success"] = True
-                    elif "navigation" in action and action["navigation"]:
-                        await self.page.wait_for_navigation(timeout=action.get("timeout", self.navigation_timeout))
-                        result["success"] = True
-                    elif "load_state" in action:
-                        await self.page.wait_for_load_state(action["load_state"], timeout=action.get("timeout", self.navigation_timeout))
-                        result["success"] = True
-                    else:
-                        # Default to a short wait if no specific wait type is provided
-                        await asyncio.sleep(1)
-                        result["success"] = True
-                
-                elif action_type == "navigate":
-                    await self.page.goto(action["url"])
-                    result["success"] = True
-                
-                elif action_type == "select":
-                    if "value" in action:
-                        await self.page.select_option(action["selector"], value=action["value"])
-                    elif "label" in action:
-                        await self.page.select_option(action["selector"], label=action["label"])
-                    elif "index" in action:
-                        await self.page.select_option(action["selector"], index=action["index"])
-                    result["success"] = True
-                
-                elif action_type == "check":
-                    await self.page.check(action["selector"])
-                    result["success"] = True
-                
-                elif action_type == "uncheck":
-                    await self.page.uncheck(action["selector"])
-                    result["success"] = True
-                
-                elif action_type == "press":
-                    await self.page.press(action["selector"], action["key"])
-                    result["success"] = True
-                
-                elif action_type == "screenshot":
-                    await self._save_screenshot(action.get("name", f"custom_screenshot_{i}"))
-                    result["success"] = True
-                
-                else:
-                    result["error"] = f"Unknown action type: {action_type}"
-                
-                # Take a screenshot after each action for debugging
-                await self._save_screenshot(f"action_{i}_{action_type}")
-                
-            except Exception as e:
-                error_msg = str(e)
-                logger.error(f"Failed to execute action {i+1}: {error_msg}")
-                result["error"] = error_msg
-                
-                # Take a screenshot of the error state
-                await self._save_screenshot(f"action_{i}_{action_type}_error")
-            
-            results.append(result)
+        i = 0
+        while i < len(actions):
+            batch = fill_batch_length(actions, i)
+            if batch:
+                results.extend(await self._execute_fill_batch(actions[i:i + batch], start + i, total, i + batch == len(actions)))
+                i += batch
+            else:
+                results.append(await self._execute_action(actions[i], start + i, total))
+                i += 1
             
             # If any action fails and it's not the last one, decide whether to continue
-            if not result["success"] and i < len(actions) - 1:
+            if not results[-1]["success"] and i < len(actions):
                 # For now, we'll continue despite errors, but log it
-                logger.warning(f"Continuing with next action despite error in action {i+1}")
+                logger.warning(f"Continuing with next action despite error in action {start + i}")
+        
+        return results
+    
+    async def _execute_fill_batch(self,
+                                  actions: List[Dict[str, Any]],
+                                  first: int,
+                                  total: int,
+                                  last: bool) -> List[Dict[str, Any]]:
+        """Fill several fields in one page.evaluate() round trip.
+        
+        Fields the in-page fill can't handle (missing, hidden or not a text field)
+        and every field after them are filled through Playwright instead, which
+        waits for them to become actionable.
+        
+        Args:
+            actions: Consecutive fill actions with CSS selectors
+            first: Position of the first action in its plan (0-based)
+            total: Number of actions in the plan
+            last: Whether these are the plan's last actions; otherwise the next
+                action's screenshot shows the filled fields
+            
+        Returns:
+            Result dictionaries, one per action
+        """
+        logger.info(f"Executing actions {first+1}-{first+len(actions)}/{total}: fill {len(actions)} fields in one round trip")
+        fields = [{"selector": action["selector"], "value": str(action["value"])} for action in actions]
+        try:
+            outcome = await self.page.evaluate(FILL_FIELDS_JS, fields)
+        except Exception as e:
+            outcome = {"filled": 0, "error": str(e)}
+        
+        filled = outcome["filled"]
+        results = [{"action": action, "success": True, "error": None, "batched": True} for action in actions[:filled]]
+        if outcome["error"]:
+            logger.debug(f"Batched fill stopped after {filled} fields ({outcome['error']}), filling the rest one by one")
+        
+        for offset, action in enumerate(actions[filled:], filled):
+            results.append(await self._execute_action(action, first + offset, total))
+        
+        if last and filled == len(actions):
+            await self._capture_screenshot(f"action_{first}_fill_batch", ACTION)
+        return results
+    
+    async def _execute_action(self, action: Dict[str, Any], i: int, total: Optional[int] = None) -> Dict[str, Any]:
+        """Execute a single browser action through the action registry.
+        
+        Args:
+            action: Action dictionary from the LLM
+            i: Position of the action in its plan (0-based)
+            total: Number of actions in the plan, if known (unknown while streaming)
+            
+        Returns:
+            Result dictionary for the action
+        """
+        action_type = action.get("type", "").lower()
+        position = f"{i+1}/{total}" if total else f"{i+1}"
+        logger.info(f"Executing action {position}: {action_type} - {action.get('description', '')}")
+        
+        result = {
+            "action": action,
+            "success": False,
+            "error": None
+        }
+        
+        registered = get_action_type(action_type)
+        try:
+            if registered:
+                await registered.handler(self, action, i)
+                result["success"] = True
+            else:
+                result["error"] = f"Unknown action type: {action_type}"
+            
+            # Take a screenshot after actions that change the page (subject to the capture policy)
+            if registered is None or registered.capture:
+                await self._capture_screenshot(f"action_{i}_{action_type}", ACTION)
+            
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"Failed to execute action {i+1}: {error_msg}")
+            result["error"] = error_msg
+            
+            # Take a screenshot of the error state
+            await self._capture_screenshot(f"action_{i}_{action_type}_error", ERROR)
         
-        return results
\ No newline at end of file
+        return result
\ No newline at end of file
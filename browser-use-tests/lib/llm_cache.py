@@ -0,0 +1,197 @@
+"""On-disk cache for LLM completions used by the browser harness."""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+from config.config import LLM_CACHE_DIR, LLM_CACHE_ENABLED, LLM_CACHE_MAX_AGE_HOURS, LLM_CACHE_MAX_ENTRIES
+
+
+# Parts of the HTML that change between runs without changing what is on screen
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style)\b[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL)
+_VOLATILE_ATTR_RE = re.compile(r"\s(?:style|class|id|nonce)=(\"[^\"]*\"|'[^']*')", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Entry files are named after their make_key() digest; other files in the directory aren't entries
+_ENTRY_NAME_RE = re.compile(r"^[0-9a-f]{64}\.json$")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Normalize free text so formatting differences don't change cache keys.
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        Lowercased text with collapsed whitespace
+    """
+    if not text:
+        return ""
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def page_fingerprint(html: str) -> str:
+    """Compute a structural hash of a page.
+
+    Scripts, styles, inline style attributes and generated class names are
+    dropped before hashing, so two renders of the same screen hash the same.
+
+    Args:
+        html: HTML content of the page
+
+    Returns:
+        Hex digest identifying the page structure
+    """
+    stripped = _SCRIPT_STYLE_RE.sub("", html)
+    stripped = _VOLATILE_ATTR_RE.sub("", stripped)
+    stripped = _WHITESPACE_RE.sub(" ", stripped)
+    return hashlib.sha256(stripped.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Persistent cache of LLM results with size and age based eviction."""
+
+    def __init__(self,
+                 cache_dir: str = LLM_CACHE_DIR,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 max_age_hours: float = LLM_CACHE_MAX_AGE_HOURS,
+                 enabled: bool = LLM_CACHE_ENABLED):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory where cache entries are stored
+            max_entries: Maximum number of entries kept on disk
+            max_age_hours: Entries older than this are discarded
+            enabled: Whether the cache is used at all
+        """
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_age = max_age_hours * 3600
+        self.cache_dir = Path(cache_dir)
+
+        if self.enabled:
+            self.cache_dir.mkdir(exist_ok=True, parents=True)
+
+    @staticmethod
+    def make_key(kind: str, model: str, *parts: Optional[str], prompt: str) -> str:
+        """Build a cache key from the request kind, model, system prompt and key parts.
+
+        Args:
+            kind: Kind of request (e.g. "actions", "verify")
+            model: Model that produced the result
+            parts: Task, context, page fingerprint, etc.
+            prompt: System prompt of the request, so editing a prompt retires the results cached with it
+
+        Returns:
+            Hex digest usable as a cache key
+        """
+        prompt_digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        material = "\x1f".join([kind, model, prompt_digest] + [normalize_text(part) for part in parts])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a cached value.
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self.invalidate(key)
+            return None
+
+        if time.time() - entry.get("created", 0) > self.max_age:
+            self.invalidate(key)
+            return None
+
+        # Touch the entry so eviction drops the least recently used first
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        logger.debug(f"LLM cache hit: {key[:12]}")
+        return entry.get("value")
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value in the cache.
+
+        Args:
+            key: Cache key from make_key()
+            value: JSON-serializable value to store
+        """
+        if not self.enabled:
+            return
+
+        # Workers share the cache directory, so each write goes through its own temporary file
+        path = self._path(key)
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                json.dump({"created": time.time(), "value": value}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write cache entry {path}: {e}")
+            if tmp_path:
+                Path(tmp_path).unlink(missing_ok=True)
+            return
+
+        self._evict()
+
+    def invalidate(self, key: str) -> None:
+        """Remove an entry, e.g. when its cached result no longer works.
+
+        Args:
+            key: Cache key from make_key()
+        """
+        try:
+            self._path(key).unlink()
+            logger.debug(f"LLM cache entry invalidated: {key[:12]}")
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        now = time.time()
+        entries = []
+
+        for path in self.cache_dir.glob("*.json"):
+            if not _ENTRY_NAME_RE.match(path.name):
+                continue
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+
+            if now - mtime > self.max_age:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((mtime, path))
+
+        excess = len(entries) - self.max_entries
+        if excess > 0:
+            entries.sort()
+            for _, path in entries[:excess]:
+                path.unlink(missing_ok=True)
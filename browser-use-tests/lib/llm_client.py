@@ -0,0 +1,282 @@
+"""Process-wide pooled LLM client with concurrency limiting."""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+import openai
+from loguru import logger
+from openai import AsyncOpenAI
+
+from config.config import (LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES, LLM_MODEL_CONCURRENCY, LLM_REQUEST_TIMEOUT,
+                           LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY, OPENAI_API_KEY, OPENAI_BASE_URL)
+from lib.llm_metrics import llm_metrics
+
+
+class LLMUnavailableError(Exception):
+    """The model could not be reached after retrying (timeouts, connection errors, 5xx responses)."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMThrottledError(LLMUnavailableError):
+    """The model kept rate-limiting requests (HTTP 429) after retrying."""
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read how long the server asked us to wait from an API error.
+
+    Args:
+        error: Error raised by the OpenAI client
+
+    Returns:
+        Seconds to wait, or None if the response didn't say
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+
+    # retry-after is either a number of seconds or an HTTP date
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an API error is transient and worth retrying.
+
+    Args:
+        error: Error raised by the OpenAI client
+
+    Returns:
+        True for rate limits (other than exhausted quota), timeouts, connection errors and 5xx responses
+    """
+    if isinstance(error, openai.RateLimitError):
+        return getattr(error, "code", None) != "insufficient_quota"
+    if isinstance(error, openai.APIConnectionError):  # includes timeouts
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def parse_model_limits(spec: str) -> Dict[str, int]:
+    """Parse per-model concurrency limits.
+
+    Args:
+        spec: Comma-separated model=limit pairs, e.g. "gpt-4o=4,gpt-4o-mini=8"
+
+    Returns:
+        Mapping of model name to its concurrency limit
+    """
+    limits = {}
+    for pair in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, limit = pair.partition("=")
+        limits[model.strip()] = int(limit)
+    return limits
+
+
+class LLMClient:
+    """Shared chat completion client.
+
+    One AsyncOpenAI client, and with it one keep-alive connection pool, serves
+    every caller, so connections and TLS sessions are reused across tests. Requests wait for a slot in their
+    model's queue and then for a global slot, which caps the fan-out of
+    concurrent tests.
+
+    Throttled, timed out and failing requests are retried with exponential
+    backoff and full jitter, honoring retry-after headers; the request slot is
+    released while waiting. When retries run out, LLMThrottledError or
+    LLMUnavailableError tells the caller the model, not the app, is the problem.
+
+    The underlying client and semaphores are bound to an event loop, so
+    they are created lazily and recreated if the client is used from another loop.
+    """
+
+    def __init__(self,
+                 api_key: str = OPENAI_API_KEY,
+                 base_url: str = OPENAI_BASE_URL,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 model_concurrency: Optional[Dict[str, int]] = None,
+                 timeout: float = LLM_REQUEST_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES,
+                 retry_base_delay: float = LLM_RETRY_BASE_DELAY,
+                 retry_max_delay: float = LLM_RETRY_MAX_DELAY):
+        """Initialize the client.
+
+        Args:
+            api_key: OpenAI API key
+            base_url: OpenAI-compatible endpoint (empty for the public API)
+            max_concurrency: Maximum requests in flight across all models
+            model_concurrency: Maximum requests in flight per model (defaults to LLM_MODEL_CONCURRENCY)
+            timeout: Request timeout in seconds
+            max_retries: Retries of a throttled, timed out or failing request
+            retry_base_delay: Backoff before the first retry, in seconds (doubles per retry)
+            retry_max_delay: Upper bound on the backoff, in seconds
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency if model_concurrency is not None else parse_model_limits(LLM_MODEL_CONCURRENCY)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[AsyncOpenAI] = None
+        self._global_slots: Optional[asyncio.Semaphore] = None
+        self._model_slots: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """AsyncOpenAI client bound to the running event loop."""
+        self._bind()
+        return self._client
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # Retries are handled here, where they can release the request slot while waiting
+            self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url or None, timeout=self.timeout, max_retries=0)
+            self._global_slots = asyncio.Semaphore(self.max_concurrency)
+            self._model_slots = {}
+            self._loop = loop
+
+    @asynccontextmanager
+    async def slot(self, model: str) -> AsyncIterator[None]:
+        """Wait for a free request slot for the model.
+
+        Args:
+            model: Model the request is for
+        """
+        self._bind()
+        if model not in self._model_slots:
+            self._model_slots[model] = asyncio.Semaphore(self.model_concurrency.get(model, self.max_concurrency))
+
+        started = time.perf_counter()
+        async with self._model_slots[model], self._global_slots:
+            waited = time.perf_counter() - started
+            if waited > 0.5:
+                logger.debug(f"Waited {waited:.1f}s for an LLM request slot ({model})")
+            yield
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before the next retry.
+
+        Args:
+            attempt: Number of the attempt that just failed (0 for the first)
+            retry_after: Delay the server asked for, if any
+
+        Returns:
+            Seconds to wait
+        """
+        if retry_after is not None:
+            return min(retry_after, self.retry_max_delay * 2)
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    async def chat(self, kind: str, **kwargs) -> Any:
+        """Make an instrumented chat completion request through the shared pool.
+
+        Args:
+            kind: What the call is for (e.g. "actions", "verify", "vision_analysis")
+            kwargs: Arguments for chat.completions.create()
+
+        Returns:
+            The completion response
+
+        Raises:
+            LLMThrottledError: The model was still rate-limiting after all retries
+            LLMUnavailableError: The model was still timing out or failing after all retries
+        """
+        model = kwargs.get("model", "")
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.slot(model):
+                    return await llm_metrics.completion(self.client, kind, **kwargs)
+            except Exception as e:
+                await self._wait_to_retry(e, attempt, kind, model)
+
+    async def stream(self, kind: str, **kwargs) -> AsyncIterator[str]:
+        """Make an instrumented streaming chat completion request through the shared pool.
+
+        Failures before the first token are retried like chat(); once content
+        has been yielded, errors are raised as they are.
+
+        Args:
+            kind: What the call is for
+            kwargs: Arguments for chat.completions.create(), without stream
+
+        Yields:
+            Pieces of the response content as they arrive
+
+        Raises:
+            LLMThrottledError: The model was still rate-limiting after all retries
+            LLMUnavailableError: The model was still timing out or failing after all retries
+        """
+        model = kwargs.get("model", "")
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                async with self.slot(model):
+                    async for delta in llm_metrics.stream(self.client, kind, **kwargs):
+                        started = True
+                        yield delta
+                return
+            except Exception as e:
+                if started:
+                    raise
+                await self._wait_to_retry(e, attempt, kind, model)
+
+    async def _wait_to_retry(self, error: Exception, attempt: int, kind: str, model: str) -> None:
+        """Back off before retrying a failed request, or raise if it shouldn't be retried."""
+        if not is_retryable(error):
+            raise error
+
+        retry_after = retry_after_seconds(error)
+        if attempt == self.max_retries:
+            error_type = LLMThrottledError if isinstance(error, openai.RateLimitError) else LLMUnavailableError
+            raise error_type(f"{model} {kind} request failed after {attempt + 1} attempts: {error}", retry_after) from error
+
+        delay = self.backoff(attempt, retry_after)
+        logger.warning(f"{model} {kind} request failed ({type(error).__name__}), retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._loop = None
+
+
+_shared_client: Optional[LLMClient] = None
+
+
+def shared_llm_client() -> LLMClient:
+    """Get the process-wide LLM client configured from the environment.
+
+    Returns:
+        The shared client
+    """
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = LLMClient()
+    return _shared_client
@@ -0,0 +1,311 @@
+"""Per-call latency and token instrumentation for LLM requests made by the harness."""
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from config.config import LLM_RECORD_TRANSCRIPTS
+from lib.transcripts import TranscriptStore
+
+
+# Step currently being executed, set by BaseLLMTest.execute_step
+current_step: ContextVar[Optional[str]] = ContextVar("current_step", default=None)
+
+
+@dataclass
+class LLMCallRecord:
+    """A single LLM call (or a cache hit that replaced one)."""
+    kind: str
+    model: str
+    cache_status: str
+    latency_s: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    test: Optional[str] = None
+    step: Optional[str] = None
+    error: Optional[str] = None
+    timestamp: float = 0.0
+    first_token_s: Optional[float] = None
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _aggregate(records: List[LLMCallRecord]) -> Dict[str, Any]:
+    latencies = [r.latency_s for r in records if r.cache_status != "hit"]
+    first_tokens = [r.first_token_s for r in records if r.first_token_s is not None]
+    prompt_tokens = sum(r.prompt_tokens for r in records)
+    cached_tokens = sum(r.cached_tokens for r in records)
+    return {
+        "calls": len(records),
+        "cache_hits": sum(1 for r in records if r.cache_status == "hit"),
+        "errors": sum(1 for r in records if r.error),
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "cached_token_ratio": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+        "completion_tokens": sum(r.completion_tokens for r in records),
+        "latency_s_total": round(sum(latencies), 3),
+        "latency_s_p50": round(_percentile(latencies, 0.5), 3),
+        "latency_s_p95": round(_percentile(latencies, 0.95), 3),
+        "first_token_s_p50": round(_percentile(first_tokens, 0.5), 3)
+    }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class LLMMetrics:
+    """Collects one record per LLM call and exports session reports."""
+
+    def __init__(self, transcripts: Optional[TranscriptStore] = None):
+        """Initialize the collector.
+
+        Args:
+            transcripts: Store to record every request/response pair in, for offline replay
+        """
+        self.records: List[LLMCallRecord] = []
+        self.transcripts = transcripts
+
+        # Test currently running, set from a pytest hook in conftest.py
+        self.current_test: Optional[str] = None
+
+    def record(self,
+               kind: str,
+               model: str,
+               latency_s: float,
+               usage: Any = None,
+               cache_status: str = "miss",
+               error: Optional[str] = None,
+               first_token_s: Optional[float] = None) -> LLMCallRecord:
+        """Record an LLM call.
+
+        Args:
+            kind: What the call was for (e.g. "actions", "verify", "vision_analysis")
+            model: Model that was called
+            latency_s: Wall-clock latency in seconds
+            usage: Usage object from the response, if any; prompt tokens served
+                from the provider's prefix cache are read from its prompt_tokens_details
+            cache_status: "miss" for a real call, "hit" when a cache answered instead
+            error: Error message if the call failed
+            first_token_s: Time until the first streamed token, for streamed calls
+
+        Returns:
+            The stored record
+        """
+        record = LLMCallRecord(
+            kind=kind,
+            model=model,
+            cache_status=cache_status,
+            latency_s=latency_s,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cached_tokens=getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0,
+            test=self.current_test,
+            step=current_step.get(),
+            error=error,
+            timestamp=time.time(),
+            first_token_s=first_token_s
+        )
+        self.records.append(record)
+        return record
+
+    def record_cache_hit(self, kind: str, model: str) -> LLMCallRecord:
+        """Record a request that was answered from a cache instead of the LLM.
+
+        Args:
+            kind: What the call would have been for
+            model: Model that would have been called
+
+        Returns:
+            The stored record
+        """
+        return self.record(kind, model, 0.0, cache_status="hit")
+
+    @contextmanager
+    def track(self, kind: str, model: str) -> Iterator[Dict[str, Any]]:
+        """Time an LLM call made inside the block.
+
+        Put the response in the yielded dict under "response" so its token
+        usage is recorded. Exceptions are recorded and re-raised.
+
+        Args:
+            kind: What the call is for
+            model: Model being called
+
+        Yields:
+            Dictionary to place the response in
+        """
+        holder: Dict[str, Any] = {}
+        started = time.perf_counter()
+        try:
+            yield holder
+        except Exception as e:
+            self.record(kind, model, time.perf_counter() - started, error=str(e))
+            raise
+
+        response = holder.get("response")
+        self.record(kind, model, time.perf_counter() - started, usage=getattr(response, "usage", None))
+
+    async def completion(self, client: Any, kind: str, **kwargs) -> Any:
+        """Make an instrumented chat completion request.
+
+        Args:
+            client: AsyncOpenAI client
+            kind: What the call is for
+            kwargs: Arguments for chat.completions.create()
+
+        Returns:
+            The completion response
+        """
+        started = time.perf_counter()
+        with self.track(kind, kwargs.get("model", "")) as call:
+            call["response"] = await client.chat.completions.create(**kwargs)
+
+        if self.transcripts is not None:
+            self.transcripts.save(kwargs, call["response"].model_dump(mode="json"), time.perf_counter() - started)
+        return call["response"]
+
+    async def stream(self, client: Any, kind: str, **kwargs) -> AsyncIterator[str]:
+        """Make an instrumented streaming chat completion request.
+
+        The call is recorded once the stream ends, with its time to first
+        token. Recorded transcripts hold the assembled, non-streamed response.
+
+        Args:
+            client: AsyncOpenAI client
+            kind: What the call is for
+            kwargs: Arguments for chat.completions.create(), without stream
+
+        Yields:
+            Pieces of the response content as they arrive
+        """
+        model = kwargs.get("model", "")
+        started = time.perf_counter()
+        first_token_s = None
+        content: List[str] = []
+        usage = None
+        last_chunk = None
+        finish_reason = None
+
+        try:
+            stream = await client.chat.completions.create(**kwargs, stream=True, stream_options={"include_usage": True})
+            async for chunk in stream:
+                last_chunk = chunk
+                usage = chunk.usage or usage
+                if not chunk.choices:
+                    continue
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token_s is None:
+                        first_token_s = time.perf_counter() - started
+                    content.append(delta)
+                    yield delta
+        except BaseException as e:
+            # Includes the consumer abandoning the stream
+            self.record(kind, model, time.perf_counter() - started, error=str(e) or type(e).__name__, first_token_s=first_token_s)
+            raise
+
+        latency_s = time.perf_counter() - started
+        self.record(kind, model, latency_s, usage=usage, first_token_s=first_token_s)
+
+        if self.transcripts is not None and last_chunk is not None:
+            self.transcripts.save(kwargs, {
+                "id": last_chunk.id,
+                "object": "chat.completion",
+                "created": last_chunk.created,
+                "model": last_chunk.model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(content)},
+                    "finish_reason": finish_reason or "stop"
+                }],
+                "usage": usage.model_dump(mode="json") if usage is not None else None
+            }, latency_s)
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the recorded calls overall and by kind, model, test and step.
+
+        Returns:
+            JSON-serializable summary
+        """
+        def grouped(key) -> Dict[str, Any]:
+            groups: Dict[str, List[LLMCallRecord]] = {}
+            for record in self.records:
+                groups.setdefault(key(record) or "-", []).append(record)
+            return {name: _aggregate(records) for name, records in groups.items()}
+
+        by_step = grouped(lambda r: f"{r.test or '-'} :: {r.step or '-'}")
+        slowest = sorted(by_step.items(), key=lambda item: item[1]["latency_s_total"], reverse=True)
+
+        return {
+            "total": _aggregate(self.records),
+            "by_kind": grouped(lambda r: r.kind),
+            "by_model": grouped(lambda r: r.model),
+            "by_test": grouped(lambda r: r.test),
+            "by_step": by_step,
+            "slowest_steps": dict(slowest[:20]),
+            "calls": [asdict(record) for record in self.records]
+        }
+
+    def write_json(self, path: Path) -> None:
+        """Write the session summary as JSON.
+
+        Args:
+            path: File to write
+        """
+        path.parent.mkdir(exist_ok=True, parents=True)
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        logger.info(f"Wrote LLM metrics summary to {path}")
+
+    def write_prometheus(self, path: Path, extra_labels: Optional[Dict[str, str]] = None) -> None:
+        """Write the session totals in Prometheus textfile-collector format.
+
+        Args:
+            path: File to write (conventionally ending in .prom)
+            extra_labels: Labels added to every series (e.g. the parallel worker id)
+        """
+        extra = "".join(f',{name}="{_label(value)}"' for name, value in (extra_labels or {}).items())
+        series: Dict[tuple, List[LLMCallRecord]] = {}
+        for record in self.records:
+            series.setdefault((record.kind, record.model, record.cache_status), []).append(record)
+
+        metrics = [
+            ("llm_calls_total", "counter", "LLM calls made by the test harness", lambda rs: len(rs)),
+            ("llm_call_errors_total", "counter", "LLM calls that raised an error", lambda rs: sum(1 for r in rs if r.error)),
+            ("llm_prompt_tokens_total", "counter", "Prompt tokens sent", lambda rs: sum(r.prompt_tokens for r in rs)),
+            ("llm_cached_prompt_tokens_total", "counter", "Prompt tokens served from the provider's prefix cache", lambda rs: sum(r.cached_tokens for r in rs)),
+            ("llm_completion_tokens_total", "counter", "Completion tokens received", lambda rs: sum(r.completion_tokens for r in rs)),
+            ("llm_latency_seconds_total", "counter", "Total LLM call latency in seconds", lambda rs: round(sum(r.latency_s for r in rs), 6)),
+        ]
+
+        lines = []
+        for name, metric_type, help_text, value in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for (kind, model, cache_status), records in sorted(series.items()):
+                labels = f'kind="{_label(kind)}",model="{_label(model)}",cache="{_label(cache_status)}"{extra}'
+                lines.append(f"{name}{{{labels}}} {value(records)}")
+
+        path.parent.mkdir(exist_ok=True, parents=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        tmp_path.replace(path)
+        logger.info(f"Wrote LLM metrics textfile to {path}")
+
+
+# Process-wide collector shared by the harness and the tests
+llm_metrics = LLMMetrics(TranscriptStore() if LLM_RECORD_TRANSCRIPTS else None)
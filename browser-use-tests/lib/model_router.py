@@ -0,0 +1,170 @@
+"""Tiered model routing: cheap models first, stronger ones when a step fails."""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from config.config import (LLM_MODEL_TIERS, MODEL_ROUTER_MIN_SAMPLES, MODEL_ROUTER_MIN_SUCCESS_RATE, MODEL_ROUTING_DIR,
+                           MODEL_ROUTING_ENABLED, WORKER_ID)
+from lib.llm_cache import normalize_text
+
+
+class ModelRouter:
+    """Picks the model tier for each attempt at a step and learns from the outcomes.
+
+    Tiers are ordered from the cheapest to the strongest model. A step starts on
+    the cheapest tier that has been succeeding for it and moves one tier up on
+    every retry. Outcomes are counted per step and per tier, so a step that the
+    cheap tier keeps failing starts on the stronger tier in later runs.
+
+    Each parallel worker writes only its own statistics file in stats_dir and
+    routing sums all of them, so workers never overwrite each other's counts.
+    """
+
+    def __init__(self,
+                 tiers: Optional[List[str]] = None,
+                 stats_dir: str = MODEL_ROUTING_DIR,
+                 min_samples: int = MODEL_ROUTER_MIN_SAMPLES,
+                 min_success_rate: float = MODEL_ROUTER_MIN_SUCCESS_RATE,
+                 enabled: bool = MODEL_ROUTING_ENABLED):
+        """Initialize the router.
+
+        Args:
+            tiers: Models from the cheapest to the strongest
+            stats_dir: Directory holding the per-worker statistics files
+            min_samples: Attempts on a tier before its success rate is trusted
+            min_success_rate: Success rate below which a step skips the tier
+            enabled: Whether steps are routed at all
+        """
+        self.tiers = list(tiers if tiers is not None else LLM_MODEL_TIERS)
+        self.stats_dir = Path(stats_dir)
+        self.path = self.stats_dir / f"{WORKER_ID or 'main'}.json"
+        self.min_samples = min_samples
+        self.min_success_rate = min_success_rate
+        self.enabled = enabled and bool(self.tiers)
+
+    @staticmethod
+    def task_key(description: str, context: Optional[str] = None) -> str:
+        """Build the statistics key of a step.
+
+        Args:
+            description: Step description
+            context: Step context
+
+        Returns:
+            Hex digest identifying the step
+        """
+        material = f"{normalize_text(description)}\x1f{normalize_text(context)}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, Any]:
+        if not path.exists():
+            return {"tasks": {}, "tiers": {}}
+
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable model routing stats {path}: {e}")
+            return {"tasks": {}, "tiers": {}}
+
+    def _load(self) -> Dict[str, Any]:
+        """Sum the statistics of every worker."""
+        merged: Dict[str, Any] = {"tasks": {}, "tiers": {}}
+        for path in sorted(self.stats_dir.glob("*.json")):
+            stats = self._read(path)
+            for task_key, task in stats.get("tasks", {}).items():
+                target = merged["tasks"].setdefault(task_key, {"description": task.get("description", ""), "models": {}})
+                self._add(target["models"], task.get("models", {}))
+            self._add(merged["tiers"], stats.get("tiers", {}))
+        return merged
+
+    @staticmethod
+    def _add(target: Dict[str, Dict[str, int]], counts: Dict[str, Dict[str, int]]) -> None:
+        for model, model_counts in counts.items():
+            total = target.setdefault(model, {"attempts": 0, "successes": 0})
+            total["attempts"] += model_counts.get("attempts", 0)
+            total["successes"] += model_counts.get("successes", 0)
+
+    def _save(self, stats: Dict[str, Any]) -> None:
+        self.stats_dir.mkdir(exist_ok=True, parents=True)
+        tmp_path = self.path.with_suffix(".tmp")
+
+        with open(tmp_path, "w") as f:
+            json.dump(stats, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _trusted(self, counts: Optional[Dict[str, int]]) -> bool:
+        """Whether a tier has been succeeding often enough to try it first."""
+        if not counts or counts["attempts"] < self.min_samples:
+            return True
+        return counts["successes"] / counts["attempts"] >= self.min_success_rate
+
+    def start_tier(self, task_key: str) -> int:
+        """Find the cheapest tier worth trying first for a step.
+
+        Args:
+            task_key: Key from task_key()
+
+        Returns:
+            Index of the tier in tiers
+        """
+        counts = self._load()["tasks"].get(task_key, {}).get("models", {})
+        for index, model in enumerate(self.tiers[:-1]):
+            if self._trusted(counts.get(model)):
+                return index
+        return len(self.tiers) - 1
+
+    def escalation(self, task_key: str) -> List[Optional[str]]:
+        """List the models to try for a step, one per attempt.
+
+        Args:
+            task_key: Key from task_key()
+
+        Returns:
+            Models from the starting tier to the strongest; [None] (the browser's
+            default model) when routing is disabled
+        """
+        if not self.enabled:
+            return [None]
+        return self.tiers[self.start_tier(task_key):]
+
+    def is_strongest(self, model: Optional[str]) -> bool:
+        """Whether escalating past a model is impossible.
+
+        Args:
+            model: Model from escalation()
+
+        Returns:
+            True if routing is disabled or the model is the last tier
+        """
+        return not self.enabled or model == self.tiers[-1]
+
+    def record(self, task_key: str, description: str, model: Optional[str], success: bool) -> None:
+        """Count the outcome of an attempt at a step.
+
+        Args:
+            task_key: Key from task_key()
+            description: Step description, kept for readability of the statistics file
+            model: Model the attempt used
+            success: Whether the actions succeeded and the step verified
+        """
+        if not self.enabled or not model:
+            return
+
+        # Only this worker writes its file, so a plain read-modify-write can't lose counts
+        stats = self._read(self.path)
+        task = stats["tasks"].setdefault(task_key, {"description": description, "models": {}})
+        for counts in (task["models"].setdefault(model, {"attempts": 0, "successes": 0}),
+                       stats["tiers"].setdefault(model, {"attempts": 0, "successes": 0})):
+            counts["attempts"] += 1
+            counts["successes"] += int(success)
+        task["updated"] = time.time()
+
+        self._save(stats)
+        logger.debug(f"Model {model} {'succeeded' if success else 'failed'} on step: {description}")
@@ -0,0 +1,147 @@
+"""Compiled step plans that let stable steps replay without the LLM."""
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from config.config import COMPILED_PLAN_DIR, COMPILED_PLANS_ENABLED, COMPILED_PLAN_MAX_VARIANTS
+from lib.llm_cache import normalize_text
+
+
+class PlanStore:
+    """Stores the concrete actions that completed each test step.
+
+    Plans are grouped per test in one JSON file and keyed by the step
+    description and context. Each step keeps a few variants, one per screen
+    fingerprint it was recorded against, so a step whose description repeats
+    on different screens keeps a plan for each of them.
+    """
+
+    def __init__(self,
+                 plan_dir: str = COMPILED_PLAN_DIR,
+                 enabled: bool = COMPILED_PLANS_ENABLED,
+                 max_variants: int = COMPILED_PLAN_MAX_VARIANTS):
+        """Initialize the plan store.
+
+        Args:
+            plan_dir: Directory where plan files are stored
+            enabled: Whether compiled plans are used at all
+            max_variants: Maximum number of fingerprint variants kept per step
+        """
+        self.plan_dir = Path(plan_dir)
+        self.enabled = enabled
+        self.max_variants = max_variants
+
+    @staticmethod
+    def _step_key(description: str, context: Optional[str]) -> str:
+        return f"{normalize_text(description)}\x1f{normalize_text(context)}"
+
+    def _path(self, test_id: str) -> Path:
+        safe_name = re.sub(r"[^\w.-]+", "_", test_id)
+        return self.plan_dir / f"{safe_name}.json"
+
+    def _load(self, test_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        path = self._path(test_id)
+        if not path.exists():
+            return {}
+
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable plan file {path}: {e}")
+            return {}
+
+    def _save(self, test_id: str, plans: Dict[str, List[Dict[str, Any]]]) -> None:
+        self.plan_dir.mkdir(exist_ok=True, parents=True)
+        path = self._path(test_id)
+
+        # Workers share the plan directory, so each write goes through its own temporary file
+        with tempfile.NamedTemporaryFile("w", dir=self.plan_dir, suffix=".tmp", delete=False) as f:
+            json.dump(plans, f, indent=2)
+        os.replace(f.name, path)
+
+    def lookup(self, test_id: str, description: str, context: Optional[str], fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Find the compiled plan for a step on the current screen.
+
+        Args:
+            test_id: Identifier of the running test
+            description: Step description
+            context: Step context
+            fingerprint: Fingerprint of the current screen
+
+        Returns:
+            Plan dictionary with "actions" and "verify" keys, or None
+        """
+        if not self.enabled:
+            return None
+
+        variants = self._load(test_id).get(self._step_key(description, context), [])
+        for variant in variants:
+            if variant["fingerprint"] == fingerprint:
+                return variant
+        return None
+
+    def record(self,
+               test_id: str,
+               description: str,
+               context: Optional[str],
+               fingerprint: str,
+               actions: List[Dict[str, Any]],
+               verify: Optional[Dict[str, str]] = None) -> None:
+        """Record the actions that completed a step.
+
+        Args:
+            test_id: Identifier of the running test
+            description: Step description
+            context: Step context
+            fingerprint: Fingerprint of the screen the actions ran against
+            actions: Actions that completed the step
+            verify: Selectors that located each verified element
+        """
+        if not self.enabled or not actions:
+            return
+
+        plans = self._load(test_id)
+        key = self._step_key(description, context)
+        variants = [v for v in plans.get(key, []) if v["fingerprint"] != fingerprint]
+        variants.insert(0, {
+            "description": description,
+            "fingerprint": fingerprint,
+            "actions": actions,
+            "verify": verify or {},
+            "recorded": time.time()
+        })
+        plans[key] = variants[:self.max_variants]
+
+        self._save(test_id, plans)
+        logger.debug(f"Recorded compiled plan for step: {description}")
+
+    def invalidate(self, test_id: str, description: str, context: Optional[str], fingerprint: str) -> None:
+        """Drop a plan that no longer works so the step is re-planned and re-recorded.
+
+        Args:
+            test_id: Identifier of the running test
+            description: Step description
+            context: Step context
+            fingerprint: Fingerprint the plan was recorded against
+        """
+        if not self.enabled:
+            return
+
+        plans = self._load(test_id)
+        key = self._step_key(description, context)
+        if key not in plans:
+            return
+
+        plans[key] = [v for v in plans[key] if v["fingerprint"] != fingerprint]
+        if not plans[key]:
+            del plans[key]
+
+        self._save(test_id, plans)
+        logger.info(f"Invalidated compiled plan for step: {description}")
@@ -0,0 +1,218 @@
+"""Prompt templates for the harness's LLM calls, laid out for provider-side prefix caching.
+
+Providers cache the longest previously seen prefix of a request, but only in
+requests of at least 1024 tokens (OpenAI) and only once the matching prefix
+itself reaches that size. Every template keeps its instructions, response
+schema and examples in a static system message that is byte-for-byte the same
+on every call, and puts the variable parts in the user message, ordered from
+the most to the least stable: page content, context, then the task itself.
+
+The static system messages alone are below the threshold (roughly 900 tokens
+for actions, 700 for flows and 300 for locating elements), so they are never
+cached by themselves. A cache hit needs the page content to repeat as well:
+retries, several steps or verifications on the same screen, and conversation
+turns, whose history extends the previous request. How much is cached
+therefore depends on the size of the snapshot and how often a screen is seen.
+"""
+from typing import List, Optional, Sequence
+
+from lib.flows import FlowStage
+
+
+_SNAPSHOT_FORMAT = """\
+## Page content
+The page content lists the visible elements one per line as:
+[index] role "accessible name" text="visible text" sel=<selector> state @x,y,<width>x<height>
+Use the sel= value verbatim as the "selector" of an action. If raw HTML is given instead, derive the
+selector from the HTML. When an element you need is not listed (for example on a screen you have not
+seen yet), use a Playwright text or role selector such as text=Continue or role=button[name="Continue"].
+"""
+
+_ACTION_SCHEMA = """\
+## Actions
+Each action is an object with a "type", the parameters for that type, and a "description" explaining
+why the action is needed. Supported types:
+- click: "selector"
+- input (or fill): "selector", "value"; replaces the field's contents
+- type: "selector", "value"; types key by key, for fields that react to keystrokes
+- press: "selector", "key" (e.g. "Enter", "Tab")
+- select: "selector" and one of "value", "label" or "index"
+- check / uncheck: "selector"
+- wait: one of "selector", "time" (milliseconds) or "load_state" ("load", "domcontentloaded",
+  "networkidle"), with an optional "timeout" in milliseconds; with none of them, waits until the UI
+  has stopped changing
+- navigate: "url"
+- screenshot: "name"
+List the actions in the order they should run. Prefer the fewest actions that accomplish the task.
+"""
+
+ACTIONS_SYSTEM_PROMPT = f"""\
+You are a browser automation expert that helps users interact with web applications.
+
+Each request gives you the current page content, sometimes additional context about the application,
+and a task. Determine what browser actions should be taken to accomplish the task. Focus on
+identifying the right elements and interactions.
+
+{_SNAPSHOT_FORMAT}
+In a continuing conversation, later requests list only the elements that were added, removed or
+changed since the previous page content, together with the outcome of the previous steps. Elements
+that are not mentioned are unchanged.
+
+{_ACTION_SCHEMA}
+## Response format
+Return a JSON object with an "actions" key containing the array of actions. The array is empty when the
+task needs no action, for example when it only checks what is on the screen.
+
+## Examples
+Page content:
+URL: http://localhost:8081/auth
+[0] heading "Welcome to Aware" sel=h1 @24,120,327x40
+[1] button "Sign In" sel=[data-testid="sign-in"] @24,600,327x48
+[2] button "Sign Up" sel=[data-testid="sign-up"] @24,664,327x48
+Task: Click the Sign Up button
+Response:
+{{"actions": [{{"type": "click", "selector": "[data-testid=\\"sign-up\\"]", "description": "Click the Sign Up button to begin registration"}}]}}
+
+Page content:
+URL: http://localhost:8081/signup
+[0] heading "Create your account" sel=h1 @24,120,327x40
+[1] textbox "Email" sel=input[name="email"] @24,200,327x44
+[2] textbox "Password" sel=input[name="password"] @24,260,327x44
+[3] button "Create Account" sel=[data-testid="create-account"] disabled @24,340,327x48
+Task: Fill out the sign-up form with test@example.com and the password Secret123! and submit it
+Response:
+{{"actions": [
+  {{"type": "input", "selector": "input[name=\\"email\\"]", "value": "test@example.com", "description": "Enter email address in the email field"}},
+  {{"type": "input", "selector": "input[name=\\"password\\"]", "value": "Secret123!", "description": "Enter the password"}},
+  {{"type": "click", "selector": "[data-testid=\\"create-account\\"]", "description": "Submit the form; the button enables once both fields are filled"}}
+]}}
+
+Page content:
+URL: http://localhost:8081/auth
+[0] heading "Welcome to Aware" sel=h1 @24,120,327x40
+[1] button "Sign In" sel=[data-testid="sign-in"] @24,600,327x48
+[2] button "Sign Up" sel=[data-testid="sign-up"] @24,664,327x48
+Task: Verify we've reached the authentication screen with Sign In/Sign Up options
+Response:
+{{"actions": []}}
+"""
+
+FLOW_SYSTEM_PROMPT = f"""\
+You are a browser automation expert that plans multi-screen flows through web applications in one go.
+
+Each request gives you the current page content, the stages of a flow in order (each on its own
+screen, with a task and sometimes context) and the goal of the whole flow. Only the screen of the
+first stage is shown; plan the later screens from their stage descriptions.
+
+{_SNAPSHOT_FORMAT}
+{_ACTION_SCHEMA}
+## Conditions
+A condition is an object with exactly one of "selector", "text" (visible text) or "url_contains".
+
+## Response format
+Return a JSON object with a "screens" key containing one entry per stage, in order:
+1. "stage": the stage name
+2. "expect": a condition that is true once the stage's screen is showing (the first one must hold now)
+3. "actions": the browser actions for the stage; stages that only check the screen have no actions
+4. "wait_for": a condition that is true once the stage's actions have taken effect, usually the next
+   stage's "expect"
+
+## Example
+{{
+  "screens": [
+    {{
+      "stage": "welcome",
+      "expect": {{"text": "Get Started"}},
+      "actions": [{{"type": "click", "selector": "text=Get Started", "description": "Start onboarding"}}],
+      "wait_for": {{"text": "Continue"}}
+    }},
+    {{
+      "stage": "intro1",
+      "expect": {{"text": "Continue"}},
+      "actions": [{{"type": "click", "selector": "role=button[name=\\"Continue\\"]", "description": "Go to the next intro screen"}}],
+      "wait_for": {{}}
+    }}
+  ]
+}}
+"""
+
+LOCATE_SYSTEM_PROMPT = f"""\
+You are a browser automation expert that analyzes pages and finds elements.
+
+Each request gives you the current page content and a numbered list of element descriptions. For each
+description, determine whether a matching element exists. If it does, provide the most appropriate
+selector to find it; if it doesn't, explain why it might not be found.
+
+{_SNAPSHOT_FORMAT}
+## Response format
+Return a JSON object with one entry per description, in the same order:
+{{
+    "elements": [
+        {{
+            "index": 0,
+            "exists": true,
+            "selector": "selector string if exists",
+            "explanation": "explanation of your reasoning"
+        }}
+    ]
+}}
+"""
+
+
+def _one_line(text: Optional[str]) -> str:
+    return " ".join((text or "").split())
+
+
+def task_prompt(task: str, page_content: str, context: Optional[str]) -> str:
+    """Build the user message asking for the actions of a task.
+
+    Args:
+        task: The task to execute
+        page_content: Snapshot of the current page (element list or HTML)
+        context: Additional context about the application
+
+    Returns:
+        User message to send after ACTIONS_SYSTEM_PROMPT
+    """
+    prompt = f"Page content:\n{page_content}"
+    if context:
+        prompt += f"\n\nAdditional context:\n{context.strip()}"
+    return prompt + f"\n\nTask: {task}"
+
+
+def flow_prompt(goal: str, stages: Sequence[FlowStage], page_content: str, divergence: Optional[str] = None) -> str:
+    """Build the user message asking for a plan covering every remaining stage of a flow.
+
+    Args:
+        goal: What the whole flow achieves
+        stages: Stages still to run, starting with the one on the current screen
+        page_content: Snapshot of the current page
+        divergence: Why the previous plan stopped matching the app, when re-planning
+
+    Returns:
+        User message to send after FLOW_SYSTEM_PROMPT
+    """
+    stage_lines = []
+    for number, stage in enumerate(stages, 1):
+        stage_lines.append(f"{number}. [{stage.name}] {_one_line(stage.task)}")
+        if stage.context:
+            stage_lines.append(f"   Context: {_one_line(stage.context)}")
+
+    prompt = f"Page content:\n{page_content}\n\nStages:\n" + "\n".join(stage_lines) + f"\n\nGoal: {goal}"
+    if divergence:
+        prompt += f"\n\nThe previous plan stopped matching the app: {divergence}\nPlan again from the current screen."
+    return prompt
+
+
+def locate_prompt(descriptions: List[str], page_content: str) -> str:
+    """Build the user message asking for selectors of described elements.
+
+    Args:
+        descriptions: Natural language descriptions of the elements
+        page_content: Snapshot of the current page
+
+    Returns:
+        User message to send after LOCATE_SYSTEM_PROMPT
+    """
+    numbered = "\n".join(f"{i}. {description}" for i, description in enumerate(descriptions))
+    return f"Page content:\n{page_content}\n\nElements:\n{numbered}"
@@ -0,0 +1,260 @@
+"""Offline OpenAI-compatible server that replays recorded transcripts.
+
+Point the harness at it with OPENAI_BASE_URL (any OPENAI_API_KEY value works)
+to run or benchmark the tests without network access or model latency:
+
+    python -m lib.replay_server --port 8765 --latency-ms 0
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python run_tests.py
+
+Streaming requests get the recorded response back as server-sent events,
+split into chunks of --chunk-chars characters sent --chunk-interval-ms apart.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from config.config import LLM_TRANSCRIPT_DIR
+from lib.transcripts import TranscriptStore, request_fingerprint
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    server: "ReplayServer"
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, request: Dict[str, Any], response: Dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.close_connection = True
+
+        include_usage = (request.get("stream_options") or {}).get("include_usage", False)
+        for event in self.server.stream_events(response, include_usage):
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if self.server.chunk_interval_ms and event.get("choices"):
+                time.sleep(self.server.chunk_interval_ms / 1000)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_error(self, status: int, code: str, message: str) -> None:
+        self._send_json(status, {"error": {"message": message, "type": "invalid_request_error", "code": code}})
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/health":
+            self._send_json(200, {"status": "ok", "hits": self.server.hits, "misses": self.server.misses})
+        elif path == "/v1/models":
+            self._send_json(200, {"object": "list", "data": []})
+        else:
+            self._send_error(404, "not_found", f"Unknown path {self.path}")
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path not in ("/v1/chat/completions", "/chat/completions"):
+            self._send_error(404, "not_found", f"Unknown path {self.path}")
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except Exception as e:
+            self._send_error(400, "invalid_json", f"Could not parse request body: {e}")
+            return
+
+        fingerprint = request_fingerprint(request)
+        transcript = self.server.transcripts.load(fingerprint)
+        if transcript is None:
+            self.server.count(hit=False)
+            logger.warning(f"No transcript recorded for request {fingerprint[:12]} (model {request.get('model')})")
+            self._send_error(404, "transcript_not_found", f"No transcript recorded for request {fingerprint}")
+            return
+
+        self.server.count(hit=True)
+        time.sleep(self.server.delay_for(transcript))
+        if request.get("stream"):
+            self._send_stream(request, transcript["response"])
+        else:
+            self._send_json(200, transcript["response"])
+
+    def log_message(self, format, *args):
+        logger.debug(f"replay server: {format % args}")
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering chat completions from recorded transcripts."""
+
+    daemon_threads = True
+
+    def __init__(self,
+                 transcripts: Optional[TranscriptStore] = None,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 latency_ms: int = 0,
+                 jitter_ms: int = 0,
+                 recorded_latency: bool = False,
+                 seed: int = 0,
+                 chunk_chars: int = 16,
+                 chunk_interval_ms: int = 0):
+        """Initialize the server.
+
+        Args:
+            transcripts: Transcript store to replay from (defaults to LLM_TRANSCRIPT_DIR)
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            latency_ms: Fixed delay added to every response
+            jitter_ms: Maximum extra random delay, drawn from a seeded generator
+            recorded_latency: Replay the latency measured when the transcript was recorded
+            seed: Seed for the jitter generator, so runs are repeatable
+            chunk_chars: Characters of content per streamed chunk
+            chunk_interval_ms: Delay between streamed chunks, to mimic generation speed
+        """
+        super().__init__((host, port), _ReplayHandler)
+        self.transcripts = transcripts if transcripts is not None else TranscriptStore()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.recorded_latency = recorded_latency
+        self.chunk_chars = max(1, chunk_chars)
+        self.chunk_interval_ms = chunk_interval_ms
+
+        self.hits = 0
+        self.misses = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to the OpenAI client."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, hit: bool) -> None:
+        """Count a replayed or missing transcript.
+
+        Args:
+            hit: Whether a transcript was found
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def delay_for(self, transcript: Dict[str, Any]) -> float:
+        """Compute the injected latency for a response.
+
+        Args:
+            transcript: Transcript being replayed
+
+        Returns:
+            Delay in seconds
+        """
+        delay = self.latency_ms / 1000
+        if self.recorded_latency:
+            delay += transcript.get("latency_s", 0.0)
+        if self.jitter_ms > 0:
+            with self._lock:
+                delay += self._random.uniform(0, self.jitter_ms) / 1000
+        return delay
+
+    def stream_events(self, response: Dict[str, Any], include_usage: bool = False) -> List[Dict[str, Any]]:
+        """Split a recorded response into chat completion chunks.
+
+        Args:
+            response: Recorded non-streamed response
+            include_usage: Whether to end with a usage-only chunk, as stream_options.include_usage asks
+
+        Returns:
+            Chunk bodies in the order they are sent
+        """
+        base = {
+            "id": response.get("id", "chatcmpl-replay"),
+            "object": "chat.completion.chunk",
+            "created": response.get("created", int(time.time())),
+            "model": response.get("model", "")
+        }
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, index: int = 0) -> Dict[str, Any]:
+            return {**base, "choices": [{"index": index, "delta": delta, "finish_reason": finish_reason}]}
+
+        events = []
+        for choice in response.get("choices", []):
+            index = choice.get("index", 0)
+            content = (choice.get("message") or {}).get("content") or ""
+            events.append(chunk({"role": "assistant", "content": ""}, index=index))
+            for start in range(0, len(content), self.chunk_chars):
+                events.append(chunk({"content": content[start:start + self.chunk_chars]}, index=index))
+            events.append(chunk({}, choice.get("finish_reason") or "stop", index))
+
+        if include_usage:
+            events.append({**base, "choices": [], "usage": response.get("usage")})
+        return events
+
+    def start(self) -> None:
+        """Serve requests from a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, name="replay-server", daemon=True)
+            self._thread.start()
+            logger.info(f"Replay server listening on {self.url}")
+
+    def stop(self) -> None:
+        """Stop serving and release the socket."""
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+
+def main():
+    """Run the replay server in the foreground."""
+    parser = argparse.ArgumentParser(description="Serve recorded LLM transcripts through an OpenAI-compatible API")
+    parser.add_argument("--transcripts", default=LLM_TRANSCRIPT_DIR, help="Directory of recorded transcripts")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8765, help="Port to bind")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Fixed delay added to every response")
+    parser.add_argument("--jitter-ms", type=int, default=0, help="Maximum extra random delay per response")
+    parser.add_argument("--recorded-latency", action="store_true", help="Replay the latency measured when recording")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the jitter generator")
+    parser.add_argument("--chunk-chars", type=int, default=16, help="Characters of content per streamed chunk")
+    parser.add_argument("--chunk-interval-ms", type=int, default=0, help="Delay between streamed chunks")
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        TranscriptStore(args.transcripts),
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        recorded_latency=args.recorded_latency,
+        seed=args.seed,
+        chunk_chars=args.chunk_chars,
+        chunk_interval_ms=args.chunk_interval_ms
+    )
+    logger.info(f"Replaying transcripts from {args.transcripts} on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Replay server stopped ({server.hits} replayed, {server.misses} missing)")
+
+
+if __name__ == "__main__":
+    main()
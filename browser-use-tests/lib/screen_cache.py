@@ -0,0 +1,124 @@
+"""Cache of vision screen classifications keyed by a perceptual hash of the screenshot."""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from config.config import LLM_CACHE_DIR, SCREEN_CACHE_ENABLED, SCREEN_CACHE_MAX_DISTANCE, SCREEN_CACHE_MAX_ENTRIES
+from lib.image_hash import dhash, hamming_distance
+
+
+# 16x16 grid (256 bits) so screens differing only in a heading don't collide
+_HASH_SIZE = 16
+
+
+class ScreenClassificationCache:
+    """Reuses the classification of a visually equivalent, already analyzed screen.
+
+    Entries are kept in a single JSON file next to the LLM cache. Each entry is
+    scoped to a namespace (the model and prompt that produced it), so changing
+    the analysis prompt never returns stale answers.
+    """
+
+    def __init__(self,
+                 cache_dir: str = LLM_CACHE_DIR,
+                 max_distance: int = SCREEN_CACHE_MAX_DISTANCE,
+                 max_entries: int = SCREEN_CACHE_MAX_ENTRIES,
+                 enabled: bool = SCREEN_CACHE_ENABLED):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache file
+            max_distance: Largest Hamming distance between hashes treated as the same screen
+            max_entries: Maximum number of classifications kept (oldest are evicted)
+            enabled: Whether the cache is used at all
+        """
+        self.path = Path(cache_dir) / "screen_classifications.json"
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: Optional[List[Dict[str, Any]]] = None
+
+    @staticmethod
+    def namespace(*parts: Optional[str]) -> str:
+        """Build the namespace for classifications produced by a model and prompt.
+
+        Args:
+            parts: Values the classification depends on (model, prompt)
+
+        Returns:
+            Hex digest identifying the namespace
+        """
+        return hashlib.sha256("\x1f".join(part or "" for part in parts).encode("utf-8")).hexdigest()[:16]
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = []
+            if self.path.exists():
+                try:
+                    with open(self.path, "r") as f:
+                        self._entries = json.load(f)
+                except Exception as e:
+                    logger.warning(f"Discarding unreadable screen cache {self.path}: {e}")
+        return self._entries
+
+    def lookup(self, image_bytes: bytes, namespace: str) -> Optional[Dict[str, Any]]:
+        """Find the classification of the closest visually equivalent screen.
+
+        Args:
+            image_bytes: Encoded screenshot of the current screen
+            namespace: Namespace from namespace()
+
+        Returns:
+            Entry with "screen_type", "analysis" and "distance" keys, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        frame_hash = dhash(image_bytes, _HASH_SIZE)
+        best = None
+        best_distance = self.max_distance + 1
+        for entry in self._load():
+            if entry["namespace"] != namespace:
+                continue
+            distance = hamming_distance(frame_hash, int(entry["hash"], 16))
+            if distance < best_distance:
+                best, best_distance = entry, distance
+
+        if best is None:
+            return None
+
+        logger.debug(f"Screen classification cache hit: {best['screen_type']} (distance {best_distance})")
+        return {**best, "distance": best_distance}
+
+    def store(self, image_bytes: bytes, namespace: str, screen_type: str, analysis: str) -> None:
+        """Remember the classification of a screen.
+
+        Args:
+            image_bytes: Encoded screenshot that was analyzed
+            namespace: Namespace from namespace()
+            screen_type: Screen type the analysis concluded
+            analysis: Full analysis text
+        """
+        if not self.enabled:
+            return
+
+        entries = self._load()
+        entries.append({
+            "namespace": namespace,
+            "hash": format(dhash(image_bytes, _HASH_SIZE), "x"),
+            "screen_type": screen_type,
+            "analysis": analysis,
+            "created": time.time()
+        })
+        del entries[:-self.max_entries]
+
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,189 @@
+"""Local screen classification from DOM features."""
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List
+
+from playwright.async_api import Page
+
+
+class ScreenType(Enum):
+    """Enum representing different screen types in the app."""
+    INTRO = "intro"
+    AUTH = "auth"
+    SIGN_IN = "sign_in"
+    FTUX = "ftux"
+    MAIN_APP = "main_app"
+    UNKNOWN = "unknown"
+
+
+# Expo Router screens by the last path segment (lowercased); route groups such
+# as (tabs) don't appear in the URL
+ROUTE_SCREEN_TYPES: Dict[str, ScreenType] = {
+    "welcome": ScreenType.INTRO,
+    "intro": ScreenType.INTRO,
+    "auth": ScreenType.AUTH,
+    "signup": ScreenType.AUTH,
+    "signin": ScreenType.SIGN_IN,
+    **{route: ScreenType.FTUX for route in (
+        "chooseassessment", "mbti", "bigfive", "disc", "enneagram", "lovelanguages", "motivationcode",
+        "cliftonstrengths", "addassessment", "almostdone", "createuserprofile", "introducingyou", "birthdate",
+        "addavatar", "maininterests", "primaryoccupation", "education", "careerjourney", "shorttermgoals",
+        "ultimategoals", "addfamilystory", "addrelationships"
+    )},
+    **{route: ScreenType.MAIN_APP for route in (
+        "chat", "chatlist", "circles", "explore", "mydata", "people", "insightdetails", "debugmenu",
+        "account", "assessmentdetail", "assessmentdetails", "userprofileinsightdetail"
+    )},
+}
+
+_EXTRACT_FEATURES_JS = """
+() => {
+    const visible = (el) => {
+        const rect = el.getBoundingClientRect();
+        const style = getComputedStyle(el);
+        return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+    };
+    const texts = (selector) => Array.from(document.querySelectorAll(selector)).filter(visible)
+        .map((el) => (el.innerText || el.getAttribute('aria-label') || '').trim().replace(/\\s+/g, ' '))
+        .filter(Boolean).slice(0, 50);
+    return {
+        path: location.pathname,
+        headings: texts('h1, h2, h3, [role=heading]'),
+        buttons: texts('button, [role=button], a[href], [role=link]'),
+        inputs: Array.from(document.querySelectorAll('input, textarea')).filter(visible).map((el) =>
+            [(el.type || 'text').toLowerCase(),
+             (el.name || el.placeholder || el.getAttribute('aria-label') || '').toLowerCase()].join(':')),
+        tabs: Array.from(document.querySelectorAll('[role=tab]')).filter(visible).length,
+        radios: Array.from(document.querySelectorAll('[role=radio], input[type=radio]')).filter(visible).length,
+        loading: Array.from(document.querySelectorAll('[role=progressbar]')).filter(visible).length > 0
+    };
+}
+"""
+
+_INTRO_BUTTONS = ("get started", "next", "continue", "skip")
+_SIGN_IN_WORDS = ("sign in", "log in", "login")
+_SIGN_UP_WORDS = ("sign up", "create account", "register")
+
+
+@dataclass
+class ScreenFeatures:
+    """DOM features of the current screen used for classification."""
+    path: str
+    headings: List[str] = field(default_factory=list)
+    buttons: List[str] = field(default_factory=list)
+    inputs: List[str] = field(default_factory=list)
+    tabs: int = 0
+    radios: int = 0
+    loading: bool = False
+
+    @property
+    def route(self) -> str:
+        """Last path segment, lowercased, with route groups skipped."""
+        segments = [s for s in self.path.split("/") if s and not s.startswith("(")]
+        return segments[-1].lower() if segments else ""
+
+    def describe(self) -> str:
+        """Summarize the features as text, in place of a vision analysis.
+
+        Returns:
+            Multi-line description of the route, headings, buttons and inputs
+        """
+        return "\n".join([
+            f"Route: {self.path}",
+            f"Headings: {', '.join(self.headings) or 'none'}",
+            f"Buttons: {', '.join(self.buttons) or 'none'}",
+            f"Inputs: {', '.join(self.inputs) or 'none'}",
+            f"Tab bar: {'yes' if self.tabs >= 3 else 'no'}"
+        ])
+
+
+@dataclass
+class ScreenClassification:
+    """Screen type decided from DOM features, with the evidence behind it."""
+    screen_type: ScreenType
+    confidence: float
+    features: ScreenFeatures
+    reasons: List[str] = field(default_factory=list)
+
+
+def _mentions(texts: List[str], words) -> bool:
+    return any(word in text.lower() for text in texts for word in words)
+
+
+def classify_features(features: ScreenFeatures) -> ScreenClassification:
+    """Classify a screen from its DOM features.
+
+    Each piece of evidence adds weight to a screen type. Confidence is the
+    winning weight, reduced when another type has competing evidence.
+
+    Args:
+        features: Features extracted from the page
+
+    Returns:
+        Classification with a confidence between 0 and 1
+    """
+    scores: Dict[ScreenType, float] = {}
+    reasons: List[str] = []
+
+    def add(screen_type: ScreenType, weight: float, reason: str) -> None:
+        scores[screen_type] = scores.get(screen_type, 0.0) + weight
+        reasons.append(f"{reason} -> {screen_type.value} (+{weight})")
+
+    route_type = ROUTE_SCREEN_TYPES.get(features.route)
+    if route_type:
+        add(route_type, 0.7, f"route /{features.route}")
+
+    text = features.headings + features.buttons
+    has_password = any(i.startswith("password:") for i in features.inputs)
+    has_email = any("email" in i for i in features.inputs)
+
+    if features.tabs >= 3:
+        add(ScreenType.MAIN_APP, 0.5, f"tab bar with {features.tabs} tabs")
+
+    if has_password:
+        if _mentions(features.headings, _SIGN_UP_WORDS) or _mentions(features.buttons, ("create account",)):
+            add(ScreenType.AUTH, 0.4, "sign-up form")
+        elif _mentions(text, _SIGN_IN_WORDS):
+            add(ScreenType.SIGN_IN, 0.5 if has_email else 0.4, "sign-in form")
+    elif not features.inputs:
+        if _mentions(features.buttons, _SIGN_IN_WORDS) and _mentions(features.buttons, _SIGN_UP_WORDS):
+            add(ScreenType.AUTH, 0.5, "sign-in and sign-up buttons")
+        elif features.radios >= 2:
+            add(ScreenType.FTUX, 0.4, f"{features.radios} answer options")
+        elif features.tabs < 3 and _mentions(features.buttons, _INTRO_BUTTONS):
+            add(ScreenType.INTRO, 0.3, "intro navigation button")
+
+    if not scores:
+        reason = "loading indicator only" if features.loading else "no recognizable features"
+        return ScreenClassification(ScreenType.UNKNOWN, 0.0, features, [reason])
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best_type, best_score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    confidence = max(0.0, min(1.0, best_score) - runner_up / 2)
+
+    return ScreenClassification(best_type, round(confidence, 3), features, reasons)
+
+
+async def extract_features(page: Page) -> ScreenFeatures:
+    """Extract classification features from the page in one evaluate call.
+
+    Args:
+        page: Playwright page showing the app
+
+    Returns:
+        Features of the current screen
+    """
+    return ScreenFeatures(**(await page.evaluate(_EXTRACT_FEATURES_JS)))
+
+
+async def classify_screen(page: Page) -> ScreenClassification:
+    """Classify the screen currently shown on the page.
+
+    Args:
+        page: Playwright page showing the app
+
+    Returns:
+        Classification with a confidence between 0 and 1
+    """
+    return classify_features(await extract_features(page))
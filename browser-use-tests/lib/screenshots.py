@@ -0,0 +1,190 @@
+"""Asynchronous, deduplicating screenshot pipeline."""
+import asyncio
+import hashlib
+import io
+from pathlib import Path
+from typing import Optional, Tuple
+
+from loguru import logger
+from PIL import Image
+from playwright.async_api import Page
+
+from config.config import (SCREENSHOT_DEDUP_DISTANCE, SCREENSHOT_FORMAT, SCREENSHOT_POLICY, SCREENSHOT_QUALITY,
+                           SCREENSHOT_SAMPLE_EVERY)
+from lib.image_hash import dhash, hamming_distance
+
+
+# Screenshot kinds. Explicit and error screenshots are always kept and always
+# written; the capture policy and deduplication only apply to the automatic ones.
+EXPLICIT = "explicit"
+ERROR = "error"
+ACTION = "action"
+TASK = "task"
+
+# 16x16 grid (256 bits): an 8x8 hash can't tell a selected radio button or a new
+# question text from the previous frame
+_HASH_SIZE = 16
+
+
+class ScreenshotWriter:
+    """Captures screenshots inline and encodes/writes them from a background task.
+
+    Capture policies:
+        all: every screenshot is captured
+        on_failure: only explicit and error screenshots are captured
+        sampled: every Nth automatic screenshot is captured
+
+    Automatic frames that are byte-identical to the previously written frame
+    are not written again. With SCREENSHOT_DEDUP_DISTANCE >= 0, automatic
+    frames within that many bits of the previous frame's perceptual hash are
+    skipped too. Explicit and error screenshots are always written.
+    """
+
+    def __init__(self,
+                 directory: Path,
+                 policy: str = SCREENSHOT_POLICY,
+                 sample_every: int = SCREENSHOT_SAMPLE_EVERY,
+                 image_format: str = SCREENSHOT_FORMAT,
+                 quality: int = SCREENSHOT_QUALITY,
+                 dedup_distance: int = SCREENSHOT_DEDUP_DISTANCE):
+        """Initialize the writer.
+
+        Args:
+            directory: Directory to save screenshots in
+            policy: Capture policy (all, on_failure, sampled)
+            sample_every: Keep one in this many automatic screenshots with the sampled policy
+            image_format: Output format (png, jpeg, webp)
+            quality: Quality for lossy formats (1-100)
+            dedup_distance: Maximum perceptual hash distance treated as a duplicate (-1 disables)
+        """
+        if policy not in ("all", "on_failure", "sampled"):
+            raise ValueError(f"Unsupported screenshot policy: {policy}")
+        if image_format not in ("png", "jpeg", "webp"):
+            raise ValueError(f"Unsupported screenshot format: {image_format}")
+
+        self.directory = directory
+        self.policy = policy
+        self.sample_every = max(1, sample_every)
+        self.image_format = image_format
+        self.quality = quality
+        self.dedup_distance = dedup_distance
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._automatic_count = 0
+
+        # Last frame written, for deduplication
+        self._last_digest: Optional[str] = None
+        self._last_hash: Optional[int] = None
+        self._last_path: Optional[str] = None
+
+    def _should_capture(self, kind: str) -> bool:
+        if kind in (EXPLICIT, ERROR) or self.policy == "all":
+            return True
+        if self.policy == "on_failure":
+            return False
+
+        self._automatic_count += 1
+        return (self._automatic_count - 1) % self.sample_every == 0
+
+    async def capture(self, page: Page, name: str, kind: str = EXPLICIT, wait: bool = False) -> Optional[str]:
+        """Capture a screenshot and queue it for writing.
+
+        Args:
+            page: Page to capture
+            name: File name without extension
+            kind: Screenshot kind (explicit, error, action, task)
+            wait: Whether to wait until the file is written
+
+        Returns:
+            Path the screenshot is (or will be) written to; when waiting and an
+            automatic frame duplicates the previous one, the previous frame's path.
+            None if the capture policy skipped it.
+        """
+        if not self._should_capture(kind):
+            return None
+
+        # PNG frames are re-encoded by the worker for WebP output
+        if self.image_format == "jpeg":
+            data = await page.screenshot(type="jpeg", quality=self.quality)
+        else:
+            data = await page.screenshot(type="png")
+
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        extension = "jpg" if self.image_format == "jpeg" else self.image_format
+        path = self.directory / f"{name}.{extension}"
+        done = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((path, data, kind, done))
+
+        if wait:
+            return await done
+        return str(path)
+
+    async def _run(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            path, data, kind, done = item
+            try:
+                written = await asyncio.to_thread(self._write, path, data, kind)
+                if not done.done():
+                    done.set_result(written)
+            except Exception as e:
+                logger.error(f"Failed to write screenshot {path}: {e}")
+                if not done.done():
+                    done.set_result(None)
+            finally:
+                self._queue.task_done()
+
+    def _is_duplicate(self, data: bytes) -> Tuple[bool, str, Optional[int]]:
+        digest = hashlib.sha1(data).hexdigest()
+        if digest == self._last_digest:
+            return True, digest, self._last_hash
+
+        if self.dedup_distance < 0:
+            return False, digest, None
+
+        frame_hash = dhash(data, _HASH_SIZE)
+        duplicate = self._last_hash is not None and hamming_distance(frame_hash, self._last_hash) <= self.dedup_distance
+        return duplicate, digest, frame_hash
+
+    def _write(self, path: Path, data: bytes, kind: str) -> str:
+        duplicate, digest, frame_hash = self._is_duplicate(data)
+        if duplicate and self._last_path and kind not in (EXPLICIT, ERROR):
+            logger.debug(f"Skipped duplicate screenshot {path.name}")
+            return self._last_path
+
+        if self.image_format == "webp":
+            with Image.open(io.BytesIO(data)) as image:
+                buffer = io.BytesIO()
+                image.save(buffer, format="WEBP", quality=self.quality)
+                data = buffer.getvalue()
+
+        path.write_bytes(data)
+        logger.debug(f"Saved screenshot to {path}")
+
+        self._last_digest = digest
+        self._last_hash = frame_hash
+        self._last_path = str(path)
+        return self._last_path
+
+    async def flush(self) -> None:
+        """Wait until every queued screenshot has been written."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Write any queued screenshots and stop the background task."""
+        if self._worker is None:
+            return
+
+        self._queue.put_nowait(None)
+        await self._worker
+        self._worker = None
+        self._queue = None
@@ -0,0 +1,125 @@
+"""Event-driven detection of when the page has stopped changing."""
+import asyncio
+import time
+from typing import Any, Dict
+
+from loguru import logger
+from playwright.async_api import Page
+
+from config.config import SETTLE_QUIET_MS, SETTLE_TIMEOUT_MS
+
+
+# Installed in every document before the app's own scripts run. Tracks the time
+# of the last DOM mutation and the number of fetch/XHR requests in flight.
+# Mutations inside <svg> are ignored so looping Lottie animations don't keep
+# the page from ever settling.
+SETTLE_INIT_JS = """
+(() => {
+    if (window.__settle) return;
+    const state = { inflight: 0, lastMutation: performance.now(), lastNetwork: performance.now() };
+    window.__settle = state;
+
+    const networkStarted = () => { state.inflight++; state.lastNetwork = performance.now(); };
+    const networkEnded = () => { state.inflight = Math.max(0, state.inflight - 1); state.lastNetwork = performance.now(); };
+
+    if (window.fetch) {
+        const originalFetch = window.fetch;
+        window.fetch = function (...args) {
+            networkStarted();
+            return originalFetch.apply(this, args).finally(networkEnded);
+        };
+    }
+
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function (...args) {
+        networkStarted();
+        this.addEventListener('loadend', networkEnded, { once: true });
+        return originalSend.apply(this, args);
+    };
+
+    const outsideSvg = (record) => {
+        const el = record.target.nodeType === 1 ? record.target : record.target.parentElement;
+        return !el || !el.closest('svg');
+    };
+    new MutationObserver((records) => {
+        if (records.some(outsideSvg)) state.lastMutation = performance.now();
+    }).observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+})();
+"""
+
+# Resolves once the DOM has been quiet for quietMs, no requests are in flight,
+# no finite CSS/Web animations are running and two animation frames have
+# rendered; or once timeoutMs has elapsed.
+_WAIT_FOR_SETTLE_JS = """
+async ({ quietMs, timeoutMs, initScript }) => {
+    if (!window.__settle) (0, eval)(initScript);
+    const state = window.__settle;
+    const start = performance.now();
+    const frame = () => new Promise((resolve) => requestAnimationFrame(() => resolve()));
+    const animating = () => (document.getAnimations ? document.getAnimations() : [])
+        .some((a) => a.playState === 'running' && a.effect && Number.isFinite(a.effect.getComputedTiming().endTime));
+
+    while (performance.now() - start < timeoutMs) {
+        await frame();
+        const now = performance.now();
+        const domQuiet = now - state.lastMutation >= quietMs;
+        const networkQuiet = state.inflight === 0 && now - state.lastNetwork >= quietMs;
+        if (domQuiet && networkQuiet && !animating()) {
+            await frame();
+            await frame();
+            return { settled: true, inflight: 0 };
+        }
+    }
+    return { settled: false, inflight: state.inflight };
+}
+"""
+
+
+async def wait_for_settle(page: Page,
+                          quiet_ms: int = SETTLE_QUIET_MS,
+                          timeout_ms: int = SETTLE_TIMEOUT_MS) -> Dict[str, Any]:
+    """Wait until the page is stable, or until the timeout ceiling is reached.
+
+    Never raises: a page that never settles (or has gone away) just returns
+    once the ceiling is hit, so callers can use it anywhere they used to sleep.
+
+    Args:
+        page: Playwright page to watch
+        quiet_ms: How long the DOM and network must stay quiet
+        timeout_ms: Upper bound on the wait
+
+    Returns:
+        Dictionary with "settled" (bool) and "elapsed_ms" keys
+    """
+    started = time.monotonic()
+
+    try:
+        # Covers document and resource loads, which the in-page counters can't see. Not
+        # networkidle: a page that polls never reaches it and would burn the whole ceiling
+        await page.wait_for_load_state("load", timeout=timeout_ms)
+    except Exception:
+        pass
+
+    result = {"settled": False}
+    while True:
+        remaining_ms = timeout_ms - int((time.monotonic() - started) * 1000)
+        if remaining_ms <= 0:
+            break
+
+        try:
+            result = await page.evaluate(
+                _WAIT_FOR_SETTLE_JS,
+                {"quietMs": quiet_ms, "timeoutMs": remaining_ms, "initScript": SETTLE_INIT_JS}
+            )
+            break
+        except Exception as e:
+            if page.is_closed():
+                break
+            # A navigation replaced the document mid-wait; watch the new one
+            logger.debug(f"Settle detection interrupted: {e}")
+            await asyncio.sleep(0.05)
+
+    result["elapsed_ms"] = int((time.monotonic() - started) * 1000)
+    if not result["settled"]:
+        logger.debug(f"Page did not settle within {timeout_ms}ms ({result})")
+    return result
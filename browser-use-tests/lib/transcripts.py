@@ -0,0 +1,96 @@
+"""Recorded LLM prompt/response transcripts, keyed by a fingerprint of the request."""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from config.config import LLM_TRANSCRIPT_DIR
+
+
+# Request fields that don't change what the model answers
+_IGNORED_FIELDS = {"stream", "stream_options", "user", "timeout"}
+
+
+def request_fingerprint(request: Dict[str, Any]) -> str:
+    """Fingerprint a chat completion request.
+
+    The same fingerprint is computed from the keyword arguments passed to the
+    client when recording and from the JSON body the replay server receives.
+
+    Args:
+        request: Chat completion request (model, messages, response_format, ...)
+
+    Returns:
+        Hex digest identifying the request
+    """
+    canonical = {key: value for key, value in request.items() if key not in _IGNORED_FIELDS}
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranscriptStore:
+    """Directory of recorded transcripts, one JSON file per request fingerprint."""
+
+    def __init__(self, transcript_dir: str = LLM_TRANSCRIPT_DIR):
+        """Initialize the transcript store.
+
+        Args:
+            transcript_dir: Directory where transcripts are stored
+        """
+        self.transcript_dir = Path(transcript_dir)
+
+    def _path(self, fingerprint: str) -> Path:
+        return self.transcript_dir / f"{fingerprint}.json"
+
+    def save(self, request: Dict[str, Any], response: Dict[str, Any], latency_s: float) -> str:
+        """Record a request and the response it got.
+
+        Args:
+            request: Chat completion request
+            response: Response body as returned by the API
+            latency_s: How long the real call took, for latency replay
+
+        Returns:
+            Fingerprint of the request
+        """
+        fingerprint = request_fingerprint(request)
+        self.transcript_dir.mkdir(exist_ok=True, parents=True)
+        path = self._path(fingerprint)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "fingerprint": fingerprint,
+                "request": request,
+                "response": response,
+                "latency_s": latency_s,
+                "recorded": time.time()
+            }, f, default=str)
+        os.replace(tmp_path, path)
+
+        logger.debug(f"Recorded transcript {fingerprint[:12]} for model {request.get('model')}")
+        return fingerprint
+
+    def load(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Load the transcript recorded for a request fingerprint.
+
+        Args:
+            fingerprint: Fingerprint from request_fingerprint()
+
+        Returns:
+            Transcript dictionary, or None if nothing was recorded
+        """
+        path = self._path(fingerprint)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable transcript {path}: {e}")
+            return None
@@ -8,6 +8,8 @@ from typing import Optional, Dict, Any
 import json
 from loguru import logger
 
+from config.config import TEST_DATA_DIR
+
 
 def generate_random_email() -> str:
     """Generate a random email address for testing.
@@ -59,7 +61,7 @@ def save_test_data(data: Dict[str, Any], filename: str = "test_data.json") -> st
     Returns:
         Path to the saved file
     """
-    data_dir = Path("browser-use-tests/test_data")
+    data_dir = Path(TEST_DATA_DIR)
     data_dir.mkdir(exist_ok=True, parents=True)
     
     # Add timestamp to data
@@ -87,7 +89,7 @@ def load_test_data(filename: str = "test_data.json") -> Optional[Dict[str, Any]]
     Returns:
         Dictionary of test data or None if file doesn't exist
     """
-    data_dir = Path("browser-use-tests/test_data")
+    data_dir = Path(TEST_DATA_DIR)
     
     # Ensure filename has .json extension
     if not filename.endswith(".json"):
@@ -0,0 +1,124 @@
+"""In-memory screenshot preparation for vision model requests."""
+import base64
+import io
+import mimetypes
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+from playwright.async_api import Page
+
+from config.config import VISION_DETAIL, VISION_IMAGE_FORMAT, VISION_IMAGE_QUALITY, VISION_MAX_WIDTH
+
+
+# Region of interest as (x, y, width, height) in pixels
+Region = Tuple[int, int, int, int]
+
+
+@dataclass
+class VisionImage:
+    """An encoded image ready to send to a vision model."""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    detail: str = VISION_DETAIL
+
+    def to_content(self) -> Dict[str, Any]:
+        """Build the chat message content part for the image.
+
+        Returns:
+            An image_url content part with an inline data URL
+        """
+        encoded = base64.b64encode(self.data).decode("utf-8")
+        return {
+            "type": "image_url",
+            "image_url": {"url": f"data:{self.mime_type};base64,{encoded}", "detail": self.detail}
+        }
+
+
+def prepare_image(image_bytes: bytes,
+                  max_width: int = VISION_MAX_WIDTH,
+                  region: Optional[Region] = None,
+                  detail: str = VISION_DETAIL,
+                  image_format: str = VISION_IMAGE_FORMAT,
+                  quality: int = VISION_IMAGE_QUALITY) -> VisionImage:
+    """Crop, downscale and re-encode a screenshot for a vision request.
+
+    Args:
+        image_bytes: Encoded screenshot
+        max_width: Downscale wider images to this width (0 keeps the original size)
+        region: Region of interest to crop to before scaling
+        detail: Image detail level for the model (low, high, auto)
+        image_format: Output format (jpeg, png, webp)
+        quality: Quality for lossy formats (1-100)
+
+    Returns:
+        The prepared image
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image = image.convert("RGB")
+        if region:
+            x, y, width, height = region
+            image = image.crop((x, y, x + width, y + height))
+        if max_width and image.width > max_width:
+            image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        if image_format == "png":
+            image.save(buffer, format="PNG", optimize=True)
+        else:
+            image.save(buffer, format=image_format.upper(), quality=quality)
+
+    return VisionImage(buffer.getvalue(), f"image/{image_format}", image.width, image.height, detail)
+
+
+def load_image(path: str, detail: str = VISION_DETAIL) -> VisionImage:
+    """Load an image file as-is, for callers that already have a screenshot on disk.
+
+    Args:
+        path: Path to the image file
+        detail: Image detail level for the model
+
+    Returns:
+        The image, unmodified
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+    return VisionImage(data, mimetypes.guess_type(path)[0] or "image/png", width, height, detail)
+
+
+async def capture_screen(page: Page, region: Optional[Region] = None) -> bytes:
+    """Take a PNG screenshot in memory, without touching the disk.
+
+    Args:
+        page: Playwright page to capture
+        region: Region of the viewport to capture; the whole viewport if omitted
+
+    Returns:
+        Encoded PNG bytes
+    """
+    if region:
+        x, y, width, height = region
+        return await page.screenshot(type="png", clip={"x": x, "y": y, "width": width, "height": height})
+    return await page.screenshot(type="png")
+
+
+async def element_region(page: Page, selector: str, padding: int = 8) -> Optional[Region]:
+    """Region around an element in CSS pixels, for capture_screen().
+
+    Args:
+        page: Playwright page showing the element
+        selector: Selector of the element
+        padding: Pixels of context added around the element
+
+    Returns:
+        Region of the element, or None if it isn't visible
+    """
+    box = await page.locator(selector).first.bounding_box()
+    if not box:
+        return None
+    x, y = max(0, int(box["x"]) - padding), max(0, int(box["y"]) - padding)
+    return x, y, int(box["width"]) + 2 * padding, int(box["height"]) + 2 * padding
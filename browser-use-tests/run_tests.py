@@ -18,7 +18,17 @@ def main():
     parser.add_argument(
         "--parallel", 
         action="store_true", 
-        help="Run tests in parallel"
+        help="Run tests in parallel across worker processes"
+    )
+    parser.add_argument(
+        "--workers", "-n",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes to use with --parallel (default: CPU count)"
+    )
+    parser.add_argument(
+        "--report",
+        help="Write a JUnit XML report covering all workers to this path"
     )
     parser.add_argument(
         "--browser", 
@@ -73,7 +83,13 @@ def main():
         cmd.append("-v")
         
     if args.parallel:
-        cmd.append("-xvs")
+        # Each worker process gets its own browser pool, and config.py gives it its
+        # own screenshot directory, log file and test data namespace. pytest-xdist
+        # merges the results of all workers into a single report.
+        cmd.extend(["-n", str(args.workers), "--dist", "load"])
+        
+    if args.report:
+        cmd.append(f"--junitxml={args.report}")
         
     # Add test path if specified
     if args.test:
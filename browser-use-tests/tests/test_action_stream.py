@@ -0,0 +1,118 @@
+"""Tests for parsing actions out of a streamed LLM response."""
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+from lib.action_stream import ActionStreamParser, parse_actions
+
+
+ACTIONS = [
+    {"type": "input", "selector": "input[name=\"email\"]", "value": "test@example.com", "description": "Email"},
+    {"type": "click", "selector": "text={Continue}", "description": "Press \"Continue\" \\ go on"},
+    {"type": "select", "selector": "#country", "value": {"label": "Canada", "index": [1, 2]}, "description": "Country"},
+]
+
+
+def _feed_in_chunks(parser: ActionStreamParser, text: str, size: int) -> List[List[Dict[str, Any]]]:
+    return [parser.feed(text[start:start + size]) for start in range(0, len(text), size)]
+
+
+class TestActionStreamParser:
+    """Actions are emitted as soon as their closing brace arrives."""
+
+    @pytest.mark.parametrize("size", [1, 2, 7, 1000])
+    def test_any_chunking_yields_the_same_actions(self, size):
+        """Chunk boundaries inside keys, strings and escapes don't change the result."""
+        parser = ActionStreamParser()
+
+        emitted = _feed_in_chunks(parser, json.dumps({"actions": ACTIONS}), size)
+
+        assert [action for chunk in emitted for action in chunk] == ACTIONS
+        assert parser.actions == ACTIONS
+        assert parser.final_actions() == ACTIONS
+
+    def test_action_is_emitted_on_its_closing_brace(self):
+        """A partial action is held back until it is complete."""
+        parser = ActionStreamParser()
+
+        assert parser.feed('{"actions": [{"type": "click", "selector": "#next"') == []
+        assert parser.feed('}') == [{"type": "click", "selector": "#next"}]
+        assert parser.feed(', {"type": "wait"') == []
+        assert parser.feed('}]}') == [{"type": "wait"}]
+
+    def test_braces_and_quotes_inside_strings(self):
+        """Brackets and escaped quotes in string values aren't structure."""
+        parser = ActionStreamParser()
+        text = '{"actions": [{"type": "fill", "selector": "#bio", "value": "a } ] \\" [ {"}]}'
+
+        _feed_in_chunks(parser, text, 3)
+
+        assert parser.actions == json.loads(text)["actions"]
+
+    def test_other_keys_and_arrays_are_ignored(self):
+        """Only the array under the actions key is parsed, wherever the key appears."""
+        parser = ActionStreamParser()
+        text = json.dumps({
+            "thought": "click [the] {button}",
+            "notes": [{"type": "not an action"}],
+            "actions": ACTIONS[:1],
+            "after": [{"type": "also not an action"}]
+        })
+
+        _feed_in_chunks(parser, text, 5)
+
+        assert parser.actions == ACTIONS[:1]
+
+    def test_custom_key(self):
+        """Flow plans stream under another key."""
+        parser = ActionStreamParser(key="screens")
+
+        parser.feed('{"actions": [{"a": 1}], "screens": [{"stage": "intro"}]}')
+
+        assert parser.actions == [{"stage": "intro"}]
+
+
+class TestFinalActions:
+    """The complete response decides the final plan."""
+
+    def test_empty_array_is_a_valid_plan(self):
+        """A response with no actions is empty, not invalid."""
+        parser = ActionStreamParser()
+        parser.feed('{"actions": []}')
+
+        assert parser.final_actions() == []
+
+    def test_truncated_response_keeps_the_streamed_actions(self):
+        """Actions that already streamed survive a response cut off mid-array."""
+        parser = ActionStreamParser()
+        text = json.dumps({"actions": ACTIONS})
+        parser.feed(text[:text.index('{"type": "select"') + 10])
+
+        assert parser.final_actions() == ACTIONS[:2]
+
+    def test_invalid_response_without_actions(self):
+        """A response that isn't JSON and streamed no action is unusable."""
+        parser = ActionStreamParser()
+        parser.feed("I can't help with that.")
+
+        assert parser.final_actions() is None
+
+
+class TestParseActions:
+    """Complete responses are validated before their actions are used."""
+
+    @pytest.mark.parametrize("text", [
+        "not json",
+        "[]",
+        '{"steps": []}',
+        '{"actions": {"type": "click"}}',
+        '{"actions": ["click #next"]}',
+    ])
+    def test_invalid_responses(self, text):
+        """Anything but an object holding an array of objects is rejected."""
+        assert parse_actions(text) is None
+
+    def test_valid_response(self):
+        """The array under the key is returned as-is."""
+        assert parse_actions(json.dumps({"actions": ACTIONS})) == ACTIONS
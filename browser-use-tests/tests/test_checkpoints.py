@@ -0,0 +1,143 @@
+"""Tests for storage-state checkpoints and app build detection."""
+from typing import Dict, List
+
+import pytest
+
+import lib.checkpoints as checkpoints
+from lib.checkpoints import CheckpointStore, detect_build_id, signed_in_checkpoint
+
+
+STORAGE_STATE = {"cookies": [], "origins": [{"origin": "http://localhost:8081", "localStorage": []}]}
+
+
+class FakeResponse:
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+
+
+class FakeRequest:
+    """Answers HEAD requests with canned validators, failing for unknown URLs."""
+
+    def __init__(self, validators: Dict[str, Dict[str, str]]):
+        self.validators = validators
+
+    async def head(self, url: str) -> FakeResponse:
+        if url not in self.validators:
+            raise ConnectionError(f"HEAD {url} failed")
+        return FakeResponse(self.validators[url])
+
+
+class FakePage:
+    """A page that loaded the given bundles."""
+
+    def __init__(self, sources: List[str], validators: Dict[str, Dict[str, str]]):
+        self.sources = sources
+        self.request = FakeRequest(validators)
+
+    async def evaluate(self, script: str) -> List[str]:
+        return self.sources
+
+
+class TestCheckpointStore:
+    """Checkpoints are saved per name and only loaded on the same build."""
+
+    def test_save_then_load(self, tmp_path):
+        """A saved checkpoint loads on the build it was captured on."""
+        store = CheckpointStore(checkpoint_dir=str(tmp_path))
+
+        store.save("at_auth_screen", STORAGE_STATE, "http://localhost:8081/auth", "build-1")
+
+        checkpoint = store.load("at_auth_screen", "build-1")
+        assert checkpoint["storage_state"] == STORAGE_STATE
+        assert checkpoint["url"] == "http://localhost:8081/auth"
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_checkpoint_from_another_build_is_discarded(self, tmp_path):
+        """A rebuild of the app invalidates its checkpoints."""
+        store = CheckpointStore(checkpoint_dir=str(tmp_path))
+        store.save("at_auth_screen", STORAGE_STATE, "http://localhost:8081/auth", "build-1")
+
+        assert store.load("at_auth_screen", "build-2") is None
+        assert store.load("at_auth_screen", "build-1") is None
+
+    def test_names_with_unsafe_characters(self, tmp_path):
+        """Checkpoint names built from email addresses are stored under safe file names."""
+        store = CheckpointStore(checkpoint_dir=str(tmp_path))
+        name = signed_in_checkpoint("test.user+1@example.com")
+
+        store.save(name, STORAGE_STATE, "http://localhost:8081/home", "build-1")
+
+        assert store.load(name, "build-1") is not None
+        assert all("@" not in path.name and "+" not in path.name for path in tmp_path.iterdir())
+
+    def test_invalidate_and_missing_checkpoints(self, tmp_path):
+        """Invalidated and never-saved checkpoints don't load."""
+        store = CheckpointStore(checkpoint_dir=str(tmp_path))
+        store.save("at_auth_screen", STORAGE_STATE, "http://localhost:8081/auth", "build-1")
+
+        store.invalidate("at_auth_screen")
+        store.invalidate("never_saved")
+
+        assert store.load("at_auth_screen", "build-1") is None
+
+    def test_unreadable_checkpoint_is_discarded(self, tmp_path):
+        """A corrupt checkpoint file is ignored and removed."""
+        store = CheckpointStore(checkpoint_dir=str(tmp_path))
+        (tmp_path / "at_auth_screen.json").write_text("{not json")
+
+        assert store.load("at_auth_screen", "build-1") is None
+        assert not (tmp_path / "at_auth_screen.json").exists()
+
+    def test_disabled_store_saves_nothing(self, tmp_path):
+        """A disabled store never loads and never writes."""
+        store = CheckpointStore(checkpoint_dir=str(tmp_path / "checkpoints"), enabled=False)
+
+        store.save("at_auth_screen", STORAGE_STATE, "http://localhost:8081/auth", "build-1")
+
+        assert store.load("at_auth_screen", "build-1") is None
+        assert not (tmp_path / "checkpoints").exists()
+
+
+class TestDetectBuildId:
+    """The build is identified by its bundles and their validators."""
+
+    BUNDLE = "http://localhost:8081/static/js/main.js"
+    STYLES = "http://localhost:8081/static/css/main.css"
+
+    @pytest.mark.asyncio
+    async def test_configured_build_id_wins(self, monkeypatch):
+        """APP_BUILD_ID is used as-is without inspecting the page."""
+        monkeypatch.setattr(checkpoints, "APP_BUILD_ID", "abc123")
+
+        assert await detect_build_id(FakePage([self.BUNDLE], {})) == "abc123"
+
+    @pytest.mark.asyncio
+    async def test_same_bundles_same_build(self, monkeypatch):
+        """The bundle order on the page doesn't change the build id."""
+        monkeypatch.setattr(checkpoints, "APP_BUILD_ID", "")
+        validators = {self.BUNDLE: {"etag": "\"1\""}, self.STYLES: {"etag": "\"2\""}}
+
+        first = await detect_build_id(FakePage([self.BUNDLE, self.STYLES], validators))
+        second = await detect_build_id(FakePage([self.STYLES, self.BUNDLE], validators))
+
+        assert first == second
+
+    @pytest.mark.asyncio
+    async def test_rebuilt_bundle_changes_the_build(self, monkeypatch):
+        """A new validator for the same bundle URL is a new build."""
+        monkeypatch.setattr(checkpoints, "APP_BUILD_ID", "")
+
+        before = await detect_build_id(FakePage([self.BUNDLE], {self.BUNDLE: {"etag": "\"1\""}}))
+        after = await detect_build_id(FakePage([self.BUNDLE], {self.BUNDLE: {"etag": "\"2\""}}))
+
+        assert before != after
+
+    @pytest.mark.asyncio
+    async def test_unreachable_bundle_still_identifies_the_build(self, monkeypatch):
+        """A bundle whose validators can't be read is identified by its URL alone."""
+        monkeypatch.setattr(checkpoints, "APP_BUILD_ID", "")
+
+        build_id = await detect_build_id(FakePage([self.BUNDLE], {}))
+
+        assert build_id == await detect_build_id(FakePage([self.BUNDLE], {}))
+        assert build_id != await detect_build_id(FakePage([self.STYLES], {}))
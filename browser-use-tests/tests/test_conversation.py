@@ -0,0 +1,134 @@
+"""Tests for page snapshot diffs and stateful planning conversations."""
+from typing import Any, Dict, Optional
+
+from lib.conversation import ConversationSession
+from lib.dom_snapshot import DomSnapshot, diff_snapshots
+
+
+URL = "http://localhost:8081/signup"
+
+
+def _element(name: str, role: str = "button", bbox=(0, 0, 100, 40), **state) -> Dict[str, Any]:
+    return {"role": role, "name": name, "selector": f"role={role}[name=\"{name}\"]", "bbox": bbox, "state": state}
+
+
+def _snapshot(*records: Dict[str, Any], url: str = URL) -> DomSnapshot:
+    return DomSnapshot.from_records(url, list(records))
+
+
+def _full_prompt(task: str, page_content: str, context: Optional[str]) -> str:
+    return f"FULL\n{page_content}\n{context or ''}\n{task}"
+
+
+SIGNUP = _snapshot(*(_element(name) for name in ("Email", "Password", "Confirm", "Terms", "Create account")))
+
+
+class TestDiffSnapshots:
+    """Diffs list what was added, removed and changed, matched by selector."""
+
+    def test_added_removed_and_changed(self):
+        """Each kind of change is reported with the element's current index."""
+        before = _snapshot(_element("Next"), _element("Skip"), _element("Agree", role="checkbox"))
+        after = _snapshot(_element("Agree", role="checkbox", checked=True), _element("Next"), _element("Back"))
+
+        diff = diff_snapshots(before, after)
+
+        assert [element.name for element in diff.removed] == ["Skip"]
+        assert [(i, element.name) for i, element in diff.added] == [(2, "Back")]
+        assert [(i, new.state) for i, old, new in diff.changed] == [(0, {"checked": True})]
+        assert diff.size == 3
+
+    def test_layout_changes_are_ignored(self):
+        """Moving or resizing an element isn't a change."""
+        before = _snapshot(_element("Next", bbox=(0, 0, 100, 40)))
+        after = _snapshot(_element("Next", bbox=(10, 300, 120, 44)))
+
+        assert diff_snapshots(before, after).size == 0
+
+    def test_prompt_text(self):
+        """The prompt names the new URL and each change."""
+        diff = diff_snapshots(_snapshot(_element("Next")), _snapshot(_element("Done"), url=f"{URL}/done"))
+
+        prompt = diff.to_prompt()
+
+        assert prompt.startswith(f"URL: {URL}/done")
+        assert "Removed:\n- button \"Next\"" in prompt
+        assert "Added:\n[0] button \"Done\"" in prompt
+        assert "URL: unchanged\nNo elements changed." == diff_snapshots(SIGNUP, SIGNUP).to_prompt()
+
+    def test_html_snapshots_have_no_diff(self):
+        """Raw HTML fallbacks can't be diffed."""
+        assert diff_snapshots(DomSnapshot.from_html(URL, "<body></body>"), SIGNUP) is None
+
+
+class TestConversationSession:
+    """The first turn sends the full page, later turns send what changed."""
+
+    def test_first_turn_is_a_full_snapshot(self):
+        """Without history the stateless prompt is used."""
+        session = ConversationSession()
+
+        prompt = session.next_prompt("Fill in the email", None, SIGNUP, _full_prompt)
+
+        assert prompt.startswith("FULL")
+        assert session.full_turns == 1
+
+    def test_later_turns_send_the_diff_and_outcomes(self):
+        """After a committed turn, the next prompt carries the diff and what happened since."""
+        session = ConversationSession()
+        session.next_prompt("Fill in the email", None, SIGNUP, _full_prompt)
+        session.add_reply([{"type": "fill", "selector": "#email", "value": "a@b.c"}])
+        session.record_outcome("Fill in the email", [{"action": {"type": "fill"}, "success": True}])
+        after = _snapshot(*(_element(name, value="a@b.c") if name == "Email" else _element(name)
+                            for name in ("Email", "Password", "Confirm", "Terms", "Create account")))
+
+        prompt = session.next_prompt("Fill in the password", "Sign-up form", after, _full_prompt)
+
+        assert not prompt.startswith("FULL")
+        assert "Next task:\nFill in the password" in prompt
+        assert "- Fill in the email: 1 action(s) succeeded" in prompt
+        assert "Changed (before => after):" in prompt
+        assert "Additional context:\nSign-up form" in prompt
+        assert len(session.history) == 2
+        assert session.diff_turns == 1
+
+    def test_uncommitted_turn_leaves_the_history(self):
+        """A prompt whose answer is never added doesn't enter the history."""
+        session = ConversationSession()
+
+        session.next_prompt("Fill in the email", None, SIGNUP, _full_prompt)
+        session.next_prompt("Fill in the email", None, SIGNUP, _full_prompt)
+
+        assert session.history == []
+        assert session.last_snapshot is None
+
+    def test_large_change_starts_over(self):
+        """A new screen is sent in full instead of as a diff larger than the page."""
+        session = ConversationSession(max_diff_ratio=0.5)
+        session.next_prompt("Accept the terms", None, SIGNUP, _full_prompt)
+        session.add_reply([])
+
+        prompt = session.next_prompt("Pick a type", None, _snapshot(_element("INTJ"), _element("ENFP")), _full_prompt)
+
+        assert prompt.startswith("FULL")
+        assert session.history == []
+
+    def test_history_is_capped(self):
+        """After max_turns turns the history starts over with a full snapshot."""
+        session = ConversationSession(max_turns=2)
+        prompts = []
+        for turn in range(3):
+            prompts.append(session.next_prompt(f"Task {turn}", None, SIGNUP, _full_prompt))
+            session.add_reply([])
+
+        assert [prompt.startswith("FULL") for prompt in prompts] == [True, False, True]
+
+    def test_failures_are_reported(self):
+        """Failed actions are reported with their error."""
+        session = ConversationSession()
+
+        session.record_outcome("Submit", [
+            {"action": {"type": "click", "selector": "#submit"}, "success": False, "error": "Timeout"}
+        ])
+
+        assert session.pending_outcomes == ["- Submit: failed (click #submit: Timeout)"]
@@ -0,0 +1,76 @@
+"""Tests for multi-screen flow plans."""
+from lib.flows import FlowScreen, FlowStage, parse_flow_plan, plan_to_json, stages_key
+
+
+STAGES = [
+    FlowStage("welcome", "Click Get Started"),
+    FlowStage("intro", "Click Next", context="Intro screen 1 of 3"),
+    FlowStage("auth", "Click Sign Up"),
+]
+
+SCREENS = [
+    {"stage": "welcome", "expect": {"text": "Welcome"},
+     "actions": [{"type": "click", "selector": "text=Get Started"}], "wait_for": {"url_contains": "/intro"}},
+    {"stage": "intro", "expect": {"selector": "[data-testid=\"intro\"]"},
+     "actions": [{"type": "click", "selector": "text=Next"}]},
+    {"stage": "auth", "actions": [{"type": "click", "selector": "text=Sign Up"}]},
+]
+
+
+class TestParseFlowPlan:
+    """The model's screens are matched to the stages in order."""
+
+    def test_screens_map_to_stages(self):
+        """Each screen becomes the plan for the stage at its position, with defaults for missing keys."""
+        plan = parse_flow_plan(SCREENS, STAGES)
+
+        assert [screen.stage for screen in plan] == ["welcome", "intro", "auth"]
+        assert plan[0].wait_for == {"url_contains": "/intro"}
+        assert plan[1].wait_for == {}
+        assert plan[2].expect == {}
+        assert plan[2].actions == [{"type": "click", "selector": "text=Sign Up"}]
+
+    def test_fewer_screens_than_stages(self):
+        """A plan that stops early covers only the leading stages."""
+        plan = parse_flow_plan(SCREENS[:2], STAGES)
+
+        assert [screen.stage for screen in plan] == ["welcome", "intro"]
+
+    def test_extra_screens_are_ignored(self):
+        """Screens beyond the requested stages are dropped."""
+        plan = parse_flow_plan(SCREENS + [{"stage": "signup", "actions": []}], STAGES)
+
+        assert len(plan) == 3
+
+    def test_misnamed_screen_takes_its_position(self):
+        """A screen the model named differently still plans the stage at its position."""
+        plan = parse_flow_plan([{"stage": "landing", "actions": [{"type": "click", "selector": "#go"}]}], STAGES)
+
+        assert plan[0].stage == "welcome"
+        assert plan[0].actions == [{"type": "click", "selector": "#go"}]
+
+    def test_null_fields_default_to_empty(self):
+        """Null conditions and actions are treated as empty."""
+        plan = parse_flow_plan([{"stage": "welcome", "expect": None, "actions": None, "wait_for": None}], STAGES)
+
+        assert plan == [FlowScreen("welcome")]
+
+    def test_cached_plan_round_trips(self):
+        """A plan serialized for the cache parses back to the same plan."""
+        plan = parse_flow_plan(SCREENS, STAGES)
+
+        assert parse_flow_plan(plan_to_json(plan), STAGES) == plan
+
+
+class TestStagesKey:
+    """Cache keys of the remaining stages."""
+
+    def test_whitespace_does_not_matter(self):
+        """Reformatting a task keeps its key."""
+        reformatted = [FlowStage("welcome", "  Click   Get Started\n")] + STAGES[1:]
+
+        assert stages_key(reformatted) == stages_key(STAGES)
+
+    def test_remaining_stages_change_the_key(self):
+        """A replan from a later stage uses another key."""
+        assert stages_key(STAGES[1:]) != stages_key(STAGES)
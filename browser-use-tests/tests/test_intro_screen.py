@@ -67,7 +67,7 @@ class TestIntroScreen(BaseLLMTest):
             "Click the Get Started button on the initial Welcome screen",
             context="Look for a prominent button on the very first screen"
         )
-        await asyncio.sleep(1)
+        await browser.wait_for_settle()
         
         # Step 2: Analyze the FIRST intro screen
         first_screen_context = """
@@ -94,7 +94,7 @@ class TestIntroScreen(BaseLLMTest):
             "Click the Continue button to proceed to the next screen",
             context="Look for a button at the bottom of the screen"
         )
-        await asyncio.sleep(1.5)
+        await browser.wait_for_settle()
         
         # Step 3: Analyze the SECOND intro screen
         second_screen_context = """
@@ -121,7 +121,7 @@ class TestIntroScreen(BaseLLMTest):
             "Click the Continue button to proceed to the next screen",
             context="Look for a button at the bottom of the screen"
         )
-        await asyncio.sleep(1.5)
+        await browser.wait_for_settle()
         
         # Step 4: Analyze the THIRD intro screen
         third_screen_context = """
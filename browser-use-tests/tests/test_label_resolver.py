@@ -0,0 +1,156 @@
+"""Tests for resolving single-click tasks without the LLM."""
+from typing import Any, Dict, Optional
+
+import pytest
+
+from lib.dom_snapshot import DomSnapshot
+from lib.label_resolver import extract_labels, match_labels, resolve_click
+
+
+def _element(name: str, role: str = "button", selector: Optional[str] = None, **state) -> Dict[str, Any]:
+    return {"role": role, "name": name, "selector": selector or f"role={role}[name=\"{name}\"]", "state": state}
+
+
+def _snapshot(*records: Dict[str, Any]) -> DomSnapshot:
+    return DomSnapshot.from_records("http://localhost:8081/auth", list(records))
+
+
+class FakeLocator:
+    def __init__(self, count: int, visible: bool):
+        self._count = count
+        self._visible = visible
+
+    async def count(self) -> int:
+        return self._count
+
+    async def is_visible(self) -> bool:
+        return self._visible
+
+
+class FakePage:
+    """Answers locator queries from a table of selector -> (count, visible)."""
+
+    def __init__(self, matches: Dict[str, tuple]):
+        self.matches = matches
+
+    def locator(self, selector: str) -> FakeLocator:
+        return FakeLocator(*self.matches.get(selector, (0, False)))
+
+
+AUTH_SCREEN = _snapshot(
+    _element("Sign In"),
+    _element("Sign Up"),
+    _element("Forgot password?", role="link"),
+    _element("Welcome back", role="heading"),
+)
+
+
+class TestExtractLabels:
+    """Only single clicks on a named control are resolved locally."""
+
+    @pytest.mark.parametrize("task, labels", [
+        ("Click the Continue button", ["Continue"]),
+        ("Find and click the Done button", ["Done"]),
+        ("Click the Sign Up or Create Account button", ["Sign Up", "Create Account"]),
+        ('Tap "Get Started"', ["Get Started"]),
+        ("Click the Next/Continue button to proceed", ["Next", "Continue"]),
+    ])
+    def test_single_click_tasks(self, task, labels):
+        """The named control's labels are extracted, alternatives included."""
+        assert extract_labels(task) == labels
+
+    @pytest.mark.parametrize("task", [
+        "Click the Sign Up button and fill in the form",
+        "Click the Next button, then the Done button",
+        "Fill in the email field",
+        "Click the appropriate button",
+        "Click the button",
+    ])
+    def test_other_tasks(self, task):
+        """Compound tasks, other actions and generic targets go to the LLM."""
+        assert extract_labels(task) == []
+
+    def test_context_adds_quoted_labels(self):
+        """Quoted labels in the step context are extra candidates."""
+        assert extract_labels("Click the Next button", 'The button may read "Continue"') == ["Next", "Continue"]
+
+
+class TestMatchLabels:
+    """Labels match visible clickable controls by exact accessible name."""
+
+    def test_case_and_whitespace_insensitive(self):
+        """Matching ignores case and spacing but not other words."""
+        matches = match_labels(AUTH_SCREEN, ["sign  in"])
+
+        assert [element.name for element in matches] == ["Sign In"]
+
+    def test_headings_are_not_clickable(self):
+        """A heading with the label's text isn't a control."""
+        assert match_labels(AUTH_SCREEN, ["Welcome back"]) == []
+
+
+class TestResolveClick:
+    """A click is planned only when exactly one usable control matches."""
+
+    @pytest.mark.asyncio
+    async def test_unique_match(self):
+        """One visible match becomes a click on its selector."""
+        page = FakePage({"role=button[name=\"Sign Up\"]": (1, True)})
+
+        action = await resolve_click(page, AUTH_SCREEN, "Click the Sign Up button")
+
+        assert action["type"] == "click"
+        assert action["selector"] == "role=button[name=\"Sign Up\"]"
+
+    @pytest.mark.asyncio
+    async def test_ambiguous_alternatives(self):
+        """A task whose alternatives match two controls is left to the LLM."""
+        page = FakePage({"role=button[name=\"Sign In\"]": (1, True), "role=button[name=\"Sign Up\"]": (1, True)})
+
+        assert await resolve_click(page, AUTH_SCREEN, "Click the Sign In or Sign Up button") is None
+
+    @pytest.mark.asyncio
+    async def test_compound_task(self):
+        """A click followed by more work is left to the LLM even if the control is unique."""
+        page = FakePage({"role=button[name=\"Sign Up\"]": (1, True)})
+
+        assert await resolve_click(page, AUTH_SCREEN, "Click the Sign Up button and enter your email") is None
+
+    @pytest.mark.asyncio
+    async def test_duplicate_controls(self):
+        """Two controls with the same name are ambiguous."""
+        snapshot = _snapshot(_element("Next", selector="text=\"Next\""), _element("Next", selector="text=\"Next\""))
+        page = FakePage({"text=\"Next\" >> nth=0": (1, True)})
+
+        assert await resolve_click(page, snapshot, "Click the Next button") is None
+
+    @pytest.mark.asyncio
+    async def test_disabled_control(self):
+        """A disabled match can't be clicked yet."""
+        snapshot = _snapshot(_element("Continue", disabled=True))
+        page = FakePage({"role=button[name=\"Continue\"]": (1, True)})
+
+        assert await resolve_click(page, snapshot, "Click the Continue button") is None
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_exact_text(self):
+        """A selector that doesn't pick out one control on the live page falls back to the control's text."""
+        page = FakePage({"role=button[name=\"Sign Up\"]": (2, True), "text=\"Sign Up\"": (1, True)})
+
+        action = await resolve_click(page, AUTH_SCREEN, "Click the Sign Up button")
+
+        assert action["selector"] == "text=\"Sign Up\""
+
+    @pytest.mark.asyncio
+    async def test_no_usable_selector(self):
+        """A control no selector can pick out on the live page is left to the LLM."""
+        page = FakePage({"role=button[name=\"Sign Up\"]": (1, False)})
+
+        assert await resolve_click(page, AUTH_SCREEN, "Click the Sign Up button") is None
+
+    @pytest.mark.asyncio
+    async def test_html_snapshot(self):
+        """Raw HTML snapshots have no elements to match."""
+        snapshot = DomSnapshot.from_html("http://localhost:8081/auth", "<button>Sign Up</button>")
+
+        assert await resolve_click(FakePage({}), snapshot, "Click the Sign Up button") is None
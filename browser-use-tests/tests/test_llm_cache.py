@@ -0,0 +1,109 @@
+"""Tests for the on-disk LLM result cache."""
+import json
+import os
+import time
+
+from lib.llm_cache import LLMCache, page_fingerprint
+
+
+def _key(task: str, prompt: str = "system prompt") -> str:
+    return LLMCache.make_key("actions", "gpt-4o-mini", task, None, "fingerprint", prompt=prompt)
+
+
+class TestLLMCacheKeys:
+    """Cache keys identify the request, not its formatting."""
+
+    def test_key_ignores_case_and_whitespace(self):
+        """Task text differing only in case and spacing maps to the same key."""
+        assert _key("Click the  Continue button") == _key("click the continue button\n")
+
+    def test_key_depends_on_the_system_prompt(self):
+        """Editing the system prompt retires results cached with the old one."""
+        assert _key("Click Continue", prompt="v1") != _key("Click Continue", prompt="v2")
+
+    def test_page_fingerprint_ignores_scripts_styles_and_classes(self):
+        """Two renders of the same screen fingerprint the same."""
+        first = '<div class="a1" style="color:red"><button>Next</button></div><script>var t = 1;</script>'
+        second = '<div class="b2"><button>Next</button></div><style>.b2 {}</style>'
+
+        assert page_fingerprint(first) == page_fingerprint(second)
+        assert page_fingerprint(first) != page_fingerprint("<div><button>Back</button></div>")
+
+
+class TestLLMCache:
+    """Entries are stored, expired and evicted on disk."""
+
+    def test_set_then_get(self, tmp_path):
+        """A stored value is returned for its key."""
+        cache = LLMCache(cache_dir=str(tmp_path))
+        actions = [{"type": "click", "selector": "#next"}]
+
+        cache.set(_key("Click Next"), actions)
+
+        assert cache.get(_key("Click Next")) == actions
+        assert cache.get(_key("Click Back")) is None
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_invalidate_removes_the_entry(self, tmp_path):
+        """An invalidated entry is a miss."""
+        cache = LLMCache(cache_dir=str(tmp_path))
+        cache.set(_key("Click Next"), [])
+
+        cache.invalidate(_key("Click Next"))
+
+        assert cache.get(_key("Click Next")) is None
+
+    def test_expired_entry_is_a_miss(self, tmp_path):
+        """Entries older than max_age_hours are discarded on read."""
+        cache = LLMCache(cache_dir=str(tmp_path), max_age_hours=1)
+        key = _key("Click Next")
+        with open(tmp_path / f"{key}.json", "w") as f:
+            json.dump({"created": time.time() - 7200, "value": []}, f)
+
+        assert cache.get(key) is None
+        assert not (tmp_path / f"{key}.json").exists()
+
+    def test_unreadable_entry_is_discarded(self, tmp_path):
+        """A corrupt entry is a miss and is removed."""
+        cache = LLMCache(cache_dir=str(tmp_path))
+        key = _key("Click Next")
+        (tmp_path / f"{key}.json").write_text("{not json")
+
+        assert cache.get(key) is None
+        assert not (tmp_path / f"{key}.json").exists()
+
+    def test_eviction_drops_least_recently_used(self, tmp_path):
+        """Beyond max_entries, the entries used longest ago are evicted."""
+        cache = LLMCache(cache_dir=str(tmp_path), max_entries=2)
+        now = time.time()
+        for age, task in ((30, "old"), (20, "recent"), (10, "newest")):
+            cache.set(_key(task), task)
+            os.utime(tmp_path / f"{_key(task)}.json", (now - age, now - age))
+
+        cache.set(_key("new"), "new")
+
+        assert cache.get(_key("old")) is None
+        assert cache.get(_key("recent")) is None
+        assert cache.get(_key("newest")) == "newest"
+        assert cache.get(_key("new")) == "new"
+
+    def test_eviction_keeps_files_that_are_not_entries(self, tmp_path):
+        """Other caches sharing the directory are never evicted."""
+        other = tmp_path / "screen_classifications.json"
+        other.write_text("[]")
+        os.utime(other, (0, 0))
+        cache = LLMCache(cache_dir=str(tmp_path), max_entries=1)
+
+        cache.set(_key("Click Next"), [])
+        cache.set(_key("Click Back"), [])
+
+        assert other.exists()
+
+    def test_disabled_cache_stores_nothing(self, tmp_path):
+        """A disabled cache never hits and never writes."""
+        cache = LLMCache(cache_dir=str(tmp_path / "cache"), enabled=False)
+
+        cache.set(_key("Click Next"), [])
+
+        assert cache.get(_key("Click Next")) is None
+        assert not (tmp_path / "cache").exists()
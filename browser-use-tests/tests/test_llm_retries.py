@@ -0,0 +1,112 @@
+"""Tests for classifying and pacing retries of failed LLM requests."""
+import time
+from email.utils import formatdate
+from typing import Dict, Optional, Type
+
+import openai
+import pytest
+
+from lib.llm_client import is_retryable, retry_after_seconds
+
+
+class FakeResponse:
+    """The part of an HTTP response the retry logic reads."""
+
+    def __init__(self, status_code: int, headers: Dict[str, str]):
+        self.status_code = status_code
+        self.headers = headers
+
+
+def _error(error_type: Type[openai.OpenAIError], **attributes) -> openai.OpenAIError:
+    # Built without the client's HTTP types, which differ between openai releases
+    error = error_type.__new__(error_type)
+    Exception.__init__(error, "request failed")
+    for name, value in attributes.items():
+        setattr(error, name, value)
+    return error
+
+
+def _status_error(error_type: Type[openai.APIStatusError],
+                  status: int,
+                  headers: Optional[Dict[str, str]] = None,
+                  code: Optional[str] = None) -> openai.APIStatusError:
+    return _error(error_type, response=FakeResponse(status, headers or {}), status_code=status, code=code)
+
+
+class TestRetryAfterSeconds:
+    """The wait the server asks for is read from retry-after-ms or retry-after."""
+
+    def test_milliseconds(self):
+        """retry-after-ms is converted to seconds."""
+        error = _status_error(openai.RateLimitError, 429, {"retry-after-ms": "1500"})
+
+        assert retry_after_seconds(error) == 1.5
+
+    def test_seconds(self):
+        """A numeric retry-after is in seconds."""
+        error = _status_error(openai.RateLimitError, 429, {"retry-after": "3"})
+
+        assert retry_after_seconds(error) == 3.0
+
+    def test_http_date(self):
+        """An HTTP-date retry-after is the time left until that date."""
+        error = _status_error(openai.RateLimitError, 429, {"retry-after": formatdate(time.time() + 30, usegmt=True)})
+
+        assert 25 <= retry_after_seconds(error) <= 30
+
+    def test_http_date_in_the_past(self):
+        """A date that has already passed means no wait."""
+        error = _status_error(openai.RateLimitError, 429, {"retry-after": formatdate(time.time() - 30, usegmt=True)})
+
+        assert retry_after_seconds(error) == 0.0
+
+    def test_milliseconds_take_precedence(self):
+        """retry-after-ms is more precise than retry-after."""
+        error = _status_error(openai.RateLimitError, 429, {"retry-after-ms": "250", "retry-after": "1"})
+
+        assert retry_after_seconds(error) == 0.25
+
+    def test_unparseable_milliseconds_fall_back_to_retry_after(self):
+        """A malformed retry-after-ms doesn't hide a valid retry-after."""
+        error = _status_error(openai.RateLimitError, 429, {"retry-after-ms": "soon", "retry-after": "3"})
+
+        assert retry_after_seconds(error) == 3.0
+
+    @pytest.mark.parametrize("headers", [{}, {"retry-after": "soon"}, {"retry-after-ms": "soon"}])
+    def test_no_usable_header(self, headers):
+        """Missing or malformed headers leave the wait to the backoff."""
+        assert retry_after_seconds(_status_error(openai.RateLimitError, 429, headers)) is None
+
+    def test_error_without_response(self):
+        """Connection errors have no response to read."""
+        assert retry_after_seconds(_error(openai.APIConnectionError)) is None
+
+
+class TestIsRetryable:
+    """Transient failures are retried; requests that can never succeed are not."""
+
+    def test_rate_limit(self):
+        """Throttled requests are retried."""
+        assert is_retryable(_status_error(openai.RateLimitError, 429))
+
+    def test_exhausted_quota(self):
+        """A 429 for an exhausted quota won't clear up by waiting."""
+        error = _status_error(openai.RateLimitError, 429, code="insufficient_quota")
+
+        assert not is_retryable(error)
+
+    def test_server_errors(self):
+        """5xx responses are retried."""
+        assert is_retryable(_status_error(openai.InternalServerError, 500))
+        assert is_retryable(_status_error(openai.APIStatusError, 503))
+
+    def test_timeouts_and_connection_errors(self):
+        """Requests that never got a response are retried."""
+        assert is_retryable(_error(openai.APITimeoutError))
+        assert is_retryable(_error(openai.APIConnectionError))
+
+    def test_client_errors(self):
+        """4xx responses other than 429 and unrelated exceptions are not retried."""
+        assert not is_retryable(_status_error(openai.BadRequestError, 400))
+        assert not is_retryable(_status_error(openai.AuthenticationError, 401))
+        assert not is_retryable(ValueError("not an API error"))
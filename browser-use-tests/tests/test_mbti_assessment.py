@@ -2,15 +2,20 @@
 import pytest
 import asyncio
 from typing import Dict, Any
+from urllib.parse import urlparse
 from loguru import logger
 
-from lib.base_test import BaseLLMTest
+from lib.base_test import BaseLLMTest, StepSpec
+from lib.checkpoints import signed_in_checkpoint
 from lib.utils import load_test_data, save_test_data, generate_random_email, generate_random_password
 
 
 class TestMBTIAssessment(BaseLLMTest):
     """Test the MBTI assessment workflow specifically."""
     
+    # The trait selections differ only by a few toggled options, so send diffs
+    llm_conversation = True
+    
     @pytest.mark.asyncio
     async def test_mbti_assessment_completion(self, browser):
         """Test the MBTI assessment completion process."""
@@ -57,7 +62,7 @@ class TestMBTIAssessment(BaseLLMTest):
         assert result["success"], "Failed to select MBTI assessment"
         
         await browser._save_screenshot("mbti_selected")
-        await asyncio.sleep(1)
+        await browser.wait_for_settle()
         
         # Step 3: Complete each trait section one by one
         # Note: The UI might present each trait on separate screens or all on one screen
@@ -73,16 +78,6 @@ class TestMBTIAssessment(BaseLLMTest):
         If after selecting, there's a "Next" button to proceed to the next trait, click it.
         """
         
-        result = await self.execute_step(
-            browser,
-            "Select Extraversion (E) over Introversion (I) and proceed if needed",
-            context=ei_context
-        )
-        assert result["success"], "Failed to select Extraversion"
-        
-        await browser._save_screenshot("e_selected")
-        await asyncio.sleep(1)
-        
         # 3.2: Sensing vs Intuition
         sn_context = """
         We need to select Intuition (N) over Sensing (S).
@@ -93,16 +88,6 @@ class TestMBTIAssessment(BaseLLMTest):
         If after selecting, there's a "Next" button to proceed to the next trait, click it.
         """
         
-        result = await self.execute_step(
-            browser,
-            "Select Intuition (N) over Sensing (S) and proceed if needed",
-            context=sn_context
-        )
-        assert result["success"], "Failed to select Intuition"
-        
-        await browser._save_screenshot("n_selected")
-        await asyncio.sleep(1)
-        
         # 3.3: Thinking vs Feeling
         tf_context = """
         We need to select Feeling (F) over Thinking (T).
@@ -113,16 +98,6 @@ class TestMBTIAssessment(BaseLLMTest):
         If after selecting, there's a "Next" button to proceed to the next trait, click it.
         """
         
-        result = await self.execute_step(
-            browser,
-            "Select Feeling (F) over Thinking (T) and proceed if needed",
-            context=tf_context
-        )
-        assert result["success"], "Failed to select Feeling"
-        
-        await browser._save_screenshot("f_selected")
-        await asyncio.sleep(1)
-        
         # 3.4: Judging vs Perceiving
         jp_context = """
         We need to select Perceiving (P) over Judging (J).
@@ -133,16 +108,6 @@ class TestMBTIAssessment(BaseLLMTest):
         If this is the last trait, there might be a "Done" or "Complete" button instead of "Next".
         """
         
-        result = await self.execute_step(
-            browser,
-            "Select Perceiving (P) over Judging (J) and click Done if it's the last trait",
-            context=jp_context
-        )
-        assert result["success"], "Failed to select Perceiving"
-        
-        await browser._save_screenshot("p_selected")
-        await asyncio.sleep(1)
-        
         # Check if we need to explicitly submit the assessment
         submit_check_context = """
         Check if we need to submit the assessment:
@@ -152,14 +117,24 @@ class TestMBTIAssessment(BaseLLMTest):
         Look for any submit button and click it if found.
         """
         
-        result = await self.execute_step(
-            browser,
-            "Submit the completed MBTI assessment if needed",
-            context=submit_check_context
-        )
-        
-        await browser._save_screenshot("mbti_submitted")
-        await asyncio.sleep(2)
+        # Each trait is planned while the previous selection's transition finishes
+        steps = [
+            StepSpec("Select Extraversion (E) over Introversion (I) and proceed if needed", ei_context,
+                     name="Extraversion", screenshot="e_selected"),
+            StepSpec("Select Intuition (N) over Sensing (S) and proceed if needed", sn_context,
+                     name="Intuition", screenshot="n_selected"),
+            StepSpec("Select Feeling (F) over Thinking (T) and proceed if needed", tf_context,
+                     name="Feeling", screenshot="f_selected"),
+            StepSpec("Select Perceiving (P) over Judging (J) and click Done if it's the last trait", jp_context,
+                     name="Perceiving", screenshot="p_selected"),
+            StepSpec("Submit the completed MBTI assessment if needed", submit_check_context,
+                     name="submit", screenshot="mbti_submitted", required=False)
+        ]
+        
+        results = await self.execute_sequence(browser, steps)
+        for step, result in zip(steps, results):
+            if step.required:
+                assert result["success"], f"Failed to select {step.name}"
         
         # Step 5: Verify assessment was saved and handle Almost Done screen
         verify_context = """
@@ -179,7 +154,7 @@ class TestMBTIAssessment(BaseLLMTest):
         )
         assert result["success"], "Failed to verify MBTI assessment was saved"
         
-        await asyncio.sleep(1)
+        await browser.wait_for_settle()
         
         # Test completed successfully
         logger.success("Successfully completed MBTI assessment with result ENFP")
@@ -214,10 +189,21 @@ class TestMBTIAssessment(BaseLLMTest):
             "Click the Next or Continue button to proceed to assessment selection",
             context="Look for a button at the bottom of the Welcome screen to continue to assessment selection"
         )
-        await asyncio.sleep(1)
+        await browser.wait_for_settle()
     
     async def _perform_signin(self, browser, email, password):
-        """Quick sign in helper method."""
+        """Quick sign in helper method, starting from a signed-in checkpoint when available."""
+        result = await self.reach_checkpoint(
+            browser,
+            signed_in_checkpoint(email),
+            lambda b: self._sign_in_through_ui(b, email, password)
+        )
+        if not result.get("success", False):
+            logger.error(f"Failed to sign in: {result.get('error', 'Unknown error')}")
+            raise AssertionError(f"Failed to sign in: {result.get('error', 'Unknown error')}")
+    
+    async def _sign_in_through_ui(self, browser, email, password):
+        """Sign in through the intro, auth and sign in screens."""
         # Navigate to sign in screen using the shared helper
         result = await self.navigate_to_signin_screen(browser)
         if not result.get("success", False):
@@ -232,12 +218,20 @@ class TestMBTIAssessment(BaseLLMTest):
         Then submit the form by clicking the Sign In button.
         """
         
-        await self.execute_step(
+        signin_path = urlparse(browser.page.url).path
+        result = await self.execute_step(
             browser,
             "Complete the sign in form and submit",
             context=signin_context
         )
-        await asyncio.sleep(2)
+        await browser.wait_for_settle()
+        
+        # The form actions succeeding doesn't mean the app accepted the credentials; a rejected
+        # sign in stays on the sign in screen and must not be saved as a signed-in checkpoint
+        if result.get("success", False) and urlparse(browser.page.url).path == signin_path:
+            logger.error(f"Still on the sign in screen ({browser.page.url}) after submitting the form")
+            return {"success": False, "stage": "signin", "error": "Sign in was not accepted"}
+        return result
     
     async def _navigate_to_assessment_screen(self, browser):
         """Helper to navigate to the assessment screen."""
@@ -277,7 +271,7 @@ class TestMBTIAssessment(BaseLLMTest):
             )
             
             await browser._save_screenshot("after_clicking_add_assessment")
-            await asyncio.sleep(1)
+            await browser.wait_for_settle()
 
 
 if __name__ == "__main__":
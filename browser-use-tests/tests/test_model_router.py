@@ -0,0 +1,96 @@
+"""Tests for tiered model routing."""
+import json
+
+from lib.model_router import ModelRouter
+
+
+TIERS = ["gpt-4o-mini", "gpt-4o"]
+STEP = "Click the Continue button"
+
+
+def _router(tmp_path, **options) -> ModelRouter:
+    options = {"tiers": TIERS, "min_samples": 3, "min_success_rate": 0.6, "enabled": True, **options}
+    return ModelRouter(stats_dir=str(tmp_path), **options)
+
+
+class TestModelRouter:
+    """Steps start on the cheapest tier that keeps succeeding for them."""
+
+    def test_new_step_starts_on_the_cheapest_tier(self, tmp_path):
+        """Without statistics every tier is tried, cheapest first."""
+        router = _router(tmp_path)
+
+        assert router.escalation(router.task_key(STEP)) == TIERS
+
+    def test_disabled_router_uses_the_default_model(self, tmp_path):
+        """A disabled router, or one without tiers, leaves the model to the browser."""
+        assert _router(tmp_path, enabled=False).escalation("key") == [None]
+        assert _router(tmp_path, tiers=[]).escalation("key") == [None]
+        assert _router(tmp_path, enabled=False).is_strongest("gpt-4o-mini")
+
+    def test_failing_tier_is_skipped_once_trusted(self, tmp_path):
+        """A step the cheap tier keeps failing starts on the stronger tier after min_samples attempts."""
+        router = _router(tmp_path)
+        key = router.task_key(STEP)
+
+        router.record(key, STEP, "gpt-4o-mini", False)
+        router.record(key, STEP, "gpt-4o-mini", False)
+        assert router.escalation(key) == TIERS
+
+        router.record(key, STEP, "gpt-4o-mini", False)
+        assert router.escalation(key) == ["gpt-4o"]
+        assert router.is_strongest("gpt-4o")
+        assert not router.is_strongest("gpt-4o-mini")
+
+    def test_mostly_succeeding_tier_is_kept(self, tmp_path):
+        """A success rate at or above min_success_rate keeps the cheap tier."""
+        router = _router(tmp_path)
+        key = router.task_key(STEP)
+
+        for success in (True, True, False):
+            router.record(key, STEP, "gpt-4o-mini", success)
+
+        assert router.escalation(key) == TIERS
+
+    def test_statistics_are_per_step(self, tmp_path):
+        """Failures of one step don't move another step off the cheap tier."""
+        router = _router(tmp_path)
+        for _ in range(3):
+            router.record(router.task_key(STEP), STEP, "gpt-4o-mini", False)
+
+        assert router.escalation(router.task_key("Click the Back button")) == TIERS
+
+    def test_task_key_ignores_formatting(self, tmp_path):
+        """Case and whitespace don't split a step's statistics."""
+        assert ModelRouter.task_key("Click  the Continue button", None) == ModelRouter.task_key("click the continue button", "")
+        assert ModelRouter.task_key(STEP, "Intro") != ModelRouter.task_key(STEP, "Auth")
+
+    def test_statistics_of_all_workers_are_summed(self, tmp_path):
+        """Counts written by other parallel workers are part of the decision."""
+        router = _router(tmp_path)
+        key = router.task_key(STEP)
+        with open(tmp_path / "other_worker.json", "w") as f:
+            json.dump({"tasks": {key: {"description": STEP, "models": {"gpt-4o-mini": {"attempts": 2, "successes": 0}}}},
+                       "tiers": {"gpt-4o-mini": {"attempts": 2, "successes": 0}}}, f)
+
+        router.record(key, STEP, "gpt-4o-mini", False)
+
+        assert router.escalation(key) == ["gpt-4o"]
+        assert router.path.name != "other_worker.json"
+        with open(router.path) as f:
+            assert json.load(f)["tasks"][key]["models"]["gpt-4o-mini"] == {"attempts": 1, "successes": 0}
+
+    def test_unreadable_statistics_are_ignored(self, tmp_path):
+        """A corrupt statistics file doesn't stop routing."""
+        (tmp_path / "other_worker.json").write_text("{not json")
+        router = _router(tmp_path)
+
+        assert router.escalation(router.task_key(STEP)) == TIERS
+
+    def test_attempts_without_a_model_are_not_recorded(self, tmp_path):
+        """Attempts on the browser's default model say nothing about a tier."""
+        router = _router(tmp_path)
+
+        router.record(router.task_key(STEP), STEP, None, False)
+
+        assert not list(tmp_path.iterdir())
@@ -1,52 +1,76 @@
 """Tests for verifying the navigation structure of the app."""
 import pytest
 import asyncio
-import base64
-import time
 import os
 from typing import Dict, Any, List, Tuple, Optional
 from loguru import logger
 from pathlib import Path
-from enum import Enum
 
+from config.config import SCREEN_CLASSIFIER_MIN_CONFIDENCE, VISION_MODEL
 from lib.base_test import BaseLLMTest
+from lib.llm_metrics import llm_metrics
+from lib.screen_cache import ScreenClassificationCache
+from lib.screen_classifier import ScreenType, classify_screen
 from lib.utils import load_test_data
-from openai import AsyncOpenAI
-
-
-class ScreenType(Enum):
-    """Enum representing different screen types in the app."""
-    INTRO = "intro"
-    AUTH = "auth"
-    SIGN_IN = "sign_in"
-    FTUX = "ftux"
-    MAIN_APP = "main_app"
-    UNKNOWN = "unknown"
+from lib.vision import Region, capture_screen, element_region, load_image, prepare_image
 
 
 class TestNavigationStructure(BaseLLMTest):
     """Test the navigation structure of the app."""
 
-    async def analyze_screen_with_vision(self, browser, screenshot_path: Optional[str] = None) -> Dict[str, Any]:
+    # Classifications of already analyzed screens, keyed by perceptual hash
+    screen_cache = ScreenClassificationCache()
+
+    async def identify_screen(self, browser) -> Dict[str, Any]:
         """
-        Use OpenAI's vision capabilities to analyze the current screen.
+        Determine the current screen type, locally from the DOM when possible.
+
+        The vision model is only consulted when the DOM classifier's confidence
+        is below SCREEN_CLASSIFIER_MIN_CONFIDENCE.
 
         Args:
             browser: LLM Browser instance
-            screenshot_path: Path to the screenshot file (optional)
 
         Returns:
-            Dictionary with the screen analysis
+            Dictionary with the screen type, an analysis text and where the answer came from
         """
-        if not screenshot_path:
-            screenshot_path = await browser._save_screenshot(f"screen_analysis_{int(time.time())}")
+        classification = await classify_screen(browser.page)
+        logger.debug(f"DOM classification: {classification.screen_type} ({classification.confidence}): {classification.reasons}")
+
+        if classification.confidence >= SCREEN_CLASSIFIER_MIN_CONFIDENCE:
+            return {
+                "screen_type": classification.screen_type,
+                "analysis": classification.features.describe(),
+                "confidence": classification.confidence,
+                "source": "dom"
+            }
+
+        logger.info(f"Low DOM classification confidence ({classification.confidence}), asking the vision model")
+        screen_analysis = await self.analyze_screen_with_vision(browser)
+        screen_analysis["source"] = "vision"
+        return screen_analysis
 
-        # Read the screenshot file
-        with open(screenshot_path, "rb") as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode("utf-8")
+    async def analyze_screen_with_vision(self,
+                                         browser,
+                                         screenshot_path: Optional[str] = None,
+                                         detail: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Use OpenAI's vision capabilities to analyze the current screen.
+
+        Args:
+            browser: LLM Browser instance
+            screenshot_path: Path to a screenshot file to analyze instead of the live page (optional)
+            detail: Image detail level (low, high, auto); defaults to VISION_DETAIL
 
-        # Create OpenAI client
-        client = AsyncOpenAI()
+        Returns:
+            Dictionary with the screen analysis
+        """
+        # Take the screenshot in memory unless one was given
+        if screenshot_path:
+            with open(screenshot_path, "rb") as image_file:
+                image_bytes = image_file.read()
+        else:
+            image_bytes = await capture_screen(browser.page)
 
         # Prompt for screen analysis
         analysis_prompt = """
@@ -58,15 +82,32 @@ class TestNavigationStructure(BaseLLMTest):
         Be specific and detailed in your analysis.
         """
 
+        # Reuse the analysis of a visually equivalent screen
+        namespace = self.screen_cache.namespace(VISION_MODEL, analysis_prompt)
+        cached = self.screen_cache.lookup(image_bytes, namespace)
+        if cached:
+            llm_metrics.record_cache_hit("vision_analysis", VISION_MODEL)
+            logger.info(f"Screen classified from cache as {cached['screen_type']}")
+            return {
+                "screen_type": ScreenType(cached["screen_type"]),
+                "analysis": cached["analysis"],
+                "screenshot_path": screenshot_path,
+                "cached": True
+            }
+
+        # Downscale and re-encode to cut upload size and image tokens
+        image = prepare_image(image_bytes, **({"detail": detail} if detail else {}))
+
         # Send the image to OpenAI's vision model
-        response = await client.chat.completions.create(
-            model="gpt-4o",
+        response = await self.llm_client.chat(
+            "vision_analysis",
+            model=VISION_MODEL,
             messages=[
                 {
                     "role": "user",
                     "content": [
                         {"type": "text", "text": analysis_prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{base64_image}"}},
+                        image.to_content(),
                     ],
                 }
             ],
@@ -91,40 +132,60 @@ class TestNavigationStructure(BaseLLMTest):
         elif "navigation" in response_text.lower() or "tab bar" in response_text.lower() or "main app" in response_text.lower():
             screen_type = ScreenType.MAIN_APP
 
+        # Unknown screens are often transient (loading, animating), so only remember real classifications
+        if screen_type != ScreenType.UNKNOWN:
+            self.screen_cache.store(image_bytes, namespace, screen_type.value, response_text)
+
         return {
             "screen_type": screen_type,
             "analysis": response_text,
-            "screenshot_path": screenshot_path
+            "screenshot_path": screenshot_path,
+            "cached": False
         }
 
-    async def verify_with_vision(self, browser, screenshot_path: str, prompt: str) -> Dict[str, Any]:
+    async def verify_with_vision(self,
+                                 browser,
+                                 screenshot_path: Optional[str],
+                                 prompt: str,
+                                 region: Optional[Region] = None,
+                                 detail: Optional[str] = None,
+                                 selector: Optional[str] = None) -> Dict[str, Any]:
         """
         Use OpenAI's vision capabilities to verify UI elements in a screenshot.
 
         Args:
             browser: LLM Browser instance
-            screenshot_path: Path to the screenshot file
+            screenshot_path: Path to a screenshot file, or None to capture the live page in memory
             prompt: Question to ask about the screenshot
+            region: Region of interest to crop to
+            detail: Image detail level (low, high, auto); defaults to VISION_DETAIL
+            selector: Element to verify; the live page capture is cropped to it
 
         Returns:
             Dictionary with the verification result
         """
-        # Read the screenshot file
-        with open(screenshot_path, "rb") as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode("utf-8")
-
-        # Create OpenAI client
-        client = AsyncOpenAI()
+        options = {"detail": detail} if detail else {}
+        if selector and not region and not screenshot_path:
+            region = await element_region(browser.page, selector)
+
+        if screenshot_path and not region:
+            image = load_image(screenshot_path, **options)
+        elif screenshot_path:
+            with open(screenshot_path, "rb") as image_file:
+                image = prepare_image(image_file.read(), region=region, **options)
+        else:
+            image = prepare_image(await capture_screen(browser.page, region), **options)
 
         # Send the image to OpenAI's vision model
-        response = await client.chat.completions.create(
-            model="gpt-4o",
+        response = await self.llm_client.chat(
+            "vision_verify",
+            model=VISION_MODEL,
             messages=[
                 {
                     "role": "user",
                     "content": [
                         {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{base64_image}"}},
+                        image.to_content(),
                     ],
                 }
             ],
@@ -142,18 +203,19 @@ class TestNavigationStructure(BaseLLMTest):
             "response": response_text
         }
 
-    async def navigate_intro_screen(self, browser) -> bool:
+    async def navigate_intro_screen(self, browser, screen_analysis: Optional[Dict[str, Any]] = None) -> bool:
         """
         Navigate through an intro screen.
 
         Args:
             browser: LLM Browser instance
+            screen_analysis: Result of identify_screen() for the current screen, if already known
 
         Returns:
             True if navigation was successful, False otherwise
         """
         # Analyze the screen to determine what buttons are available
-        screen_analysis = await self.analyze_screen_with_vision(browser)
+        screen_analysis = screen_analysis or await self.identify_screen(browser)
         analysis_text = screen_analysis["analysis"].lower()
 
         # Look for common intro screen actions
@@ -174,18 +236,19 @@ class TestNavigationStructure(BaseLLMTest):
 
         return result.get("success", False)
 
-    async def navigate_auth_screen(self, browser) -> bool:
+    async def navigate_auth_screen(self, browser, screen_analysis: Optional[Dict[str, Any]] = None) -> bool:
         """
         Navigate through an authentication screen.
 
         Args:
             browser: LLM Browser instance
+            screen_analysis: Result of identify_screen() for the current screen, if already known
 
         Returns:
             True if navigation was successful, False otherwise
         """
         # Analyze the screen to determine what options are available
-        screen_analysis = await self.analyze_screen_with_vision(browser)
+        screen_analysis = screen_analysis or await self.identify_screen(browser)
         analysis_text = screen_analysis["analysis"].lower()
 
         # Look for sign in option
@@ -258,11 +321,11 @@ class TestNavigationStructure(BaseLLMTest):
             attempts += 1
             logger.info(f"Navigation attempt {attempts}/{max_attempts}")
 
-            # Analyze the current screen
-            screen_analysis = await self.analyze_screen_with_vision(browser)
+            # Identify the current screen
+            screen_analysis = await self.identify_screen(browser)
             screen_type = screen_analysis["screen_type"]
 
-            logger.info(f"Current screen type: {screen_type}")
+            logger.info(f"Current screen type: {screen_type} (from {screen_analysis['source']})")
 
             # Handle different screen types
             if screen_type == ScreenType.MAIN_APP:
@@ -270,12 +333,12 @@ class TestNavigationStructure(BaseLLMTest):
                 return True
             elif screen_type == ScreenType.INTRO:
                 logger.info("Navigating intro screen")
-                if not await self.navigate_intro_screen(browser):
+                if not await self.navigate_intro_screen(browser, screen_analysis):
                     logger.warning("Failed to navigate intro screen")
                     return False
             elif screen_type == ScreenType.AUTH and not signed_in:
                 logger.info("Navigating auth screen")
-                if not await self.navigate_auth_screen(browser):
+                if not await self.navigate_auth_screen(browser, screen_analysis):
                     logger.warning("Failed to navigate auth screen")
                     return False
             elif screen_type == ScreenType.SIGN_IN and not signed_in:
@@ -308,8 +371,8 @@ class TestNavigationStructure(BaseLLMTest):
                     logger.warning("Failed to navigate unknown screen")
                     return False
 
-            # Wait a moment for the next screen to load
-            await asyncio.sleep(2)
+            # Wait for the next screen to finish loading
+            await browser.wait_for_settle()
 
         logger.warning(f"Failed to reach the main app after {max_attempts} attempts")
         return False
@@ -0,0 +1,71 @@
+"""Tests for the compiled step plan store."""
+from lib.plan_store import PlanStore
+
+
+TEST_ID = "tests/test_signup_mbti_flow.py::TestSignupMBTIFlow::test_signup"
+STEP = "Click the Sign Up button"
+ACTIONS = [{"type": "click", "selector": "[data-testid=\"sign-up\"]", "description": "Sign up"}]
+
+
+class TestPlanStore:
+    """Plans are recorded per step and screen fingerprint."""
+
+    def test_record_then_lookup(self, tmp_path):
+        """A recorded plan is found for the same step on the same screen."""
+        store = PlanStore(plan_dir=str(tmp_path))
+
+        store.record(TEST_ID, STEP, None, "screen-a", ACTIONS, {"Email field": "input[name=\"email\"]"})
+
+        plan = store.lookup(TEST_ID, STEP, None, "screen-a")
+        assert plan["actions"] == ACTIONS
+        assert plan["verify"] == {"Email field": "input[name=\"email\"]"}
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_lookup_matches_description_loosely_and_screen_exactly(self, tmp_path):
+        """Formatting of the description doesn't matter; the screen and context do."""
+        store = PlanStore(plan_dir=str(tmp_path))
+        store.record(TEST_ID, STEP, "On the auth screen", "screen-a", ACTIONS)
+
+        assert store.lookup(TEST_ID, "click the  sign up button", "on the auth screen", "screen-a") is not None
+        assert store.lookup(TEST_ID, STEP, "On the auth screen", "screen-b") is None
+        assert store.lookup(TEST_ID, STEP, None, "screen-a") is None
+        assert store.lookup("another_test", STEP, "On the auth screen", "screen-a") is None
+
+    def test_variants_are_kept_per_screen(self, tmp_path):
+        """A step keeps its most recent max_variants screens."""
+        store = PlanStore(plan_dir=str(tmp_path), max_variants=2)
+
+        for screen in ("screen-a", "screen-b", "screen-c"):
+            store.record(TEST_ID, STEP, None, screen, ACTIONS)
+
+        assert store.lookup(TEST_ID, STEP, None, "screen-a") is None
+        assert store.lookup(TEST_ID, STEP, None, "screen-b") is not None
+        assert store.lookup(TEST_ID, STEP, None, "screen-c") is not None
+
+    def test_invalidate_drops_only_that_screen(self, tmp_path):
+        """Invalidating a plan leaves the step's other variants."""
+        store = PlanStore(plan_dir=str(tmp_path))
+        store.record(TEST_ID, STEP, None, "screen-a", ACTIONS)
+        store.record(TEST_ID, STEP, None, "screen-b", ACTIONS)
+
+        store.invalidate(TEST_ID, STEP, None, "screen-a")
+
+        assert store.lookup(TEST_ID, STEP, None, "screen-a") is None
+        assert store.lookup(TEST_ID, STEP, None, "screen-b") is not None
+
+    def test_empty_plans_are_not_recorded(self, tmp_path):
+        """A step that needed no actions has nothing to replay."""
+        store = PlanStore(plan_dir=str(tmp_path))
+
+        store.record(TEST_ID, STEP, None, "screen-a", [])
+
+        assert store.lookup(TEST_ID, STEP, None, "screen-a") is None
+
+    def test_disabled_store_records_nothing(self, tmp_path):
+        """A disabled store never replays and never writes."""
+        store = PlanStore(plan_dir=str(tmp_path / "plans"), enabled=False)
+
+        store.record(TEST_ID, STEP, None, "screen-a", ACTIONS)
+
+        assert store.lookup(TEST_ID, STEP, None, "screen-a") is None
+        assert not (tmp_path / "plans").exists()
@@ -0,0 +1,131 @@
+"""Tests for recorded transcripts and the offline replay server."""
+import json
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List
+
+import pytest
+
+from lib.replay_server import ReplayServer
+from lib.transcripts import TranscriptStore, request_fingerprint
+
+
+REQUEST = {
+    "model": "gpt-4o-mini",
+    "response_format": {"type": "json_object"},
+    "messages": [
+        {"role": "system", "content": "Plan browser actions."},
+        {"role": "user", "content": "Click the Continue button"}
+    ]
+}
+
+RESPONSE = {
+    "id": "chatcmpl-recorded",
+    "object": "chat.completion",
+    "created": 1700000000,
+    "model": "gpt-4o-mini",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "{\"actions\": []}"},
+        "finish_reason": "stop"
+    }],
+    "usage": {"prompt_tokens": 12, "completion_tokens": 5, "total_tokens": 17}
+}
+
+
+@pytest.fixture
+def replay_server(tmp_path):
+    """Replay server answering from a store holding one recorded transcript."""
+    store = TranscriptStore(str(tmp_path))
+    store.save(REQUEST, RESPONSE, latency_s=0.5)
+    server = ReplayServer(store, chunk_chars=4)
+    server.start()
+    try:
+        yield server
+    finally:
+        server.stop()
+
+
+def _post(server: ReplayServer, body: Dict[str, Any]):
+    request = urllib.request.Request(
+        f"{server.url}/chat/completions",
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    return urllib.request.urlopen(request, timeout=5)
+
+
+def _stream_events(raw: str) -> List[Any]:
+    return [line[len("data: "):] for line in raw.splitlines() if line.startswith("data: ")]
+
+
+class TestRequestFingerprint:
+    """Recording and replay compute the same fingerprint for the same request."""
+
+    def test_key_order_and_transport_fields_are_ignored(self):
+        """Streaming options and key order don't change what the model answers."""
+        reordered = {"messages": REQUEST["messages"], "response_format": REQUEST["response_format"],
+                     "model": REQUEST["model"], "stream": True, "stream_options": {"include_usage": True}}
+
+        assert request_fingerprint(reordered) == request_fingerprint(REQUEST)
+
+    def test_prompt_changes_the_fingerprint(self):
+        """A different message is a different request."""
+        changed = {**REQUEST, "messages": REQUEST["messages"][:1] + [{"role": "user", "content": "Click Back"}]}
+
+        assert request_fingerprint(changed) != request_fingerprint(REQUEST)
+
+    def test_store_round_trip(self, tmp_path):
+        """A saved transcript loads under its request's fingerprint."""
+        store = TranscriptStore(str(tmp_path))
+
+        fingerprint = store.save(REQUEST, RESPONSE, latency_s=0.5)
+
+        assert store.load(fingerprint)["response"] == RESPONSE
+        assert store.load(request_fingerprint({**REQUEST, "model": "gpt-4o"})) is None
+
+
+class TestReplayServer:
+    """The server answers recorded requests and rejects unknown ones."""
+
+    def test_recorded_request_is_replayed(self, replay_server):
+        """A request seen while recording gets the recorded response."""
+        with _post(replay_server, REQUEST) as response:
+            assert json.loads(response.read()) == RESPONSE
+
+        assert (replay_server.hits, replay_server.misses) == (1, 0)
+
+    def test_unknown_request_is_a_miss(self, replay_server):
+        """A request that was never recorded gets a 404 naming its fingerprint."""
+        unknown = {**REQUEST, "messages": [{"role": "user", "content": "Click Back"}]}
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            _post(replay_server, unknown)
+
+        assert error.value.code == 404
+        assert json.loads(error.value.read())["error"]["code"] == "transcript_not_found"
+        assert (replay_server.hits, replay_server.misses) == (0, 1)
+
+    def test_streamed_request_is_replayed_in_chunks(self, replay_server):
+        """A streamed request gets the recorded content back as chunks, usage and [DONE]."""
+        with _post(replay_server, {**REQUEST, "stream": True, "stream_options": {"include_usage": True}}) as response:
+            events = _stream_events(response.read().decode("utf-8"))
+
+        assert events[-1] == "[DONE]"
+        chunks = [json.loads(event) for event in events[:-1]]
+        content = "".join(choice["delta"].get("content", "") for chunk in chunks for choice in chunk["choices"])
+        assert content == "{\"actions\": []}"
+        assert chunks[-1]["usage"] == RESPONSE["usage"]
+
+    def test_delay_for_is_repeatable(self, tmp_path):
+        """Jitter comes from a seeded generator and recorded latency can be replayed."""
+        transcript = {"latency_s": 0.5}
+        first = ReplayServer(TranscriptStore(str(tmp_path)), latency_ms=100, jitter_ms=50, recorded_latency=True, seed=7)
+        second = ReplayServer(TranscriptStore(str(tmp_path)), latency_ms=100, jitter_ms=50, recorded_latency=True, seed=7)
+        try:
+            delays = [first.delay_for(transcript) for _ in range(3)]
+            assert delays == [second.delay_for(transcript) for _ in range(3)]
+            assert all(0.6 <= delay <= 0.65 for delay in delays)
+        finally:
+            first.server_close()
+            second.server_close()
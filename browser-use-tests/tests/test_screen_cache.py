@@ -0,0 +1,87 @@
+"""Tests for perceptual hashing and the screen classification cache."""
+import io
+
+from PIL import Image, ImageDraw
+
+from lib.image_hash import dhash, hamming_distance
+from lib.screen_cache import ScreenClassificationCache
+
+
+def _screen(heading: str, button_y: int = 600, image_format: str = "PNG") -> bytes:
+    """Render a phone-sized screen with a heading block and a button."""
+    image = Image.new("RGB", (390, 844), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((40, 80, 40 + 20 * len(heading), 130), fill="black")
+    draw.rectangle((40, button_y, 350, button_y + 60), fill=(30, 90, 200))
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class TestDhash:
+    """Visually equivalent screenshots hash close together."""
+
+    def test_reencoding_keeps_the_hash_close(self):
+        """The same screen saved as PNG and JPEG is within a few bits."""
+        assert hamming_distance(dhash(_screen("Welcome")), dhash(_screen("Welcome", image_format="JPEG"))) <= 2
+
+    def test_different_layouts_hash_far_apart(self):
+        """Moving the button to another part of the screen changes many bits."""
+        assert hamming_distance(dhash(_screen("Welcome", 600), 16), dhash(_screen("Welcome", 200), 16)) > 10
+
+    def test_hash_size(self):
+        """The hash has hash_size * hash_size bits."""
+        assert dhash(_screen("Welcome"), 16) < 2 ** 256
+        assert hamming_distance(0b1011, 0b0010) == 2
+
+
+class TestScreenClassificationCache:
+    """Classifications are reused for equivalent screens in the same namespace."""
+
+    def test_equivalent_screen_hits(self, tmp_path):
+        """A re-encoded screenshot of an analyzed screen gets its classification back."""
+        cache = ScreenClassificationCache(cache_dir=str(tmp_path), max_distance=10)
+        namespace = cache.namespace("gpt-4o", "Classify this screen")
+        cache.store(_screen("Welcome"), namespace, "intro", "An intro screen")
+
+        hit = cache.lookup(_screen("Welcome", image_format="JPEG"), namespace)
+
+        assert hit["screen_type"] == "intro"
+        assert hit["distance"] <= 10
+
+    def test_different_screen_misses(self, tmp_path):
+        """A screen with another layout is analyzed again."""
+        cache = ScreenClassificationCache(cache_dir=str(tmp_path), max_distance=10)
+        namespace = cache.namespace("gpt-4o", "Classify this screen")
+        cache.store(_screen("Welcome", 600), namespace, "intro", "An intro screen")
+
+        assert cache.lookup(_screen("Welcome", 200), namespace) is None
+
+    def test_other_namespace_misses(self, tmp_path):
+        """Another model or prompt never sees the classification."""
+        cache = ScreenClassificationCache(cache_dir=str(tmp_path))
+        cache.store(_screen("Welcome"), cache.namespace("gpt-4o", "Classify"), "intro", "An intro screen")
+
+        assert cache.lookup(_screen("Welcome"), cache.namespace("gpt-4o", "Describe")) is None
+        assert cache.lookup(_screen("Welcome"), cache.namespace("gpt-4o-mini", "Classify")) is None
+
+    def test_entries_persist_and_are_capped(self, tmp_path):
+        """Classifications are written to disk and only the newest max_entries are kept."""
+        cache = ScreenClassificationCache(cache_dir=str(tmp_path), max_distance=0, max_entries=2)
+        namespace = cache.namespace("gpt-4o", "Classify")
+        for button_y in (100, 400, 700):
+            cache.store(_screen("Welcome", button_y), namespace, f"screen_{button_y}", "")
+
+        reloaded = ScreenClassificationCache(cache_dir=str(tmp_path), max_distance=0)
+        assert reloaded.lookup(_screen("Welcome", 100), namespace) is None
+        assert reloaded.lookup(_screen("Welcome", 700), namespace)["screen_type"] == "screen_700"
+
+    def test_disabled_cache_stores_nothing(self, tmp_path):
+        """A disabled cache never hits and never writes."""
+        cache = ScreenClassificationCache(cache_dir=str(tmp_path), enabled=False)
+        namespace = cache.namespace("gpt-4o", "Classify")
+
+        cache.store(_screen("Welcome"), namespace, "intro", "")
+
+        assert cache.lookup(_screen("Welcome"), namespace) is None
+        assert not list(tmp_path.iterdir())
@@ -0,0 +1,73 @@
+"""Tests for the local DOM screen classifier."""
+import pytest
+
+from lib.screen_classifier import ScreenFeatures, ScreenType, classify_features
+
+
+class TestClassifyFeatures:
+    """Routes and DOM evidence map to screen types with a confidence."""
+
+    @pytest.mark.parametrize("path, screen_type", [
+        ("/welcome", ScreenType.INTRO),
+        ("/auth", ScreenType.AUTH),
+        ("/signUp", ScreenType.AUTH),
+        ("/signIn", ScreenType.SIGN_IN),
+        ("/mbti", ScreenType.FTUX),
+        ("/createUserProfile", ScreenType.FTUX),
+        ("/(tabs)/chat", ScreenType.MAIN_APP),
+        ("/people/", ScreenType.MAIN_APP),
+    ])
+    def test_route_mapping(self, path, screen_type):
+        """The last path segment decides the type, ignoring case, route groups and trailing slashes."""
+        classification = classify_features(ScreenFeatures(path=path))
+
+        assert classification.screen_type == screen_type
+        assert classification.confidence == 0.7
+
+    def test_route_and_dom_evidence_agree(self):
+        """Agreeing evidence from the route and the page is fully confident."""
+        features = ScreenFeatures(path="/auth", buttons=["Sign In", "Sign Up"])
+
+        classification = classify_features(features)
+
+        assert classification.screen_type == ScreenType.AUTH
+        assert classification.confidence == 1.0
+
+    def test_competing_evidence_lowers_confidence(self):
+        """A sign-up form on the sign-in route is still sign-in, with less confidence."""
+        features = ScreenFeatures(path="/signIn", headings=["Sign up"], inputs=["email:email", "password:password"])
+
+        classification = classify_features(features)
+
+        assert classification.screen_type == ScreenType.SIGN_IN
+        assert classification.confidence == 0.5
+
+    def test_unknown_route_uses_dom_evidence(self):
+        """Without a known route, a sign-in form is recognized from its fields and buttons."""
+        features = ScreenFeatures(path="/", buttons=["Sign In"], inputs=["email:email", "password:password"])
+
+        classification = classify_features(features)
+
+        assert classification.screen_type == ScreenType.SIGN_IN
+        assert classification.confidence == 0.5
+
+    def test_tab_bar_means_main_app(self):
+        """Three or more tabs are the main app's tab bar."""
+        classification = classify_features(ScreenFeatures(path="/", tabs=4))
+
+        assert classification.screen_type == ScreenType.MAIN_APP
+
+    def test_weak_evidence_stays_below_the_vision_threshold(self):
+        """A lone Next button is only a hint of an intro screen."""
+        classification = classify_features(ScreenFeatures(path="/", buttons=["Next"]))
+
+        assert classification.screen_type == ScreenType.INTRO
+        assert classification.confidence < 0.6
+
+    def test_no_evidence_is_unknown(self):
+        """A loading screen has nothing to classify."""
+        classification = classify_features(ScreenFeatures(path="/", loading=True))
+
+        assert classification.screen_type == ScreenType.UNKNOWN
+        assert classification.confidence == 0.0
+        assert classification.reasons == ["loading indicator only"]
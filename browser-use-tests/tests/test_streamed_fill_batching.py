@@ -0,0 +1,132 @@
+"""Tests that streamed action plans run early and batch the fills that pile up."""
+import asyncio
+import json
+import pytest
+from typing import Any, Dict, List, Optional
+
+import lib.llm_browser as llm_browser
+from lib.dom_snapshot import DomSnapshot
+from lib.llm_browser import LLMBrowser
+from lib.llm_cache import LLMCache
+
+
+class FakeStreamingLLM:
+    """Streams a canned actions response a few characters at a time.
+
+    With a chunk delay the stream yields to the event loop between chunks, like
+    a network stream; without one it is generated in a single step.
+    """
+
+    def __init__(self, actions: List[Dict[str, Any]], events: List[tuple], chunk_chars: int = 7,
+                 chunk_delay: Optional[float] = None):
+        self.text = json.dumps({"actions": actions})
+        self.events = events
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay
+
+    async def stream(self, kind: str, **kwargs):
+        for start in range(0, len(self.text), self.chunk_chars):
+            if self.chunk_delay is not None:
+                await asyncio.sleep(self.chunk_delay)
+            yield self.text[start:start + self.chunk_chars]
+        self.events.append(("end_of_stream",))
+
+
+class RecordingPage:
+    """Records the Playwright calls the actions make, each taking delay seconds."""
+
+    url = "http://localhost:8081/signup"
+
+    def __init__(self, events: List[tuple], delay: float = 0):
+        self.calls = events
+        self.delay = delay
+
+    async def _call(self, *call) -> None:
+        self.calls.append(call)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+    async def evaluate(self, script: str, fields: List[Dict[str, str]]) -> Dict[str, Any]:
+        await self._call("evaluate", [field["selector"] for field in fields])
+        return {"filled": len(fields), "error": None}
+
+    async def fill(self, selector: str, value: str) -> None:
+        await self._call("fill", selector)
+
+    async def click(self, selector: str) -> None:
+        await self._call("click", selector)
+
+
+def _streaming_browser(monkeypatch, tmp_path, actions: List[Dict[str, Any]], chunk_delay: Optional[float] = None,
+                       page_delay: float = 0) -> LLMBrowser:
+    monkeypatch.setattr(llm_browser, "LLM_STREAM_ACTIONS", True)
+    events = []
+    llm = FakeStreamingLLM(actions, events, chunk_delay=chunk_delay)
+    browser = LLMBrowser(screenshot_dir=str(tmp_path), cache=LLMCache(enabled=False), llm_client=llm)
+    browser.browser = object()
+    browser.page = RecordingPage(events, page_delay)
+
+    async def snapshot_page():
+        return DomSnapshot.from_records(browser.page.url, [])
+
+    async def capture_screenshot(name: str, kind: str) -> None:
+        return None
+
+    browser._snapshot_page = snapshot_page
+    browser._capture_screenshot = capture_screenshot
+    return browser
+
+
+EMAIL = "input[name=\"email\"]"
+PASSWORD = "input[name=\"password\"]"
+CONFIRM = "input[name=\"confirmPassword\"]"
+SUBMIT = "[data-testid=\"create-account\"]"
+
+SIGNUP_FILLS = [
+    {"type": "input", "selector": EMAIL, "value": "test@example.com", "description": "Email"},
+    {"type": "fill", "selector": PASSWORD, "value": "Secret123!", "description": "Password"},
+    {"type": "fill", "selector": CONFIRM, "value": "Secret123!", "description": "Confirm password"},
+]
+SUBMIT_CLICK = {"type": "click", "selector": SUBMIT, "description": "Submit"}
+
+
+class TestStreamedFillBatching:
+    """Streamed actions run as they arrive; fills that pile up meanwhile are filled together."""
+
+    @pytest.mark.asyncio
+    async def test_first_fill_runs_before_the_stream_ends(self, monkeypatch, tmp_path):
+        """A fill isn't held back waiting for the rest of the plan."""
+        browser = _streaming_browser(monkeypatch, tmp_path, SIGNUP_FILLS + [SUBMIT_CLICK], chunk_delay=0.001)
+
+        result = await browser.execute_task("Fill out the sign-up form and submit it")
+
+        assert result["success"]
+        calls = browser.page.calls
+        assert calls.index(("fill", EMAIL)) < calls.index(("end_of_stream",))
+        assert ("fill", PASSWORD) in calls
+
+    @pytest.mark.asyncio
+    async def test_fills_generated_while_busy_are_batched(self, monkeypatch, tmp_path):
+        """Fills generated while the browser is busy run in one page.evaluate() before the click after them."""
+        browser = _streaming_browser(monkeypatch, tmp_path, SIGNUP_FILLS + [SUBMIT_CLICK], chunk_delay=0, page_delay=0.05)
+
+        result = await browser.execute_task("Fill out the sign-up form and submit it")
+
+        assert result["success"]
+        assert [call for call in browser.page.calls if call[0] != "end_of_stream"] == [
+            ("fill", EMAIL),
+            ("evaluate", [PASSWORD, CONFIRM]),
+            ("click", SUBMIT),
+        ]
+        assert [r.get("batched", False) for r in result["results"]] == [False, True, True, False]
+
+    @pytest.mark.asyncio
+    async def test_fills_generated_at_once_are_batched(self, monkeypatch, tmp_path):
+        """Fills that are all generated before the browser gets to them are filled as one batch."""
+        browser = _streaming_browser(monkeypatch, tmp_path, SIGNUP_FILLS)
+
+        result = await browser.execute_task("Fill out the sign-up form")
+
+        assert result["success"]
+        assert browser.page.calls == [("end_of_stream",), ("evaluate", [EMAIL, PASSWORD, CONFIRM])]
+        assert len(result["results"]) == 3